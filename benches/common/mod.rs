@@ -0,0 +1,12 @@
+//! Source generators shared by the benchmarks.
+
+/// A module-level string built from `terms` concatenations, parsed as a
+/// left-nested chain as deep as `terms`
+pub fn create_string_concatenation(terms: usize) -> String {
+    let mut code = String::from("QUERY = \"SELECT 0\"");
+    for i in 0..terms {
+        code.push_str(&format!(" + \" UNION SELECT {}\"", i));
+    }
+    code.push('\n');
+    code
+}
@@ -1,10 +1,17 @@
-use criterion::{black_box, criterion_group, criterion_main, Criterion};
+mod common;
+
+use criterion::{black_box, criterion_group, criterion_main, BenchmarkId, Criterion};
 use prylint::config::Config;
+use prylint::errors::Issue;
 use prylint::linter::Linter;
+use prylint::reporter::Reporter;
 use std::fs;
+use std::io::{self, BufWriter, Write};
 use std::path::PathBuf;
 use tempfile::TempDir;
 
+use common::create_string_concatenation;
+
 fn create_large_python_file(lines: usize) -> String {
     let mut code = String::new();
     
@@ -85,5 +92,103 @@ fn benchmark_linting(c: &mut Criterion) {
     });
 }
 
-criterion_group!(benches, benchmark_linting);
+fn create_nested_lists(depth: usize) -> String {
+    format!("TABLE = {}0{}\n", "[".repeat(depth), "]".repeat(depth))
+}
+
+fn benchmark_pathological_nesting(c: &mut Criterion) {
+    let dir = TempDir::new().unwrap();
+    let config = Config::default();
+    let mut group = c.benchmark_group("pathological_nesting");
+
+    for size in [1_000, 5_000, 20_000] {
+        let chain_file = dir.path().join(format!("chain_{}.py", size));
+        fs::write(&chain_file, create_string_concatenation(size)).unwrap();
+        group.bench_with_input(BenchmarkId::new("binop_chain", size), &chain_file, |b, file| {
+            let linter = Linter::new(config.clone());
+            b.iter(|| linter.check_file(black_box(file)));
+        });
+
+        let nested_file = dir.path().join(format!("nested_{}.py", size));
+        fs::write(&nested_file, create_nested_lists(size / 10)).unwrap();
+        group.bench_with_input(BenchmarkId::new("nested_lists", size / 10), &nested_file, |b, file| {
+            let linter = Linter::new(config.clone());
+            b.iter(|| linter.check_file(black_box(file)));
+        });
+    }
+
+    group.finish();
+}
+
+fn create_literal_table(entries: usize) -> String {
+    let mut code = String::from("TABLE = {\n");
+    for i in 0..entries {
+        code.push_str(&format!("    \"key_{:06}\": ({}, {}.5, \"value {}\"),\n", i, i, i, i));
+    }
+    code.push_str("}\n");
+    code
+}
+
+fn benchmark_literal_tables(c: &mut Criterion) {
+    let dir = TempDir::new().unwrap();
+    let config = Config::default();
+    let mut group = c.benchmark_group("literal_tables");
+    group.sample_size(10);
+
+    // Roughly 0.5 MB, 2.5 MB and 5 MB of source
+    for entries in [10_000, 50_000, 100_000] {
+        let file = dir.path().join(format!("table_{}.py", entries));
+        fs::write(&file, create_literal_table(entries)).unwrap();
+        group.bench_with_input(BenchmarkId::new("dict_literal", entries), &file, |b, file| {
+            let linter = Linter::new(config.clone());
+            b.iter(|| linter.check_file(black_box(file)));
+        });
+    }
+
+    group.finish();
+}
+
+fn synthetic_issues(count: usize) -> Vec<Issue> {
+    (0..count)
+        .map(|i| {
+            Issue::new(
+                "E0602".to_string(),
+                format!("Undefined variable 'name_{}'", i % 1000),
+                PathBuf::from(format!("src/package/module_{}.py", i / 50)),
+                i % 50 + 1,
+                4,
+                "undefined-variable".to_string(),
+            )
+        })
+        .collect()
+}
+
+fn benchmark_report_serialization(c: &mut Criterion) {
+    let issues = synthetic_issues(1_000_000);
+    let mut group = c.benchmark_group("report_serialization");
+    group.sample_size(10);
+
+    // Written to a sink behind the same buffer size as stdout, without color
+    // as when piped
+    for format in ["text", "parseable", "json"] {
+        let reporter = Reporter::new(Some(format)).with_color(false);
+        group.bench_with_input(BenchmarkId::new("1M_issues", format), &issues, |b, issues| {
+            b.iter(|| {
+                let mut out = BufWriter::with_capacity(64 * 1024, io::sink());
+                reporter.write_issues(&mut out, black_box(issues)).unwrap();
+                out.flush().unwrap();
+            });
+        });
+    }
+
+    group.finish();
+}
+
+criterion_group!(
+    benches,
+    benchmark_linting,
+    benchmark_pathological_nesting,
+    benchmark_literal_tables,
+    benchmark_report_serialization
+);
 criterion_main!(benches);
\ No newline at end of file
@@ -0,0 +1,90 @@
+//! Peak heap usage of a parallel run with and without `max_memory`.
+//!
+//! Run with `cargo bench --bench memory_usage`.
+
+mod common;
+
+use prylint::config::Config;
+use prylint::linter::Linter;
+use std::alloc::{GlobalAlloc, Layout, System};
+use std::fs;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use tempfile::TempDir;
+
+use common::create_string_concatenation;
+
+struct PeakAllocator;
+
+static CURRENT: AtomicUsize = AtomicUsize::new(0);
+static PEAK: AtomicUsize = AtomicUsize::new(0);
+
+unsafe impl GlobalAlloc for PeakAllocator {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        let ptr = System.alloc(layout);
+        if !ptr.is_null() {
+            let current = CURRENT.fetch_add(layout.size(), Ordering::Relaxed) + layout.size();
+            PEAK.fetch_max(current, Ordering::Relaxed);
+        }
+        ptr
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        System.dealloc(ptr, layout);
+        CURRENT.fetch_sub(layout.size(), Ordering::Relaxed);
+    }
+}
+
+#[global_allocator]
+static GLOBAL: PeakAllocator = PeakAllocator;
+
+/// A module of `functions` functions; `module` sets a constant so that no
+/// two modules are byte-identical and each is parsed on its own
+fn create_module(module: usize, functions: usize) -> String {
+    let mut code = format!("MODULE_ID = {}\n\n", module);
+    for i in 0..functions {
+        code.push_str(&format!(
+            "def function_{}(a, b):\n    total = a + b\n    for i in range(b):\n        total += i\n    return total\n\n",
+            i
+        ));
+    }
+    code
+}
+
+fn measure(label: &str, config: Config, dir: &TempDir) {
+    let mut linter = Linter::new(config);
+    let baseline = CURRENT.load(Ordering::Relaxed);
+    PEAK.store(baseline, Ordering::Relaxed);
+
+    let issues = linter.check_paths(&[dir.path().to_path_buf()]).unwrap();
+    let peak = PEAK.load(Ordering::Relaxed) - baseline;
+    println!(
+        "{:<24} peak heap {:>8.1} MiB ({} issues)",
+        label,
+        peak as f64 / (1 << 20) as f64,
+        issues.len()
+    );
+}
+
+fn main() {
+    let dir = TempDir::new().unwrap();
+    for i in 0..32 {
+        fs::write(dir.path().join(format!("module_{}.py", i)), create_module(i, 5_000)).unwrap();
+    }
+
+    let mut config = Config::default();
+    config.jobs = config.jobs.max(4);
+    measure("unbounded", config.clone(), &dir);
+
+    for budget in [16u64 << 20, 4 << 20, 1 << 20] {
+        let mut bounded = config.clone();
+        bounded.max_memory = Some(budget);
+        measure(&format!("max_memory={}MiB", budget >> 20), bounded, &dir);
+    }
+
+    // Peak memory should grow linearly with the length of an operator chain
+    for terms in [1_000, 5_000, 20_000] {
+        let chain_dir = TempDir::new().unwrap();
+        fs::write(chain_dir.path().join("chain.py"), create_string_concatenation(terms)).unwrap();
+        measure(&format!("binop_chain={}", terms), Config::default(), &chain_dir);
+    }
+}
@@ -8,6 +8,7 @@ compared to traditional Python linters.
 __version__ = "0.1.0"
 __author__ = "Adam Raudonis"
 
-from .linter import lint_file, lint_directory, PrylintError
+from .linter import lint_file, lint_directory, lint_table, Issue, PrylintError
+from .table import IssueTable
 
-__all__ = ["lint_file", "lint_directory", "PrylintError", "__version__"]
\ No newline at end of file
+__all__ = ["lint_file", "lint_directory", "lint_table", "Issue", "IssueTable", "PrylintError", "__version__"]
\ No newline at end of file
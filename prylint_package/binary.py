@@ -0,0 +1,149 @@
+"""Decoder for the binary result stream written by ``prylint -f binary``.
+
+The stream starts with ``b"PRYB"`` and a little-endian ``u16`` version,
+followed by records of a ``u8`` kind, a ``u32`` payload length and the
+payload. File paths and rules are defined once by their own records and
+referred to by id from issue records. See ``src/binary_report.rs`` for the
+writer.
+"""
+
+import struct
+import sys
+from array import array
+from typing import Callable, List, Tuple, TypeVar
+
+MAGIC = b"PRYB"
+VERSION = 1
+
+END = 0
+FILE = 1
+RULE = 2
+ISSUE = 3
+
+SEVERITIES = ("error", "warning", "convention", "refactor", "info")
+
+_HEADER = struct.Struct("<4sH")
+_RECORD = struct.Struct("<BI")
+_U32 = struct.Struct("<I")
+_ISSUE = struct.Struct("<IIIII")
+
+T = TypeVar("T")
+
+
+class BinaryFormatError(ValueError):
+    """Raised when a stream is not a prylint binary stream this decoder reads."""
+
+
+def decode(data: bytes, make_issue: Callable[..., T]) -> List[T]:
+    """Decode a binary stream into a list of ``make_issue(...)`` results.
+
+    ``make_issue`` is called with the keyword arguments ``code``, ``message``,
+    ``file``, ``line``, ``column``, ``severity`` and ``symbol``. An empty
+    stream, as written when there is nothing to report, decodes to ``[]``.
+    """
+    columns = decode_columns(data)
+    files, rules = columns.files, columns.rules
+    issues = []
+    for file_id, rule_id, line, column, message in zip(
+        columns.file_ids, columns.rule_ids, columns.lines, columns.columns, columns.messages
+    ):
+        code, severity, symbol = rules[rule_id]
+        issues.append(make_issue(
+            code=code,
+            message=message,
+            file=files[file_id],
+            line=line,
+            column=column,
+            severity=severity,
+            symbol=symbol,
+        ))
+    return issues
+
+
+class Columns:
+    """A decoded stream, one column per issue field.
+
+    ``files`` and ``rules`` are the interned tables; ``file_ids`` and
+    ``rule_ids`` index into them.
+    """
+
+    __slots__ = ("files", "rules", "file_ids", "rule_ids", "lines", "columns", "messages")
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.rules: List[Tuple[str, str, str]] = []
+        self.file_ids = array("I")
+        self.rule_ids = array("I")
+        self.lines = array("I")
+        self.columns = array("I")
+        self.messages: List[str] = []
+
+
+def decode_columns(data: bytes) -> Columns:
+    """Decode a binary stream into columns without building per-issue objects."""
+    result = Columns()
+    if not data:
+        return result
+    if len(data) < _HEADER.size:
+        raise BinaryFormatError("truncated header")
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise BinaryFormatError("not a prylint binary stream")
+    if version != VERSION:
+        raise BinaryFormatError(f"unsupported stream version {version}")
+
+    view = memoryview(data)
+    intern = sys.intern
+    files, rules, messages = result.files, result.rules, result.messages
+    add_file, add_rule = result.file_ids.append, result.rule_ids.append
+    add_line, add_column = result.lines.append, result.columns.append
+    pos = _HEADER.size
+    end = len(data)
+
+    try:
+        while pos < end:
+            if pos + _RECORD.size > end:
+                raise BinaryFormatError("truncated record header")
+            kind, length = _RECORD.unpack_from(data, pos)
+            pos += _RECORD.size
+            stop = pos + length
+            if stop > end:
+                raise BinaryFormatError("truncated record")
+
+            if kind == ISSUE:
+                file_id, rule_id, line, column, size = _ISSUE.unpack_from(data, pos)
+                start = pos + _ISSUE.size
+                if start + size > stop:
+                    raise BinaryFormatError("issue message runs past its record")
+                add_file(file_id)
+                add_rule(rule_id)
+                add_line(line)
+                add_column(column)
+                # Messages repeat across issues, so share one string per text
+                messages.append(intern(str(view[start:start + size], "utf-8")))
+            elif kind == FILE:
+                path, _ = _read_str(data, view, pos + 4, stop)
+                files.append(intern(path))
+            elif kind == RULE:
+                severity = SEVERITIES[data[pos + 4]]
+                code, offset = _read_str(data, view, pos + 5, stop)
+                symbol, _ = _read_str(data, view, offset, stop)
+                rules.append((intern(code), severity, intern(symbol)))
+            elif kind == END:
+                return result
+            # Unknown kinds come from newer writers and are skipped
+
+            pos = stop
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        # A payload shorter than its fields, or an unknown severity
+        raise BinaryFormatError(f"malformed record: {e}") from None
+
+    raise BinaryFormatError("stream ended without an end record")
+
+
+def _read_str(data: bytes, view: memoryview, pos: int, stop: int):
+    size = _U32.unpack_from(data, pos)[0]
+    start = pos + 4
+    if start + size > stop:
+        raise BinaryFormatError("string runs past its record")
+    return str(view[start:start + size], "utf-8"), start + size
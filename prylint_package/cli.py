@@ -17,6 +17,7 @@ def main():
 Examples:
   prylint file.py                  # Lint a single file
   prylint src/                     # Lint all Python files in directory
+  prylint pkg-1.0-py3-none-any.whl # Lint the Python files inside a wheel
   prylint --json file.py           # Output as JSON
   prylint --no-recursive src/      # Don't recurse into subdirectories
         """
@@ -75,7 +76,6 @@ Examples:
         if path.is_file():
             issues = lint_file(
                 str(path), 
-                json_output=False,
                 errors_only=args.errors_only,
                 disable=args.disable,
                 enable=args.enable
@@ -84,7 +84,6 @@ Examples:
             issues = lint_directory(
                 str(path),
                 recursive=not args.no_recursive,
-                json_output=False,
                 errors_only=args.errors_only,
                 disable=args.disable,
                 enable=args.enable
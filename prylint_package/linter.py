@@ -1,11 +1,12 @@
 """Main linting interface for Prylint."""
 
-import json
 import subprocess
 import sys
 import os
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+from .binary import BinaryFormatError, decode
 
 
 class PrylintError(Exception):
@@ -16,6 +17,8 @@ class PrylintError(Exception):
 class Issue:
     """Represents a linting issue found by Prylint."""
     
+    __slots__ = ("code", "message", "file", "line", "column", "severity", "symbol")
+    
     def __init__(self, code: str, message: str, file: str, line: int, column: int, severity: str, symbol: str):
         self.code = code
         self.message = message
@@ -79,7 +82,7 @@ def lint_file(filepath: str, json_output: bool = True, errors_only: bool = False
     
     Args:
         filepath: Path to the Python file to lint
-        json_output: Whether to parse JSON output (True) or return raw text
+        json_output: Whether to read structured (binary) output (True) or parse text
         errors_only: Whether to show only errors (ignore warnings)
         disable: Comma-separated list of error codes to disable
         enable: Comma-separated list of error codes to enable
@@ -93,39 +96,7 @@ def lint_file(filepath: str, json_output: bool = True, errors_only: bool = False
     if not os.path.exists(filepath):
         raise PrylintError(f"File not found: {filepath}")
     
-    binary = _find_prylint_binary()
-    
-    cmd = [binary]
-    if json_output:
-        cmd.append("--json")
-    if errors_only:
-        cmd.append("-E")
-    if disable:
-        cmd.extend(["--disable", disable])
-    if enable:
-        cmd.extend(["--enable", enable])
-    cmd.append(filepath)
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        
-        if result.returncode not in [0, 1]:  # 0 = no issues, 1 = issues found
-            raise PrylintError(f"Prylint failed: {result.stderr}")
-        
-        if json_output and result.stdout:
-            try:
-                data = json.loads(result.stdout)
-                return [Issue(**issue) for issue in data.get("issues", [])]
-            except json.JSONDecodeError:
-                # Fall back to text parsing if JSON fails
-                return _parse_text_output(result.stdout)
-        else:
-            return _parse_text_output(result.stdout)
-            
-    except FileNotFoundError:
-        raise PrylintError(f"Could not execute prylint binary at: {binary}")
-    except Exception as e:
-        raise PrylintError(f"Linting failed: {str(e)}")
+    return _run_prylint([filepath], json_output, errors_only, disable, enable)
 
 
 def lint_directory(directory: str, recursive: bool = True, json_output: bool = True,
@@ -137,7 +108,7 @@ def lint_directory(directory: str, recursive: bool = True, json_output: bool = T
     Args:
         directory: Path to the directory to lint
         recursive: Whether to recursively lint subdirectories
-        json_output: Whether to parse JSON output (True) or return raw text
+        json_output: Whether to read structured (binary) output (True) or parse text
         errors_only: Whether to show only errors (ignore warnings)
         disable: Comma-separated list of error codes to disable
         enable: Comma-separated list of error codes to enable
@@ -154,17 +125,26 @@ def lint_directory(directory: str, recursive: bool = True, json_output: bool = T
     if not os.path.isdir(directory):
         raise PrylintError(f"Not a directory: {directory}")
     
-    all_issues = []
-    
+    # The binary walks a directory itself, so a recursive run passes just
+    # the directory rather than every file on one command line
     if recursive:
-        pattern = "**/*.py"
+        paths = [directory]
     else:
-        pattern = "*.py"
+        paths = _python_files(directory, recursive=False)
+        if not paths:
+            return []
+    
+    # One run for the whole directory; only if it fails are the files
+    # linted one by one, skipping those that can't be linted
+    try:
+        return _run_prylint(paths, json_output, errors_only, disable, enable)
+    except PrylintError:
+        pass
     
-    for py_file in Path(directory).glob(pattern):
+    all_issues = []
+    for py_file in _python_files(directory, recursive):
         try:
-            issues = lint_file(str(py_file), json_output=json_output, 
-                             errors_only=errors_only, disable=disable, enable=enable)
+            issues = _run_prylint([py_file], json_output, errors_only, disable, enable)
             all_issues.extend(issues)
         except PrylintError:
             # Skip files that can't be linted
@@ -173,6 +153,108 @@ def lint_directory(directory: str, recursive: bool = True, json_output: bool = T
     return all_issues
 
 
+# Directories the binary skips when it walks a directory; keep in step with
+# Linter::should_ignore
+_IGNORED_DIRS = frozenset({
+    "__pycache__", ".git", ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache",
+})
+
+
+def _python_files(directory: str, recursive: bool) -> List[str]:
+    """The files the binary lints when it walks ``directory``: ``.py`` and
+    ``.pyi`` files outside ignored directories, without following symlinks."""
+    if any(part in _IGNORED_DIRS for part in Path(directory).parts):
+        return []
+    files = []
+    for root, dirs, names in os.walk(directory):
+        if recursive:
+            dirs[:] = [name for name in dirs if name not in _IGNORED_DIRS]
+        else:
+            dirs.clear()
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith((".py", ".pyi")) and not os.path.islink(path):
+                files.append(path)
+    return files
+
+
+def lint_table(paths: Union[str, Sequence[str]], errors_only: bool = False,
+               disable: Optional[str] = None, enable: Optional[str] = None) -> "IssueTable":
+    """
+    Lint files and directories into a columnar ``IssueTable``.
+    
+    Meant for large result sets: no per-issue objects are built until rows
+    are accessed.
+    
+    Args:
+        paths: A file or directory, or a list of them
+        errors_only: Whether to show only errors (ignore warnings)
+        disable: Comma-separated list of error codes to disable
+        enable: Comma-separated list of error codes to enable
+        
+    Returns:
+        An IssueTable with every issue found
+        
+    Raises:
+        PrylintError: If linting fails or a path doesn't exist
+    """
+    from .table import IssueTable
+    
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        if not os.path.exists(path):
+            raise PrylintError(f"Path not found: {path}")
+    
+    output = _invoke(list(paths), True, errors_only, disable, enable)
+    try:
+        return IssueTable.from_binary(output)
+    except BinaryFormatError as e:
+        raise PrylintError(f"Unreadable prylint output: {e}")
+
+
+def _run_prylint(paths: List[str], json_output: bool, errors_only: bool,
+                 disable: Optional[str], enable: Optional[str]) -> List[Issue]:
+    """Run the prylint binary once on ``paths`` and collect its issues."""
+    output = _invoke(paths, json_output, errors_only, disable, enable)
+    if json_output:
+        try:
+            return decode(output, Issue)
+        except BinaryFormatError:
+            # An older binary that ignored the format; fall back to text
+            pass
+    return _parse_text_output(output.decode(errors="replace"))
+
+
+def _invoke(paths: List[str], binary_output: bool, errors_only: bool,
+            disable: Optional[str], enable: Optional[str]) -> bytes:
+    """Run the prylint binary once on ``paths`` and return its stdout."""
+    binary = _find_prylint_binary()
+    
+    cmd = [binary]
+    if binary_output:
+        cmd.extend(["--output-format", "binary"])
+    if errors_only:
+        cmd.append("-E")
+    if disable:
+        cmd.extend(["--disable", disable])
+    if enable:
+        cmd.extend(["--enable", enable])
+    cmd.extend(paths)
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=False)
+    except FileNotFoundError:
+        raise PrylintError(f"Could not execute prylint binary at: {binary}")
+    except Exception as e:
+        raise PrylintError(f"Linting failed: {str(e)}")
+    
+    if result.returncode not in [0, 1]:  # 0 = no issues, 1 = issues found
+        raise PrylintError(f"Prylint failed: {result.stderr.decode(errors='replace')}")
+    
+    return result.stdout
+
+
 def _parse_text_output(output: str) -> List[Issue]:
     """Parse text output from prylint into Issue objects."""
     issues = []
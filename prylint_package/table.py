@@ -0,0 +1,119 @@
+"""Columnar container for large result sets."""
+
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import and_
+from typing import Dict, Iterable, Iterator, List, Optional, Union, overload
+
+from .binary import Columns, decode_columns
+from .linter import Issue
+
+Selector = Optional[Union[str, Iterable[str]]]
+
+
+class IssueTable:
+    """Issues stored column by column instead of one object per issue.
+
+    Lines, columns and the file and rule of each issue are compact integer
+    arrays; file paths, rules and messages are interned strings shared by
+    all rows. Indexing or iterating creates ``Issue`` rows on demand, and
+    ``filter`` selects rows without creating any.
+    """
+
+    __slots__ = ("files", "rules", "file_ids", "rule_ids", "lines", "columns", "messages")
+
+    def __init__(self, columns: Optional[Columns] = None):
+        columns = columns if columns is not None else Columns()
+        self.files = columns.files
+        self.rules = columns.rules
+        self.file_ids = columns.file_ids
+        self.rule_ids = columns.rule_ids
+        self.lines = columns.lines
+        self.columns = columns.columns
+        self.messages = columns.messages
+
+    @classmethod
+    def from_binary(cls, data: bytes) -> "IssueTable":
+        """Build a table from the output of ``prylint --output-format binary``."""
+        return cls(decode_columns(data))
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @overload
+    def __getitem__(self, index: int) -> Issue: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "IssueTable": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._take(range(len(self))[index])
+        code, severity, symbol = self.rules[self.rule_ids[index]]
+        return Issue(
+            code=code,
+            message=self.messages[index],
+            file=self.files[self.file_ids[index]],
+            line=self.lines[index],
+            column=self.columns[index],
+            severity=severity,
+            symbol=symbol,
+        )
+
+    def __iter__(self) -> Iterator[Issue]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"IssueTable({len(self)} issues in {len(set(self.file_ids))} files)"
+
+    def to_list(self) -> List[Issue]:
+        return list(self)
+
+    def filter(self, code: Selector = None, severity: Selector = None, file: Selector = None) -> "IssueTable":
+        """Rows matching every given selector; each is one value or several."""
+        masks = []
+        if code is not None or severity is not None:
+            codes, severities = _as_set(code), _as_set(severity)
+            rule_ok = [
+                (codes is None or rule_code in codes) and (severities is None or rule_severity in severities)
+                for rule_code, rule_severity, _ in self.rules
+            ]
+            masks.append(map(rule_ok.__getitem__, self.rule_ids))
+        if file is not None:
+            files = _as_set(file)
+            file_ok = [path in files for path in self.files]
+            masks.append(map(file_ok.__getitem__, self.file_ids))
+
+        if not masks:
+            return self._take(range(len(self)))
+        mask = masks[0] if len(masks) == 1 else map(and_, *masks)
+        return self._take(list(compress(range(len(self)), mask)))
+
+    def count_by_code(self) -> Dict[str, int]:
+        counts = Counter(self.rule_ids)
+        return {self.rules[rule_id][0]: count for rule_id, count in counts.items()}
+
+    def count_by_file(self) -> Dict[str, int]:
+        counts = Counter(self.file_ids)
+        return {self.files[file_id]: count for file_id, count in counts.items()}
+
+    def _take(self, indices) -> "IssueTable":
+        table = IssueTable.__new__(IssueTable)
+        table.files = self.files
+        table.rules = self.rules
+        table.file_ids = array("I", map(self.file_ids.__getitem__, indices))
+        table.rule_ids = array("I", map(self.rule_ids.__getitem__, indices))
+        table.lines = array("I", map(self.lines.__getitem__, indices))
+        table.columns = array("I", map(self.columns.__getitem__, indices))
+        table.messages = list(map(self.messages.__getitem__, indices))
+        return table
+
+
+def _as_set(selector: Selector):
+    if selector is None:
+        return None
+    if isinstance(selector, str):
+        return {selector}
+    return set(selector)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Generate the standard-library signature table embedded in prylint.
+
+Run this with the interpreter whose stdlib should be described:
+
+    python3.11 scripts/gen_stdlib_signatures.py
+
+It writes ``src/stdlib/<major>.<minor>.tsv``; register the new file in
+``TABLES`` in ``src/stdlib.rs``. Each line describes one public callable:
+
+    module.name <TAB> min_args <TAB> max_args or - <TAB> flags <TAB> required,args
+
+``flags`` contains ``k`` when the callable accepts ``**kwargs``. Lines are
+sorted by their key so the linter can binary-search the table in place.
+"""
+
+import importlib
+import inspect
+import pkgutil
+import sys
+import warnings
+from pathlib import Path
+
+SKIP = {
+    "antigravity", "this", "idlelib", "tkinter", "turtle", "turtledemo",
+    "test", "lib2to3", "ensurepip", "pydoc_data", "__main__",
+}
+
+# Modules that are only reachable as an attribute of another module
+ALIASES = ["os.path"]
+
+
+def module_names():
+    for name in sorted(sys.stdlib_module_names):
+        if name.startswith("_") or name in SKIP:
+            continue
+        yield name
+        try:
+            package = importlib.import_module(name)
+        except Exception:
+            continue
+        if not hasattr(package, "__path__"):
+            continue
+        for info in pkgutil.walk_packages(package.__path__, name + "."):
+            parts = info.name.split(".")
+            if any(p.startswith("_") or p in SKIP or p == "tests" for p in parts):
+                continue
+            yield info.name
+    yield from ALIASES
+
+
+def describe(obj):
+    try:
+        signature = inspect.signature(obj)
+    except (TypeError, ValueError):
+        return None
+
+    required, positional, keyword_only = [], 0, 0
+    varargs = kwargs = False
+    for param in signature.parameters.values():
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            positional += 1
+            if param.default is param.empty:
+                required.append(param.name)
+        elif param.kind is param.VAR_POSITIONAL:
+            varargs = True
+        elif param.kind is param.KEYWORD_ONLY:
+            keyword_only += 1
+        else:
+            kwargs = True
+
+    max_args = "-" if varargs else str(positional + keyword_only)
+    flags = "k" if kwargs else ""
+    return f"{len(required)}\t{max_args}\t{flags}\t{','.join(required)}"
+
+
+def main():
+    warnings.simplefilter("ignore")
+    rows = {}
+    for module_name in module_names():
+        try:
+            module = importlib.import_module(module_name)
+        except BaseException:
+            continue
+        for name in dir(module):
+            if name.startswith("_"):
+                continue
+            obj = getattr(module, name, None)
+            if not (inspect.isroutine(obj) or inspect.isclass(obj)):
+                continue
+            row = describe(obj)
+            if row is not None:
+                rows[f"{module_name}.{name}"] = row
+
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    out = Path(__file__).resolve().parent.parent / "src" / "stdlib" / f"{version}.tsv"
+    with open(out, "w", encoding="utf-8", newline="\n") as f:
+        for key in sorted(rows):
+            f.write(f"{key}\t{rows[key]}\n")
+    print(f"wrote {len(rows)} signatures to {out}")
+
+
+if __name__ == "__main__":
+    main()
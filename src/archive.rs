@@ -0,0 +1,152 @@
+//! Python files inside wheels, sdists and zip archives, read in memory so
+//! third-party packages can be linted without extracting them.
+
+use anyhow::{Context, Result};
+use flate2::read::GzDecoder;
+use std::fs::File;
+use std::io::{BufReader, Read};
+use std::path::{Path, PathBuf};
+use xz2::read::XzDecoder;
+
+enum Format {
+    Zip,
+    TarGz,
+    TarXz,
+}
+
+/// Whether `path` names an archive whose members can be linted: a wheel,
+/// a zip file or a gzip- or xz-compressed tarball
+pub fn is_archive(path: &Path) -> bool {
+    format(path).is_some()
+}
+
+fn format(path: &Path) -> Option<Format> {
+    let name = path.file_name()?.to_str()?.to_ascii_lowercase();
+    if name.ends_with(".whl") || name.ends_with(".zip") {
+        Some(Format::Zip)
+    } else if name.ends_with(".tar.gz") || name.ends_with(".tgz") {
+        Some(Format::TarGz)
+    } else if name.ends_with(".tar.xz") || name.ends_with(".txz") {
+        Some(Format::TarXz)
+    } else {
+        None
+    }
+}
+
+/// Members are never decompressed past this many bytes, even without a
+/// `max_file_size`, so a crafted archive can't exhaust memory
+pub const MAX_MEMBER_BYTES: u64 = 64 << 20;
+
+/// Most bytes reserved up front for a member. Sizes in archive headers
+/// aren't trusted, so larger members grow their buffer as they are read.
+const MAX_PREALLOCATION: usize = 1 << 20;
+
+/// A Python file inside an archive
+pub struct Member {
+    /// The archive's path joined with the member's name
+    pub path: PathBuf,
+    pub contents: Contents,
+}
+
+pub enum Contents {
+    Source(String),
+    /// Over the size limit, with its size or the bytes read before giving
+    /// up; its contents weren't kept
+    TooLarge(u64),
+}
+
+/// Hand each Python file in the archive at `path` to `found`, in archive
+/// order, until `found` returns false. Members over `max_size` bytes, or
+/// over [`MAX_MEMBER_BYTES`], are handed over without their contents.
+pub fn for_each_python_member(
+    path: &Path,
+    max_size: Option<u64>,
+    mut found: impl FnMut(Member) -> bool,
+) -> Result<()> {
+    let limit = max_size.map_or(MAX_MEMBER_BYTES, |size| size.min(MAX_MEMBER_BYTES));
+    let file = File::open(path).with_context(|| format!("Failed to read archive: {:?}", path))?;
+    let file = BufReader::new(file);
+    match format(path) {
+        Some(Format::Zip) => {
+            let mut archive =
+                zip::ZipArchive::new(file).with_context(|| format!("Failed to read archive: {:?}", path))?;
+            for index in 0..archive.len() {
+                let mut entry = archive.by_index(index)?;
+                let name = PathBuf::from(entry.name());
+                if !entry.is_file() || !is_python(&name) {
+                    continue;
+                }
+                let size = entry.size();
+                let member = Member {
+                    path: member_path(path, &name),
+                    contents: read_contents(&mut entry, size, limit)?,
+                };
+                if !found(member) {
+                    break;
+                }
+            }
+            Ok(())
+        }
+        Some(Format::TarGz) => for_each_tar_member(path, GzDecoder::new(file), limit, &mut found),
+        Some(Format::TarXz) => for_each_tar_member(path, XzDecoder::new(file), limit, &mut found),
+        None => Err(anyhow::anyhow!("Not a supported archive: {:?}", path)),
+    }
+}
+
+fn for_each_tar_member<R: Read>(
+    path: &Path,
+    reader: R,
+    limit: u64,
+    found: &mut dyn FnMut(Member) -> bool,
+) -> Result<()> {
+    let mut archive = tar::Archive::new(reader);
+    let entries = archive
+        .entries()
+        .with_context(|| format!("Failed to read archive: {:?}", path))?;
+    for entry in entries {
+        let mut entry = entry.with_context(|| format!("Failed to read archive: {:?}", path))?;
+        if !entry.header().entry_type().is_file() {
+            continue;
+        }
+        let name = entry.path()?.into_owned();
+        if !is_python(&name) {
+            continue;
+        }
+        let size = entry.size();
+        let member = Member {
+            path: member_path(path, &name),
+            contents: read_contents(&mut entry, size, limit)?,
+        };
+        if !found(member) {
+            break;
+        }
+    }
+    Ok(())
+}
+
+fn is_python(name: &Path) -> bool {
+    name.extension().map_or(false, |ext| ext == "py" || ext == "pyi")
+}
+
+/// Where a member is reported; a leading `/` in its name mustn't replace
+/// the archive's path
+fn member_path(archive: &Path, name: &Path) -> PathBuf {
+    archive.join(name.strip_prefix("/").unwrap_or(name))
+}
+
+/// Read a member whose header claims `size` bytes, stopping once it turns
+/// out longer than `limit`
+fn read_contents<R: Read>(reader: &mut R, size: u64, limit: u64) -> Result<Contents> {
+    if size > limit {
+        return Ok(Contents::TooLarge(size));
+    }
+    let mut bytes = Vec::with_capacity((size as usize).min(MAX_PREALLOCATION));
+    reader.take(limit + 1).read_to_end(&mut bytes)?;
+    if bytes.len() as u64 > limit {
+        return Ok(Contents::TooLarge(bytes.len() as u64));
+    }
+    Ok(Contents::Source(match String::from_utf8(bytes) {
+        Ok(source) => source,
+        Err(e) => String::from_utf8_lossy(e.as_bytes()).into_owned(),
+    }))
+}
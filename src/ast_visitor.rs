@@ -1,14 +1,34 @@
+use num_traits::ToPrimitive;
 use rustpython_ast::{self as ast};
 use rustpython_parser::{parse, Mode, text_size::TextSize};
+use rayon::prelude::*;
 use std::collections::{HashMap, HashSet};
 use std::path::Path;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
+use std::time::Instant;
 
 use crate::errors::{ErrorCode, Issue};
-use crate::checkers::call_errors::FunctionSignature;
+use crate::checkers::call_errors::{DeferredCall, FunctionSignature};
+use crate::cfg::{self, FlowVerdicts, Verdict};
+use crate::prefilter::RuleFamilies;
+use crate::stdlib::StdlibTable;
+use crate::symbol_index::SymbolIndex;
+use crate::tiers::{DeferredImport, SlowTier};
+use crate::statistics::Tally;
+use crate::semantic::{self, FunctionFacts, ScopeId, ScopeKind, SemanticModel, MODULE_SCOPE};
+
+/// Expressions walked between checks of the time budget, so a clock read
+/// doesn't cost more than the expressions it guards
+const EXPRS_PER_BUDGET_CHECK: usize = 1024;
+
+/// What a forked top-level definition's visit hands back to the module:
+/// issues, deferred imports and calls, tally, and whether a budget ran out
+type ForkResult = (Vec<Issue>, HashMap<String, DeferredImport>, Vec<DeferredCall>, Tally, bool);
 
 pub struct AstContext {
     pub file_path: std::path::PathBuf,
-    pub source: String,
+    pub source: Arc<str>, // Shared with the snapshots that visit bodies in parallel
     pub issues: Vec<Issue>,
     pub in_function: bool,
     pub in_class: bool,
@@ -19,25 +39,37 @@ pub struct AstContext {
     pub in_async_function: bool,
     pub defined_names: HashMap<String, (usize, usize)>,
     pub class_methods: HashMap<String, (usize, usize)>,
-    pub global_names: HashSet<String>,
-    pub nonlocal_names: HashSet<String>,
-    pub function_args: HashSet<String>,
     pub current_class: Option<String>,
     pub local_vars: HashSet<String>,
     pub conditionally_defined: HashMap<String, bool>,
     pub definitely_defined: HashSet<String>,
     pub function_signatures: HashMap<String, FunctionSignature>,
-    pub imports: HashMap<String, String>, // Maps imported name to module path
     pub module_conditionally_defined: HashSet<String>, // Module-level variables that are conditionally defined
     pub variable_usages: HashMap<String, Vec<(usize, usize)>>, // Track where variables are used in current function
+    pub track_usages: bool, // Only functions with a `global` statement need variable_usages
     pub in_unreachable_code: bool, // Track if we're in unreachable code (e.g., if False:)
+    pub semantic: Arc<SemanticModel>, // Scopes and bindings, built before visiting
+    pub current_scope: ScopeId,
+    pub flow: FlowVerdicts, // Unassigned uses of the current function's locals
+    pub families: RuleFamilies, // Rule families the source can trigger at all
+    pub deadline: Option<Instant>, // Stop visiting once this passes
+    pub budget_exhausted: bool,
+    pub parallel_bodies: bool, // Visit top-level function and class bodies on the rayon pool
+    pub symbols: Option<Arc<SymbolIndex>>, // Exported symbols of imported project modules
+    pub stdlib: StdlibTable, // Signatures of the targeted Python's standard library
+    pub defer_cross_module: bool, // Leave project-module lookups to the slow tier
+    pub deferred_imports: HashMap<String, DeferredImport>, // Project imports by local name, when deferring
+    pub deferred_calls: Vec<DeferredCall>, // Calls to deferred imports, checked by the slow tier
+    pub count_only: bool, // Count issues in `tally` instead of building them
+    pub tally: Tally,
+    pub cancel: Option<Arc<AtomicBool>>, // Raised when the run stops early, e.g. at --max-issues
 }
 
 impl AstContext {
     pub fn new(file_path: &Path, source: String) -> Self {
         Self {
             file_path: file_path.to_path_buf(),
-            source,
+            source: source.into(),
             issues: Vec::new(),
             in_function: false,
             in_class: false,
@@ -48,18 +80,85 @@ impl AstContext {
             in_async_function: false,
             defined_names: HashMap::new(),
             class_methods: HashMap::new(),
-            global_names: HashSet::new(),
-            nonlocal_names: HashSet::new(),
-            function_args: HashSet::new(),
             current_class: None,
             local_vars: HashSet::new(),
             conditionally_defined: HashMap::new(),
             definitely_defined: HashSet::new(),
             function_signatures: HashMap::new(),
-            imports: HashMap::new(),
             module_conditionally_defined: HashSet::new(),
             variable_usages: HashMap::new(),
+            track_usages: false,
             in_unreachable_code: false,
+            semantic: Arc::new(SemanticModel::default()),
+            current_scope: MODULE_SCOPE,
+            flow: FlowVerdicts::new(),
+            families: RuleFamilies::default(),
+            deadline: None,
+            budget_exhausted: false,
+            parallel_bodies: false,
+            symbols: None,
+            stdlib: StdlibTable::default(),
+            defer_cross_module: false,
+            deferred_imports: HashMap::new(),
+            deferred_calls: Vec::new(),
+            count_only: false,
+            tally: Tally::default(),
+            cancel: None,
+        }
+    }
+
+    /// A copy of the visitor state with an empty issue buffer, sharing the
+    /// source and the semantic model
+    fn fork(&self) -> Self {
+        Self {
+            file_path: self.file_path.clone(),
+            source: Arc::clone(&self.source),
+            issues: Vec::new(),
+            in_function: self.in_function,
+            in_class: self.in_class,
+            in_loop: self.in_loop,
+            in_generator: self.in_generator,
+            in_init: self.in_init,
+            in_except_handler: self.in_except_handler,
+            in_async_function: self.in_async_function,
+            defined_names: self.defined_names.clone(),
+            class_methods: self.class_methods.clone(),
+            current_class: self.current_class.clone(),
+            local_vars: self.local_vars.clone(),
+            conditionally_defined: self.conditionally_defined.clone(),
+            definitely_defined: self.definitely_defined.clone(),
+            function_signatures: self.function_signatures.clone(),
+            module_conditionally_defined: self.module_conditionally_defined.clone(),
+            variable_usages: self.variable_usages.clone(),
+            track_usages: self.track_usages,
+            in_unreachable_code: self.in_unreachable_code,
+            semantic: Arc::clone(&self.semantic),
+            current_scope: self.current_scope,
+            flow: self.flow.clone(),
+            families: self.families,
+            deadline: self.deadline,
+            budget_exhausted: self.budget_exhausted,
+            parallel_bodies: false,
+            symbols: self.symbols.clone(),
+            stdlib: self.stdlib,
+            defer_cross_module: self.defer_cross_module,
+            deferred_imports: self.deferred_imports.clone(),
+            deferred_calls: Vec::new(),
+            count_only: self.count_only,
+            tally: Tally::default(),
+            cancel: self.cancel.clone(),
+        }
+    }
+
+    /// Hand over the cross-file checks the visit recorded for the slow tier
+    pub fn take_slow_tier(&mut self) -> SlowTier {
+        SlowTier {
+            file: self.file_path.clone(),
+            imports: std::mem::take(&mut self.deferred_imports),
+            calls: std::mem::take(&mut self.deferred_calls),
+            symbols: self.symbols.clone(),
+            stdlib: self.stdlib,
+            tree: None,
         }
     }
 
@@ -69,16 +168,11 @@ impl AstContext {
         if self.in_unreachable_code {
             return;
         }
-        let message = if args.is_empty() {
-            code.message_template.to_string()
-        } else {
-            let mut msg = code.message_template.to_string();
-            for (i, arg) in args.iter().enumerate() {
-                msg = msg.replace(&format!("{{{}}}", i), arg);
-                msg = msg.replace("{}", arg);
-            }
-            msg
-        };
+        if self.count_only {
+            self.tally.add(code);
+            return;
+        }
+        let message = code.format_message(&args);
 
         self.issues.push(Issue::new(
             code.code.to_string(),
@@ -91,12 +185,24 @@ impl AstContext {
     }
 
     pub fn parse_and_check(&mut self) -> Result<(), String> {
+        // Cheap byte scan first, so rule families whose trigger tokens are
+        // absent skip their bookkeeping entirely
+        self.families = RuleFamilies::scan(&self.source);
         let ast_result = parse(&self.source, Mode::Module, "<module>");
         
         match ast_result {
             Ok(ast_module) => {
-                // First pass: collect all module-level definitions
+                // First pass: collect all module-level definitions and
+                // build the scope tree every name is resolved against
+                // Parsing a huge literal can use up the budget on its own
+                if self.out_of_budget() {
+                    return Ok(());
+                }
                 self.collect_module_definitions(&ast_module);
+                self.semantic = Arc::new(SemanticModel::build(&ast_module, &self.families));
+                if self.out_of_budget() {
+                    return Ok(());
+                }
                 
                 // Second pass: do the actual checking
                 self.visit_module(ast_module);
@@ -115,6 +221,24 @@ impl AstContext {
         }
     }
     
+    /// Only parse the module, reporting syntax errors without running any
+    /// of the visitor-based checks
+    pub fn check_syntax(&mut self) -> Result<(), String> {
+        match parse(&self.source, Mode::Module, "<module>") {
+            Ok(_) => Ok(()),
+            Err(e) => {
+                let (line, col) = self.offset_to_line_col(e.offset);
+                self.add_issue(
+                    &crate::errors::E0001,
+                    line,
+                    col,
+                    vec![e.error.to_string()],
+                );
+                Err(format!("Syntax error: {}", e.error))
+            }
+        }
+    }
+
     fn collect_module_definitions(&mut self, module: &ast::Mod) {
         // Preliminary pass to collect all module-level function and class definitions
         // This allows forward references to work correctly
@@ -147,6 +271,9 @@ impl AstContext {
 
     fn visit_module(&mut self, module: ast::Mod) {
         match module {
+            ast::Mod::Module(ast::ModModule { body, .. }) if self.parallel_bodies => {
+                self.visit_module_parallel(body);
+            }
             ast::Mod::Module(ast::ModModule { body, .. }) => {
                 for stmt in body {
                     self.visit_stmt(stmt);
@@ -156,9 +283,65 @@ impl AstContext {
         }
     }
 
+    /// Walk the module-level statements in order, but hand each top-level
+    /// function and class to rayon together with a snapshot of the module
+    /// state as the sequential walk would have seen it at that definition.
+    /// Every task fills its own issue buffer; the buffers are merged and
+    /// sorted by position so the output doesn't depend on scheduling.
+    fn visit_module_parallel(&mut self, body: Vec<ast::Stmt>) {
+        let mut tasks = Vec::new();
+        for stmt in body {
+            match &stmt {
+                ast::Stmt::FunctionDef(ast::StmtFunctionDef { name, args, .. })
+                | ast::Stmt::AsyncFunctionDef(ast::StmtAsyncFunctionDef { name, args, .. }) => {
+                    // Later module-level calls are checked against this
+                    // signature, so record it before the body is deferred
+                    let signature = FunctionSignature::from_arguments(name.as_str(), args);
+                    self.function_signatures.insert(name.to_string(), signature);
+                    tasks.push((self.fork(), stmt));
+                }
+                ast::Stmt::ClassDef(_) => tasks.push((self.fork(), stmt)),
+                _ => self.visit_stmt(stmt),
+            }
+        }
+
+        let results: Vec<ForkResult> = tasks
+            .into_par_iter()
+            .map(|(mut context, stmt)| {
+                context.visit_stmt(stmt);
+                (
+                    context.issues,
+                    context.deferred_imports,
+                    context.deferred_calls,
+                    context.tally,
+                    context.budget_exhausted,
+                )
+            })
+            .collect();
+        for (issues, deferred_imports, deferred_calls, tally, budget_exhausted) in results {
+            self.issues.extend(issues);
+            // Imports made inside a function or class are what its deferred
+            // calls resolve through. Module-level imports stay as the
+            // sequential walk left them.
+            for (name, import) in deferred_imports {
+                self.deferred_imports.entry(name).or_insert(import);
+            }
+            self.deferred_calls.extend(deferred_calls);
+            self.tally.merge(tally);
+            self.budget_exhausted |= budget_exhausted;
+        }
+        self.issues.sort_by_key(|issue| (issue.line, issue.column));
+    }
+
     fn visit_stmt(&mut self, stmt: ast::Stmt) {
         use ast::Stmt::*;
         
+        // Give up on the rest of the file once its time budget is spent or
+        // the whole run is stopping
+        if self.out_of_budget() {
+            return;
+        }
+        
         match stmt {
             FunctionDef(func) => {
                 // Regular functions reset the async context
@@ -186,7 +369,6 @@ impl AstContext {
             Raise(raise) => self.visit_raise(raise),
             Assign(assign) => self.visit_assign(assign),
             AnnAssign(ann_assign) => self.visit_ann_assign(ann_assign),
-            Import(import) => self.visit_import(import),
             ImportFrom(import_from) => self.visit_import_from(import_from),
             _ => {}
         }
@@ -228,42 +410,7 @@ impl AstContext {
 
         // Store function signature for argument checking
         if !self.in_class && !self.in_function { // Only track top-level functions for now
-            use crate::checkers::call_errors::FunctionSignature;
-            
-            let mut required_args = Vec::new();
-            let mut min_args = 0;
-            
-            // Count required positional arguments
-            for arg in &func.args.posonlyargs {
-                if arg.default.is_none() {
-                    let arg_name = arg.def.arg.to_string();
-                    required_args.push(arg_name);
-                    min_args += 1;
-                }
-            }
-            for arg in &func.args.args {
-                if arg.default.is_none() {
-                    let arg_name = arg.def.arg.to_string();
-                    required_args.push(arg_name);
-                    min_args += 1;
-                }
-            }
-            
-            let max_args = if func.args.vararg.is_some() {
-                None
-            } else {
-                Some(func.args.posonlyargs.len() + func.args.args.len() + func.args.kwonlyargs.len())
-            };
-            
-            let signature = FunctionSignature {
-                name: func_name.clone(),
-                min_args,
-                max_args,
-                required_args,
-                has_varargs: func.args.vararg.is_some(),
-                has_kwargs: func.args.kwarg.is_some(),
-            };
-            
+            let signature = FunctionSignature::from_arguments(&func_name, &func.args);
             self.function_signatures.insert(func_name.clone(), signature);
         }
         
@@ -279,12 +426,13 @@ impl AstContext {
         let prev_in_function = self.in_function;
         let prev_in_init = self.in_init;
         let prev_in_generator = self.in_generator;
-        let prev_args = self.function_args.clone();
+        let prev_scope = self.current_scope;
         let prev_local_vars = self.local_vars.clone();
         let prev_conditionally = self.conditionally_defined.clone();
         let prev_definitely = self.definitely_defined.clone();
-        let prev_usages = self.variable_usages.clone();
-        self.variable_usages.clear();
+        let prev_usages = std::mem::take(&mut self.variable_usages);
+        let prev_track_usages = self.track_usages;
+        let prev_flow = std::mem::take(&mut self.flow);
         
         // E0211: Method has no argument
         // E0213: Method should have self as first argument
@@ -348,11 +496,15 @@ impl AstContext {
         self.in_init = is_init;
         self.in_generator = false;
         
-        // If we're already in a function (nested function), preserve parent's args
-        // so the nested function can access closure variables
-        if !prev_in_function {
-            self.function_args.clear();
+        // Arguments and closure variables are resolved through the function's scope
+        // Facts about the body were gathered bottom-up with the semantic model
+        let mut facts = FunctionFacts::default();
+        if let Some(scope) = self.semantic.scope_at(start.to_usize()) {
+            self.current_scope = scope;
+            self.flow = cfg::analyze_function(&func.body, &self.semantic, scope);
+            facts = self.semantic.scopes[scope].facts;
         }
+        self.track_usages = self.families.globals && facts.has_global;
 
         let mut seen_args = HashSet::new();
         // Check all argument types for duplicates
@@ -372,7 +524,6 @@ impl AstContext {
                     vec![arg_name.clone()],
                 );
             }
-            self.function_args.insert(arg_name);
         }
         
         if let Some(arg) = &func.args.vararg {
@@ -385,7 +536,6 @@ impl AstContext {
                     vec![arg_name.clone()],
                 );
             }
-            self.function_args.insert(arg_name);
         }
         
         if let Some(arg) = &func.args.kwarg {
@@ -398,56 +548,22 @@ impl AstContext {
                     vec![arg_name.clone()],
                 );
             }
-            self.function_args.insert(arg_name);
         }
 
-        let has_yield = self.check_for_yield(&func.body);
-        let has_return_value = self.check_for_return_value(&func.body);
-        
-        if has_yield {
+        if facts.has_yield {
             self.in_generator = true;
             if is_init {
                 self.add_issue(&crate::errors::E0100, line, col, vec![]);
             }
-        } else if is_init && has_return_value {
+        } else if is_init && facts.has_return_value {
             // Report E0101 at function definition line like Pylint does
             self.add_issue(&crate::errors::E0101, line, col, vec![]);
         }
 
-        // Check for E0115 in nested functions
-        // We need to check if nested functions have both global and nonlocal declarations for the same name
-        for stmt in &func.body {
-            if let ast::Stmt::FunctionDef(nested_func) = stmt {
-                let nested_start = nested_func.range.start();
-                let (nested_line, nested_col) = self.offset_to_line_col(nested_start);
-                
-                // Collect global and nonlocal declarations in the nested function
-                let mut nested_globals: HashSet<String> = HashSet::new();
-                let mut nested_nonlocals: HashSet<String> = HashSet::new();
-                
-                for nested_stmt in &nested_func.body {
-                    match nested_stmt {
-                        ast::Stmt::Global(global_stmt) => {
-                            for name in &global_stmt.names {
-                                nested_globals.insert(name.to_string());
-                            }
-                        }
-                        ast::Stmt::Nonlocal(nonlocal_stmt) => {
-                            for name in &nonlocal_stmt.names {
-                                nested_nonlocals.insert(name.to_string());
-                            }
-                        }
-                        _ => {}
-                    }
-                }
-                
-                // Check for names that are both global and nonlocal
-                for name in &nested_globals {
-                    if nested_nonlocals.contains(name) {
-                        // Report error at the nested function definition line (like pylint does)
-                        self.add_issue(&crate::errors::E0115, nested_line, nested_col, vec![name.clone()]);
-                    }
-                }
+        // E0115: a name declared both global and nonlocal in this function
+        if self.families.globals && self.families.nonlocals {
+            for name in self.semantic.global_and_nonlocal(self.current_scope) {
+                self.add_issue(&crate::errors::E0115, line, col, vec![name]);
             }
         }
         
@@ -459,12 +575,13 @@ impl AstContext {
         self.in_function = prev_in_function;
         self.in_init = prev_in_init;
         self.in_generator = prev_in_generator;
-        self.function_args = prev_args;
+        self.current_scope = prev_scope;
         self.local_vars = prev_local_vars;
         self.conditionally_defined = prev_conditionally;
         self.definitely_defined = prev_definitely;
         self.variable_usages = prev_usages;
-        
+        self.track_usages = prev_track_usages;
+        self.flow = prev_flow;
     }
 
     fn visit_async_function_def(&mut self, func: ast::StmtAsyncFunctionDef) {
@@ -531,8 +648,12 @@ impl AstContext {
 
         let prev_in_class = self.in_class;
         let prev_class = self.current_class.clone();
+        let prev_scope = self.current_scope;
         self.in_class = true;
         self.current_class = Some(class_name);
+        if let Some(scope) = self.semantic.scope_at(start.to_usize()) {
+            self.current_scope = scope;
+        }
 
         for stmt in cls.body {
             self.visit_stmt(stmt);
@@ -540,6 +661,7 @@ impl AstContext {
 
         self.in_class = prev_in_class;
         self.current_class = prev_class;
+        self.current_scope = prev_scope;
     }
 
     fn visit_return(&mut self, ret: ast::StmtReturn) {
@@ -589,7 +711,7 @@ impl AstContext {
         if let Some(exc) = &raise.exc {
             // Check for E0711: NotImplemented raised instead of NotImplementedError
             if let ast::Expr::Name(name) = &**exc {
-                if name.id.as_str() == "NotImplemented" {
+                if self.families.not_implemented && name.id.as_str() == "NotImplemented" {
                     let start = name.range.start();
                     let (line, col) = self.offset_to_line_col(start);
                     self.add_issue(&crate::errors::E0711, line, col, vec![]);
@@ -655,16 +777,31 @@ impl AstContext {
             ast::Expr::Constant(c) if matches!(&c.value, ast::Constant::Bool(false))
         );
         
-        self.visit_expr(*if_stmt.test.clone());
-        
-        // Track variables defined in if branch
-        let before_if = self.definitely_defined.clone();
-        
         // For if/elif/else chains, check if the final else (not elif) terminates
         // Do this before consuming if_stmt
         let final_else_terminates = self.get_final_else_terminates(&if_stmt);
         let has_else = !if_stmt.orelse.is_empty();
         
+        self.visit_expr(*if_stmt.test);
+        
+        // Inside functions assignments are tracked on the control-flow graph,
+        // so the branches need no copies of the defined-name sets
+        if self.in_function_scope() {
+            let saved_unreachable = self.in_unreachable_code;
+            self.in_unreachable_code |= is_if_false;
+            for stmt in if_stmt.body {
+                self.visit_stmt(stmt);
+            }
+            self.in_unreachable_code = saved_unreachable;
+            for stmt in if_stmt.orelse {
+                self.visit_stmt(stmt);
+            }
+            return;
+        }
+        
+        // Track variables defined in if branch
+        let before_if = self.definitely_defined.clone();
+        
         // Save unreachable state and set it if this is "if False:"
         let saved_unreachable = self.in_unreachable_code;
         if is_if_false {
@@ -756,7 +893,7 @@ impl AstContext {
 
     fn visit_with(&mut self, with_stmt: ast::StmtWith) {
         for item in with_stmt.items {
-            self.visit_expr(item.context_expr.clone());
+            self.visit_expr(item.context_expr);
             
             // Track the 'as' variable if present (e.g., 'with open() as f:')
             if let Some(optional_vars) = &item.optional_vars {
@@ -788,7 +925,7 @@ impl AstContext {
 
     fn visit_async_with(&mut self, with_stmt: ast::StmtAsyncWith) {
         for item in with_stmt.items {
-            self.visit_expr(item.context_expr.clone());
+            self.visit_expr(item.context_expr);
             
             // Track the 'as' variable if present
             if let Some(optional_vars) = &item.optional_vars {
@@ -819,6 +956,32 @@ impl AstContext {
     }
 
     fn visit_try(&mut self, try_stmt: ast::StmtTry) {
+        if self.in_function_scope() {
+            // Assignments are tracked on the function's control-flow graph
+            for stmt in try_stmt.body {
+                self.visit_stmt(stmt);
+            }
+            for handler in try_stmt.handlers {
+                match handler {
+                    ast::ExceptHandler::ExceptHandler(h) => {
+                        let prev_in_except = self.in_except_handler;
+                        self.in_except_handler = true;
+                        for stmt in h.body {
+                            self.visit_stmt(stmt);
+                        }
+                        self.in_except_handler = prev_in_except;
+                    }
+                }
+            }
+            for stmt in try_stmt.orelse {
+                self.visit_stmt(stmt);
+            }
+            for stmt in try_stmt.finalbody {
+                self.visit_stmt(stmt);
+            }
+            return;
+        }
+
         // Save state before try block
         let before_try = self.definitely_defined.clone();
         let before_conditionally = self.conditionally_defined.clone();
@@ -899,7 +1062,6 @@ impl AstContext {
                         let exc_var_name = name.to_string();
                         self.local_vars.insert(exc_var_name.clone());
                         self.definitely_defined.insert(exc_var_name.clone());
-                        self.function_args.insert(exc_var_name.clone()); // Treat like a local binding
                         Some(self.local_vars.clone())
                     } else {
                         None
@@ -914,7 +1076,6 @@ impl AstContext {
                         let exc_var_name = name.to_string();
                         self.local_vars.remove(&exc_var_name);
                         self.definitely_defined.remove(&exc_var_name);
-                        self.function_args.remove(&exc_var_name);
                     }
                     
                     self.in_except_handler = prev_in_except;
@@ -993,9 +1154,7 @@ impl AstContext {
                 }
             }
             
-            // E0115 is now handled in visit_function_def by scanning all declarations first
-            
-            self.global_names.insert(name_str);
+            // E0115 is handled in visit_function_def using the semantic model
         }
     }
 
@@ -1006,14 +1165,12 @@ impl AstContext {
         for name in &nonlocal_stmt.names {
             let name_str = name.to_string();
             
-            // E0115 is now handled in visit_function_def by scanning all declarations first
+            // E0115 is handled in visit_function_def using the semantic model
             
-            // E0117: nonlocal without binding
-            if !self.in_function {
-                self.add_issue(&crate::errors::E0117, line, col, vec![name_str.clone()]);
+            // E0117: nonlocal without a binding in any enclosing function
+            if !self.semantic.has_enclosing_function_binding(self.current_scope, &name_str) {
+                self.add_issue(&crate::errors::E0117, line, col, vec![name_str]);
             }
-            
-            self.nonlocal_names.insert(name_str);
         }
     }
 
@@ -1140,148 +1297,42 @@ impl AstContext {
     }
 
     fn visit_expr(&mut self, expr: ast::Expr) {
+        // Walk with an explicit work stack: long operator chains and deeply
+        // nested literals would otherwise cost one native stack frame per level.
+        // Children are moved out of their parents, which also frees the tree
+        // without recursing through it.
+        let mut stack = vec![expr];
+        let mut visited = 0usize;
+        while let Some(expr) = stack.pop() {
+            // A huge literal is a single statement, so the budget is also
+            // checked while walking inside one
+            visited += 1;
+            if visited % EXPRS_PER_BUDGET_CHECK == 0 && self.out_of_budget() {
+                return;
+            }
+            self.visit_expr_node(expr, &mut stack);
+        }
+    }
+
+    /// Whether the file's time budget is spent or the whole run is
+    /// stopping, marking the visit as cut short if so
+    fn out_of_budget(&mut self) -> bool {
+        if self.budget_exhausted {
+            return true;
+        }
+        let cancelled = self.cancel.as_ref().map_or(false, |cancel| cancel.load(Ordering::Relaxed));
+        let late = self.deadline.map_or(false, |deadline| Instant::now() >= deadline);
+        self.budget_exhausted = cancelled || late;
+        self.budget_exhausted
+    }
+
+    /// Check one expression and push its children onto `stack`, last child
+    /// first so they are visited in source order
+    fn visit_expr_node(&mut self, expr: ast::Expr, stack: &mut Vec<ast::Expr>) {
         use ast::Expr::*;
         
-        match &expr {
-            Name(name) => {
-                let var_name = name.id.to_string();
-                
-                // Track variable usage for E0118 checking
-                if self.in_function {
-                    let start = name.range.start();
-                    let (line, col) = self.offset_to_line_col(start);
-                    self.variable_usages.entry(var_name.clone())
-                        .or_insert_with(Vec::new)
-                        .push((line, col));
-                }
-                
-                // Check for E0606: possibly used before assignment
-                // We need to be careful to avoid false positives while catching real issues
-                
-                // First check if this is a local variable that's definitely defined
-                let is_definitely_defined = self.definitely_defined.contains(&var_name) ||
-                                          self.function_args.contains(&var_name) ||
-                                          self.global_names.contains(&var_name) ||
-                                          self.nonlocal_names.contains(&var_name) ||
-                                          self.imports.contains_key(&var_name) ||
-                                          self.defined_names.contains_key(&var_name);
-                
-                if !is_definitely_defined {
-                    let start = match &expr {
-                        Name(n) => n.range.start(),
-                        _ => return,
-                    };
-                    let (line, col) = self.offset_to_line_col(start);
-                    
-                    if self.in_function {
-                        // Inside a function - determine which error to report
-                        
-                        // Check if this variable is known to the function at all
-                        let is_local = self.local_vars.contains(&var_name);
-                        let is_conditional = self.conditionally_defined.contains_key(&var_name);
-                        let is_module_conditional = self.module_conditionally_defined.contains(&var_name);
-                        
-                        if is_local && is_conditional {
-                            // E0606: Local variable that is conditionally defined
-                            self.add_issue(&crate::errors::E0606, line, col, vec![var_name.clone()]);
-                        } else if is_local && !is_conditional {
-                            // E0601: Local variable that will be assigned later but used before
-                            self.add_issue(&crate::errors::E0601, line, col, vec![var_name.clone()]);
-                        } else if is_module_conditional && !is_local {
-                            // E0606: Using module-level conditionally defined variable
-                            self.add_issue(&crate::errors::E0606, line, col, vec![var_name.clone()]);
-                        } else {
-                            // E0602: Undefined variable - not defined anywhere
-                            // Skip common built-ins to avoid false positives
-                            let builtins = ["print", "len", "range", "str", "int", "float", "bool", 
-                                          "list", "dict", "set", "tuple", "type", "isinstance",
-                                          "open", "file", "input", "sum", "min", "max", "abs",
-                                          "round", "sorted", "reversed", "enumerate", "zip",
-                                          "map", "filter", "any", "all", "hex", "oct", "bin",
-                                          "ord", "chr", "dir", "help", "id", "hash", "iter",
-                                          "next", "super", "property", "staticmethod", 
-                                          "classmethod", "getattr", "setattr", "hasattr",
-                                          "delattr", "vars", "globals", "locals", "eval",
-                                          "exec", "compile", "True", "False", "None",
-                                          "__name__", "__file__", "__doc__", "Exception",
-                                          "ValueError", "TypeError", "KeyError", "IndexError",
-                                          "RuntimeError", "NotImplementedError", "AttributeError",
-                                          "bytes", "bytearray", "callable", "issubclass", "object",
-                                          "AssertionError", "UnicodeEncodeError", "IOError",
-                                          "OSError", "ImportError", "NameError", "StopIteration",
-                                          "GeneratorExit", "SystemExit", "KeyboardInterrupt",
-                                          "MemoryError", "OverflowError", "ZeroDivisionError",
-                                          "SyntaxError", "IndentationError", "TabError",
-                                          "SystemError", "UnicodeError", "UnicodeDecodeError",
-                                          "Warning", "DeprecationWarning", "FutureWarning",
-                                          "UserWarning", "PendingDeprecationWarning",
-                                          "BaseException", "ArithmeticError", "LookupError",
-                                          "EnvironmentError", "ReferenceError", "EOFError",
-                                          "BufferError", "FloatingPointError", "StandardError",
-                                          "StopAsyncIteration", "ConnectionError", "BrokenPipeError",
-                                          "ConnectionAbortedError", "ConnectionRefusedError",
-                                          "ConnectionResetError", "FileExistsError", "FileNotFoundError",
-                                          "InterruptedError", "IsADirectoryError", "NotADirectoryError",
-                                          "PermissionError", "ProcessLookupError", "TimeoutError",
-                                          "NotImplemented", "Ellipsis", "__debug__", "quit", "exit",
-                                          "copyright", "credits", "license", "__import__",
-                                          "format", "repr", "ascii", "memoryview", "frozenset",
-                                          "complex", "divmod", "pow", "slice", "__build_class__",
-                                          "__loader__", "__spec__", "__package__", "__cached__"];
-                            if !builtins.contains(&var_name.as_str()) && !self.imports.contains_key(&var_name) && !self.defined_names.contains_key(&var_name) {
-                                self.add_issue(&crate::errors::E0602, line, col, vec![var_name.clone()]);
-                            }
-                        }
-                    } else {
-                        // At module level
-                        if self.conditionally_defined.contains_key(&var_name) {
-                            // E0606: conditionally defined variable
-                            self.add_issue(&crate::errors::E0606, line, col, vec![var_name.clone()]);
-                        } else {
-                            // E0602: undefined variable
-                            // Skip common built-ins
-                            let builtins = ["print", "len", "range", "str", "int", "float", "bool", 
-                                          "list", "dict", "set", "tuple", "type", "isinstance",
-                                          "open", "file", "input", "sum", "min", "max", "abs",
-                                          "round", "sorted", "reversed", "enumerate", "zip",
-                                          "map", "filter", "any", "all", "hex", "oct", "bin",
-                                          "ord", "chr", "dir", "help", "id", "hash", "iter",
-                                          "next", "super", "property", "staticmethod", 
-                                          "classmethod", "getattr", "setattr", "hasattr",
-                                          "delattr", "vars", "globals", "locals", "eval",
-                                          "exec", "compile", "True", "False", "None",
-                                          "__name__", "__file__", "__doc__", "Exception",
-                                          "ValueError", "TypeError", "KeyError", "IndexError",
-                                          "RuntimeError", "NotImplementedError", "AttributeError",
-                                          "bytes", "bytearray", "callable", "issubclass", "object",
-                                          "AssertionError", "UnicodeEncodeError", "IOError",
-                                          "OSError", "ImportError", "NameError", "StopIteration",
-                                          "GeneratorExit", "SystemExit", "KeyboardInterrupt",
-                                          "MemoryError", "OverflowError", "ZeroDivisionError",
-                                          "SyntaxError", "IndentationError", "TabError",
-                                          "SystemError", "UnicodeError", "UnicodeDecodeError",
-                                          "Warning", "DeprecationWarning", "FutureWarning",
-                                          "UserWarning", "PendingDeprecationWarning",
-                                          "BaseException", "ArithmeticError", "LookupError",
-                                          "EnvironmentError", "ReferenceError", "EOFError",
-                                          "BufferError", "FloatingPointError", "StandardError",
-                                          "StopAsyncIteration", "ConnectionError", "BrokenPipeError",
-                                          "ConnectionAbortedError", "ConnectionRefusedError",
-                                          "ConnectionResetError", "FileExistsError", "FileNotFoundError",
-                                          "InterruptedError", "IsADirectoryError", "NotADirectoryError",
-                                          "PermissionError", "ProcessLookupError", "TimeoutError",
-                                          "NotImplemented", "Ellipsis", "__debug__", "quit", "exit",
-                                          "copyright", "credits", "license", "__import__",
-                                          "format", "repr", "ascii", "memoryview", "frozenset",
-                                          "complex", "divmod", "pow", "slice", "__build_class__",
-                                          "__loader__", "__spec__", "__package__", "__cached__"];
-                            if !builtins.contains(&var_name.as_str()) && !self.imports.contains_key(&var_name) && !self.defined_names.contains_key(&var_name) {
-                                self.add_issue(&crate::errors::E0602, line, col, vec![var_name.clone()]);
-                            }
-                        }
-                    }
-                }
-            }
+        match expr {
+            Name(name) => self.visit_name(&name),
             Yield(yield_expr) => {
                 if !self.in_function {
                     let start = yield_expr.range.start();
@@ -1300,82 +1351,62 @@ impl AstContext {
                 // Check function call arguments
                 self.check_function_call_args(&call);
                 
-                // Visit the function expression itself
-                self.visit_expr(*call.func.clone());
-                
-                // Visit each argument (which may contain nested calls)
-                for arg in &call.args {
-                    self.visit_expr(arg.clone());
-                }
-                
-                // Also visit keyword arguments
-                for keyword in &call.keywords {
-                    self.visit_expr(keyword.value.clone());
-                }
-            }
-            ast::Expr::Tuple(tuple) => {
+                // Then visit the function expression, the arguments (which may
+                // contain nested calls) and the keyword argument values
+                let ast::ExprCall { func, args, keywords, .. } = call;
+                stack.extend(keywords.into_iter().rev().map(|keyword| keyword.value));
+                stack.extend(args.into_iter().rev());
+                stack.push(*func);
+            }
+            Tuple(tuple) => {
                 // Visit each element in the tuple
-                for elt in &tuple.elts {
-                    self.visit_expr(elt.clone());
-                }
+                stack.extend(tuple.elts.into_iter().rev());
             }
-            ast::Expr::List(list) => {
+            List(list) => {
                 // Visit each element in the list
-                for elt in &list.elts {
-                    self.visit_expr(elt.clone());
-                }
-            }
-            ast::Expr::Dict(dict) => {
-                // Check for duplicate keys (E0109)
-                let mut seen_keys: HashSet<String> = HashSet::new();
-                for key in &dict.keys {
-                    if let Some(k) = key {
-                        // Check if this is a simple literal key we can track
-                        match k {
-                            ast::Expr::Constant(constant) => {
-                                let key_str = match &constant.value {
-                                    ast::Constant::Str(s) => s.to_string(),
-                                    ast::Constant::Int(i) => i.to_string(),
-                                    ast::Constant::Float(f) => f.to_string(),
-                                    ast::Constant::Bool(b) => b.to_string(),
-                                    ast::Constant::None => "None".to_string(),
-                                    _ => continue, // Skip other constant types
-                                };
-                                
-                                if !seen_keys.insert(key_str.clone()) {
-                                    // Key was already in the set - it's a duplicate
-                                    let start = constant.range.start();
-                                    let (line, col) = self.offset_to_line_col(start);
-                                    self.add_issue(&crate::errors::E0109, line, col, vec![key_str]);
-                                }
+                stack.extend(list.elts.into_iter().rev());
+            }
+            Dict(dict) => {
+                // Check for duplicate keys (E0109). Keys are hashed straight
+                // from the constants; the message is only formatted for a
+                // duplicate.
+                if dict.keys.len() > 1 {
+                    let mut seen_keys: HashSet<LiteralKey> = HashSet::with_capacity(dict.keys.len());
+                    for key in dict.keys.iter().flatten() {
+                        if let ast::Expr::Constant(constant) = key {
+                            let literal = match LiteralKey::from_constant(&constant.value) {
+                                Some(literal) => literal,
+                                None => continue, // Skip other constant types
+                            };
+                            if !seen_keys.insert(literal) {
+                                let start = constant.range.start();
+                                let (line, col) = self.offset_to_line_col(start);
+                                let key_str = format_dict_key(&constant.value);
+                                self.add_issue(&crate::errors::E0109, line, col, vec![key_str]);
                             }
-                            _ => {} // Skip non-constant keys for now
                         }
-                        self.visit_expr(k.clone());
                     }
                 }
-                for value in &dict.values {
-                    self.visit_expr(value.clone());
-                }
+                // Keys are visited before values
+                stack.extend(dict.values.into_iter().rev());
+                stack.extend(dict.keys.into_iter().rev().flatten());
             }
-            ast::Expr::BinOp(binop) => {
+            BinOp(binop) => {
                 // Visit both operands of binary operation
-                self.visit_expr(*binop.left.clone());
-                self.visit_expr(*binop.right.clone());
+                stack.push(*binop.right);
+                stack.push(*binop.left);
             }
-            ast::Expr::UnaryOp(unaryop) => {
+            UnaryOp(unaryop) => {
                 // Visit operand of unary operation
-                self.visit_expr(*unaryop.operand.clone());
+                stack.push(*unaryop.operand);
             }
-            ast::Expr::JoinedStr(joined) => {
+            JoinedStr(joined) => {
                 // Visit values in f-string
-                for value in &joined.values {
-                    self.visit_expr(value.clone());
-                }
+                stack.extend(joined.values.into_iter().rev());
             }
-            ast::Expr::FormattedValue(fmtval) => {
+            FormattedValue(fmtval) => {
                 // Visit the value in formatted string
-                self.visit_expr(*fmtval.value.clone());
+                stack.push(*fmtval.value);
             }
             Await(await_expr) => {
                 // E1142: Check if await is used outside async function
@@ -1385,101 +1416,108 @@ impl AstContext {
                     self.add_issue(&crate::errors::E1142, line, col, vec![]);
                 }
                 // Visit the awaited expression
-                self.visit_expr(*await_expr.value.clone());
+                stack.push(*await_expr.value);
             }
             _ => {}
         }
     }
 
-    fn check_for_yield(&self, body: &[ast::Stmt]) -> bool {
-        for stmt in body {
-            if self.stmt_contains_yield(stmt) {
-                return true;
-            }
-        }
-        false
+    fn in_function_scope(&self) -> bool {
+        self.semantic.scopes[self.current_scope].kind == ScopeKind::Function
     }
 
-    fn stmt_contains_yield(&self, stmt: &ast::Stmt) -> bool {
-        use ast::Stmt::*;
+    fn visit_name(&mut self, name: &ast::ExprName) {
+        let var_name = name.id.as_str();
         
-        match stmt {
-            Expr(expr_stmt) => self.expr_contains_yield(&expr_stmt.value),
-            If(if_stmt) => {
-                // Check condition and body for yield
-                self.expr_contains_yield(&if_stmt.test) ||
-                if_stmt.body.iter().any(|s| self.stmt_contains_yield(s)) ||
-                if_stmt.orelse.iter().any(|s| self.stmt_contains_yield(s))
-            }
-            For(for_stmt) => {
-                // Check body for yield
-                for_stmt.body.iter().any(|s| self.stmt_contains_yield(s)) ||
-                for_stmt.orelse.iter().any(|s| self.stmt_contains_yield(s))
-            }
-            While(while_stmt) => {
-                // Check body for yield
-                while_stmt.body.iter().any(|s| self.stmt_contains_yield(s)) ||
-                while_stmt.orelse.iter().any(|s| self.stmt_contains_yield(s))
-            }
-            Try(try_stmt) => {
-                // Check all blocks for yield
-                try_stmt.body.iter().any(|s| self.stmt_contains_yield(s)) ||
-                try_stmt.handlers.iter().any(|h| {
-                    match h {
-                        ast::ExceptHandler::ExceptHandler(eh) => {
-                            eh.body.iter().any(|s| self.stmt_contains_yield(s))
-                        }
-                    }
-                }) ||
-                try_stmt.orelse.iter().any(|s| self.stmt_contains_yield(s)) ||
-                try_stmt.finalbody.iter().any(|s| self.stmt_contains_yield(s))
-            }
-            With(with_stmt) => {
-                // Check body for yield
-                with_stmt.body.iter().any(|s| self.stmt_contains_yield(s))
-            }
-            _ => false,
+        // Track variable usage for E0118 checking
+        if self.in_function && self.track_usages {
+            let start = name.range.start();
+            let (line, col) = self.offset_to_line_col(start);
+            self.variable_usages.entry(var_name.to_string())
+                .or_insert_with(Vec::new)
+                .push((line, col));
         }
-    }
-
-    fn expr_contains_yield(&self, expr: &ast::Expr) -> bool {
-        use ast::Expr::*;
         
-        matches!(expr, Yield(_) | YieldFrom(_))
-    }
-
-    fn check_for_return_value(&self, body: &[ast::Stmt]) -> bool {
-        for stmt in body {
-            if self.stmt_has_return_value(stmt) {
-                return true;
+        // Resolve the name once against the semantic model; every rule below
+        // works off this single lookup
+        let (resolved_scope, is_declared) = match self.semantic.resolve(self.current_scope, var_name) {
+            Some((scope, binding)) => (Some(scope), binding.is_declared(scope)),
+            None => (None, false),
+        };
+        
+        // Arguments, imports, global/nonlocal names and module-level
+        // definitions are always bound; anything else depends on control flow
+        if is_declared {
+            return;
+        }
+        
+        let start = name.range.start();
+        
+        // Locals of the current function were classified by the dataflow
+        // pass over its control-flow graph
+        if resolved_scope == Some(self.current_scope) && self.in_function_scope() {
+            if let Some(verdict) = self.flow.get(&start.to_usize()).copied() {
+                let (line, col) = self.offset_to_line_col(start);
+                let code = match verdict {
+                    Verdict::PossiblyUnassigned => &crate::errors::E0606,
+                    Verdict::Unassigned => &crate::errors::E0601,
+                };
+                self.add_issue(code, line, col, vec![var_name.to_string()]);
             }
+            return;
         }
-        false
-    }
-
-    fn stmt_has_return_value(&self, stmt: &ast::Stmt) -> bool {
-        use ast::Stmt::*;
         
-        match stmt {
-            Return(ret_stmt) => ret_stmt.value.is_some(),
-            _ => false,
+        if self.definitely_defined.contains(var_name) {
+            return;
         }
-    }
-
-    fn visit_import(&mut self, import: ast::StmtImport) {
-        for alias in &import.names {
-            let module_name = alias.name.to_string();
-            let import_name = alias.asname.as_ref()
-                .map(|n| n.to_string())
-                .unwrap_or_else(|| module_name.clone());
+        
+        let (line, col) = self.offset_to_line_col(start);
+        
+        if self.in_function {
+            // Inside a function - determine which error to report
             
-            self.imports.insert(import_name, module_name);
+            // Check if this variable is known to the function at all
+            let is_local = self.local_vars.contains(var_name);
+            let is_conditional = self.conditionally_defined.contains_key(var_name);
+            let is_module_conditional = self.module_conditionally_defined.contains(var_name);
+            
+            if is_local && is_conditional {
+                // E0606: Local variable that is conditionally defined
+                self.add_issue(&crate::errors::E0606, line, col, vec![var_name.to_string()]);
+            } else if is_local && !is_conditional {
+                // E0601: Local variable that will be assigned later but used before
+                self.add_issue(&crate::errors::E0601, line, col, vec![var_name.to_string()]);
+            } else if is_module_conditional && !is_local {
+                // E0606: Using module-level conditionally defined variable
+                self.add_issue(&crate::errors::E0606, line, col, vec![var_name.to_string()]);
+            } else if resolved_scope == Some(self.current_scope) {
+                // E0601: Bound in this scope, but only further down
+                self.add_issue(&crate::errors::E0601, line, col, vec![var_name.to_string()]);
+            } else if resolved_scope.is_none() && !semantic::is_builtin(var_name) {
+                // E0602: Undefined variable - not bound in any enclosing scope.
+                // Names bound in an enclosing scope are closures or module
+                // globals, which may legitimately be assigned after this def
+                self.add_issue(&crate::errors::E0602, line, col, vec![var_name.to_string()]);
+            }
+        } else {
+            // At module level
+            if self.conditionally_defined.contains_key(var_name) {
+                // E0606: conditionally defined variable
+                self.add_issue(&crate::errors::E0606, line, col, vec![var_name.to_string()]);
+            } else if resolved_scope == Some(self.current_scope) {
+                // E0601: assigned further down in this scope
+                self.add_issue(&crate::errors::E0601, line, col, vec![var_name.to_string()]);
+            } else if resolved_scope.is_none() && !semantic::is_builtin(var_name) {
+                // E0602: undefined variable
+                self.add_issue(&crate::errors::E0602, line, col, vec![var_name.to_string()]);
+            }
         }
     }
-    
+
     fn visit_import_from(&mut self, import: ast::StmtImportFrom) {
         if let Some(module) = &import.module {
             let module_name = module.to_string();
+            let absolute = import.level.map_or(true, |level| level.to_u32() == 0);
             
             for alias in &import.names {
                 let imported_name = alias.name.to_string();
@@ -1487,105 +1525,31 @@ impl AstContext {
                     .map(|n| n.to_string())
                     .unwrap_or_else(|| imported_name.clone());
                 
-                // Store the full module path for this import
-                self.imports.insert(local_name.clone(), format!("{}.{}", module_name, imported_name));
-                
-                // Now try to load the module and get function signatures
-                self.load_module_signatures(&module_name, &imported_name, &local_name);
+                // Try to load the module and get function signatures
+                self.load_module_signatures(&module_name, absolute, &imported_name, &local_name);
             }
         }
     }
     
-    fn load_module_signatures(&mut self, module_name: &str, imported_name: &str, local_name: &str) {
-        // Try to find and parse the module file
-        let possible_paths = self.get_module_paths(module_name);
-        
-        for path in possible_paths {
-            if path.exists() {
-                if let Ok(source) = std::fs::read_to_string(&path) {
-                    // Parse the module to extract function signatures
-                    if let Ok(module_ast) = rustpython_parser::parse(&source, rustpython_parser::Mode::Module, "<module>") {
-                        self.extract_function_signature_from_module(module_ast, imported_name, local_name);
-                    }
-                }
-                break; // Found and processed the module
-            }
+    fn load_module_signatures(&mut self, module_name: &str, absolute: bool, imported_name: &str, local_name: &str) {
+        let import = DeferredImport {
+            module_name: module_name.to_string(),
+            absolute,
+            imported_name: imported_name.to_string(),
+        };
+        if self.defer_cross_module {
+            // Calls to this name wait for the slow tier, which resolves the
+            // import from the file's location
+            self.function_signatures.remove(local_name);
+            self.deferred_imports.insert(local_name.to_string(), import);
+            return;
         }
-    }
-    
-    fn get_module_paths(&self, module_name: &str) -> Vec<std::path::PathBuf> {
-        let mut paths = Vec::new();
-        
-        // Convert module name to path (e.g., "app.email_utils" -> "app/email_utils.py")
-        let module_path = module_name.replace('.', "/");
-        
-        // Try relative to current file's directory
-        if let Some(parent) = self.file_path.parent() {
-            paths.push(parent.join(format!("{}.py", module_path)));
-            
-            // Also try from parent directory (common for imports like app.xxx when in app/)
-            if let Some(grandparent) = parent.parent() {
-                paths.push(grandparent.join(format!("{}.py", module_path)));
-            }
+        let signature = import.resolve(&self.file_path, local_name, self.symbols.as_deref(), &self.stdlib, None);
+        if let Some(signature) = signature {
+            self.function_signatures.insert(local_name.to_string(), signature);
         }
-        
-        // Try from working directory
-        let cwd = std::env::current_dir().unwrap_or_default();
-        paths.push(cwd.join(format!("{}.py", module_path)));
-        
-        
-        paths
     }
     
-    fn extract_function_signature_from_module(&mut self, module: ast::Mod, imported_name: &str, local_name: &str) {
-        use crate::checkers::call_errors::FunctionSignature;
-        
-        if let ast::Mod::Module(ast::ModModule { body, .. }) = module {
-            for stmt in body {
-                if let ast::Stmt::FunctionDef(func) = stmt {
-                    if func.name.as_str() == imported_name {
-                        // Found the function we're importing
-                        let mut required_args = Vec::new();
-                        let mut min_args = 0;
-                        
-                        // Count required positional arguments
-                        for arg in &func.args.posonlyargs {
-                            if arg.default.is_none() {
-                                let arg_name = arg.def.arg.to_string();
-                                required_args.push(arg_name);
-                                min_args += 1;
-                            }
-                        }
-                        for arg in &func.args.args {
-                            if arg.default.is_none() {
-                                let arg_name = arg.def.arg.to_string();
-                                required_args.push(arg_name);
-                                min_args += 1;
-                            }
-                        }
-                        
-                        let max_args = if func.args.vararg.is_some() {
-                            None
-                        } else {
-                            Some(func.args.posonlyargs.len() + func.args.args.len() + func.args.kwonlyargs.len())
-                        };
-                        
-                        let signature = FunctionSignature {
-                            name: local_name.to_string(),
-                            min_args,
-                            max_args,
-                            required_args,
-                            has_varargs: func.args.vararg.is_some(),
-                            has_kwargs: func.args.kwarg.is_some(),
-                        };
-                        self.function_signatures.insert(local_name.to_string(), signature);
-                        break;
-                    }
-                }
-            }
-        }
-    }
-
     fn is_decorator_name(&self, decorator: &ast::Expr, name: &str) -> bool {
         match decorator {
             ast::Expr::Name(n) => n.id.as_str() == name,
@@ -1620,4 +1584,55 @@ impl AstContext {
         
         (line, col)
     }
-}
\ No newline at end of file
+}
+
+/// A literal dict key compared the way Python compares keys, so `1`, `1.0`
+/// and `True` are the same key
+#[derive(PartialEq, Eq, Hash)]
+enum LiteralKey<'a> {
+    Str(&'a str),
+    Int(i64),
+    /// Integers beyond `i64`, which are rare enough to compare as text
+    BigInt(String),
+    /// Bit pattern of a float with a fractional part, or not finite
+    Float(u64),
+    None,
+}
+
+impl<'a> LiteralKey<'a> {
+    fn from_constant(value: &'a ast::Constant) -> Option<Self> {
+        match value {
+            ast::Constant::Str(s) => Some(Self::Str(s.as_str())),
+            ast::Constant::Int(i) => Some(match i.to_i64() {
+                Some(i) => Self::Int(i),
+                None => Self::BigInt(i.to_string()),
+            }),
+            ast::Constant::Float(f) => Some(Self::from_float(*f)),
+            ast::Constant::Bool(b) => Some(Self::Int(i64::from(*b))),
+            ast::Constant::None => Some(Self::None),
+            _ => None,
+        }
+    }
+
+    fn from_float(f: f64) -> Self {
+        // Integral floats equal the matching int; -0.0 lands on 0 as well
+        if f.fract() != 0.0 {
+            Self::Float(f.to_bits())
+        } else if f >= i64::MIN as f64 && f < i64::MAX as f64 {
+            Self::Int(f as i64)
+        } else {
+            // Fixed-point formatting is exact, so this is the int's decimal text
+            Self::BigInt(format!("{:.0}", f))
+        }
+    }
+}
+
+fn format_dict_key(value: &ast::Constant) -> String {
+    match value {
+        ast::Constant::Str(s) => s.to_string(),
+        ast::Constant::Int(i) => i.to_string(),
+        ast::Constant::Float(f) => f.to_string(),
+        ast::Constant::Bool(b) => b.to_string(),
+        _ => "None".to_string(),
+    }
+}
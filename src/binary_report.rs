@@ -0,0 +1,129 @@
+//! The `binary` output format: a length-prefixed record stream that the
+//! Python package decodes without any text parsing.
+//!
+//! A stream starts with the magic bytes `PRYB` and a `u16` format version,
+//! followed by records. Every record is a `u8` kind and a `u32` payload
+//! length, so readers can skip kinds they don't know. Integers are
+//! little-endian and strings are a `u32` byte length followed by UTF-8.
+//!
+//! | kind | record | payload                                                  |
+//! |------|--------|----------------------------------------------------------|
+//! | 1    | file   | `u32` id, path                                           |
+//! | 2    | rule   | `u32` id, `u8` severity, code, symbol                    |
+//! | 3    | issue  | `u32` file id, `u32` rule id, `u32` line, `u32` column, message |
+//! | 0    | end    | `u64` number of issues                                   |
+//!
+//! File paths and rules are interned: each is defined by its own record
+//! once, before the first issue that refers to it. The end record closes
+//! the stream.
+
+use std::collections::HashMap;
+use std::io::{self, Write};
+use std::path::PathBuf;
+
+use crate::errors::{Issue, Severity};
+
+pub const MAGIC: &[u8; 4] = b"PRYB";
+pub const VERSION: u16 = 1;
+
+const END: u8 = 0;
+const FILE: u8 = 1;
+const RULE: u8 = 2;
+const ISSUE: u8 = 3;
+
+/// Writes issues as a binary stream, keeping the interning tables across
+/// batches so a streamed report defines every path and rule only once
+#[derive(Default)]
+pub struct BinaryEncoder {
+    started: bool,
+    files: HashMap<PathBuf, u32>,
+    rules: HashMap<String, u32>,
+    issues: u64,
+    /// Payload of the record being written, reused between records
+    payload: Vec<u8>,
+}
+
+impl BinaryEncoder {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    pub fn write_issues<W: Write>(&mut self, out: &mut W, issues: &[Issue]) -> io::Result<()> {
+        self.start(out)?;
+        for issue in issues {
+            let file = match self.files.get(&issue.file) {
+                Some(&id) => id,
+                None => {
+                    let id = self.files.len() as u32;
+                    self.payload.extend_from_slice(&id.to_le_bytes());
+                    put_str(&mut self.payload, &issue.file.to_string_lossy());
+                    self.flush_record(out, FILE)?;
+                    self.files.insert(issue.file.clone(), id);
+                    id
+                }
+            };
+            let rule = match self.rules.get(&issue.code) {
+                Some(&id) => id,
+                None => {
+                    let id = self.rules.len() as u32;
+                    self.payload.extend_from_slice(&id.to_le_bytes());
+                    self.payload.push(severity_id(&issue.severity));
+                    put_str(&mut self.payload, &issue.code);
+                    put_str(&mut self.payload, &issue.symbol);
+                    self.flush_record(out, RULE)?;
+                    self.rules.insert(issue.code.clone(), id);
+                    id
+                }
+            };
+
+            for value in [file, rule, issue.line as u32, issue.column as u32] {
+                self.payload.extend_from_slice(&value.to_le_bytes());
+            }
+            put_str(&mut self.payload, &issue.message);
+            self.flush_record(out, ISSUE)?;
+            self.issues += 1;
+        }
+        Ok(())
+    }
+
+    /// Close the stream; a stream without issues is just a header and the
+    /// end record
+    pub fn finish<W: Write>(&mut self, out: &mut W) -> io::Result<()> {
+        self.start(out)?;
+        self.payload.extend_from_slice(&self.issues.to_le_bytes());
+        self.flush_record(out, END)
+    }
+
+    fn start<W: Write>(&mut self, out: &mut W) -> io::Result<()> {
+        if !self.started {
+            self.started = true;
+            out.write_all(MAGIC)?;
+            out.write_all(&VERSION.to_le_bytes())?;
+        }
+        Ok(())
+    }
+
+    fn flush_record<W: Write>(&mut self, out: &mut W, kind: u8) -> io::Result<()> {
+        out.write_all(&[kind])?;
+        out.write_all(&(self.payload.len() as u32).to_le_bytes())?;
+        out.write_all(&self.payload)?;
+        self.payload.clear();
+        Ok(())
+    }
+}
+
+fn put_str(payload: &mut Vec<u8>, value: &str) {
+    payload.extend_from_slice(&(value.len() as u32).to_le_bytes());
+    payload.extend_from_slice(value.as_bytes());
+}
+
+/// Severities in the order of `prylint_package.binary.SEVERITIES`
+fn severity_id(severity: &Severity) -> u8 {
+    match severity {
+        Severity::Error => 0,
+        Severity::Warning => 1,
+        Severity::Convention => 2,
+        Severity::Refactor => 3,
+        Severity::Information => 4,
+    }
+}
@@ -0,0 +1,153 @@
+//! Fast-tier results of git blobs by object id, so linting a revision only
+//! analyzes the blobs that changed since a revision linted before it.
+//!
+//! A blob's fast tier depends only on its contents and the rule settings, so
+//! results are stored without a path, one file per blob, under a directory
+//! named after a fingerprint of those settings. Like git's own object store,
+//! a lookup reads only the blob it needs and a save writes only the blobs
+//! analyzed since, however many revisions were linted before. Results for
+//! other settings or another prylint version sit in other directories and
+//! are never read.
+
+use anyhow::{Context, Result};
+use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::fs;
+use std::path::{Path, PathBuf};
+use std::sync::{Arc, Mutex};
+
+use crate::checkers::call_errors::DeferredCall;
+use crate::config::Config;
+use crate::errors::Issue;
+use crate::pipeline::content_hash;
+use crate::tiers::{DeferredImport, SlowTier};
+
+/// Name of the cache's directory inside the cache directory
+pub const CACHE_DIR: &str = "blobs";
+
+/// The fast tier of one blob
+#[derive(Debug, Clone, Default, Serialize, Deserialize)]
+pub struct BlobResult {
+    /// Issues with an empty path, placed at each file holding the blob
+    pub issues: Vec<Issue>,
+    pub imports: HashMap<String, DeferredImport>,
+    pub calls: Vec<DeferredCall>,
+}
+
+impl BlobResult {
+    pub fn new(issues: Vec<Issue>, slow: SlowTier) -> Self {
+        Self {
+            issues: issues
+                .into_iter()
+                .map(|issue| Issue { file: PathBuf::new(), ..issue })
+                .collect(),
+            imports: slow.imports,
+            calls: slow.calls,
+        }
+    }
+
+    /// The issues and the slow tier of the blob checked out at `file`
+    pub fn at(&self, file: &Path) -> (Vec<Issue>, SlowTier) {
+        let issues = self
+            .issues
+            .iter()
+            .map(|issue| Issue { file: file.to_path_buf(), ..issue.clone() })
+            .collect();
+        let slow = SlowTier {
+            file: file.to_path_buf(),
+            imports: self.imports.clone(),
+            calls: self.calls.clone(),
+            ..SlowTier::default()
+        };
+        (issues, slow)
+    }
+}
+
+pub struct BlobCache {
+    /// Where results for these settings are persisted; `None` keeps them
+    /// for this run only
+    dir: Option<PathBuf>,
+    /// Blobs analyzed during this run, to be written back
+    added: Mutex<HashMap<String, Arc<BlobResult>>>,
+}
+
+impl BlobCache {
+    /// A cache that only lives for this run
+    pub fn in_memory() -> Self {
+        Self {
+            dir: None,
+            added: Mutex::new(HashMap::new()),
+        }
+    }
+
+    /// The cache stored under `dir` for settings with `fingerprint`
+    pub fn open(dir: &Path, fingerprint: u64) -> Self {
+        Self {
+            dir: Some(dir.join(format!("{:016x}", fingerprint))),
+            ..Self::in_memory()
+        }
+    }
+
+    pub fn get(&self, oid: &str) -> Option<Arc<BlobResult>> {
+        if let Some(result) = self.added.lock().unwrap().get(oid) {
+            return Some(Arc::clone(result));
+        }
+        // An unreadable or foreign entry only costs speed
+        let bytes = fs::read(self.entry_path(oid)?).ok()?;
+        serde_json::from_slice(&bytes).ok().map(Arc::new)
+    }
+
+    pub fn insert(&self, oid: String, result: Arc<BlobResult>) {
+        self.added.lock().unwrap().insert(oid, result);
+    }
+
+    /// Write the blobs analyzed during this run, each to its own file
+    pub fn save(&self) -> Result<()> {
+        if self.dir.is_none() {
+            return Ok(());
+        }
+        let mut added = self.added.lock().unwrap();
+        for (oid, result) in added.drain() {
+            let Some(path) = self.entry_path(&oid) else { continue };
+            if let Some(dir) = path.parent() {
+                fs::create_dir_all(dir)?;
+            }
+            // Replace the file atomically so a concurrent run never reads a
+            // half-written entry
+            let temp = path.with_extension(format!("tmp{}", std::process::id()));
+            fs::write(&temp, serde_json::to_vec(result.as_ref())?)
+                .with_context(|| format!("writing {}", temp.display()))?;
+            fs::rename(&temp, &path).with_context(|| format!("replacing {}", path.display()))?;
+        }
+        Ok(())
+    }
+
+    /// Where the result of `oid` is stored, fanned out by its first two
+    /// characters so no directory grows too large
+    fn entry_path(&self, oid: &str) -> Option<PathBuf> {
+        let dir = self.dir.as_ref()?;
+        if oid.len() < 3 || !oid.bytes().all(|byte| byte.is_ascii_hexdigit()) {
+            return None;
+        }
+        Some(dir.join(&oid[..2]).join(format!("{}.json", &oid[2..])))
+    }
+}
+
+/// Fingerprint of what a blob's fast tier depends on besides its contents
+pub fn fingerprint(config: &Config) -> u64 {
+    let mut enabled: Vec<&String> = config.enabled_checkers.iter().collect();
+    let mut disabled: Vec<&String> = config.disabled_checkers.iter().collect();
+    enabled.sort();
+    disabled.sort();
+    let settings = format!(
+        "{} {:?} {:?} {} {:?} {:?} {}",
+        env!("CARGO_PKG_VERSION"),
+        enabled,
+        disabled,
+        config.errors_only,
+        config.max_file_size,
+        config.max_nesting_depth,
+        config.skip_generated,
+    );
+    content_hash(settings.as_bytes())
+}
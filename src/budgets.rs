@@ -0,0 +1,102 @@
+//! Cheap pre-parse checks that keep pathological files from stalling a run.
+
+use std::fs::File;
+use std::io::{self, Read};
+use std::path::Path;
+
+/// How much of a file is inspected when looking for a generated-code marker
+pub const GENERATED_HEADER_BYTES: usize = 1024;
+
+/// Read only the first `GENERATED_HEADER_BYTES` of `path`
+pub fn read_header(path: &Path) -> io::Result<Vec<u8>> {
+    let mut header = Vec::with_capacity(GENERATED_HEADER_BYTES);
+    File::open(path)?
+        .take(GENERATED_HEADER_BYTES as u64)
+        .read_to_end(&mut header)?;
+    Ok(header)
+}
+
+/// Markers anywhere in a header comment that flag generated code
+const GENERATED_MARKERS: &[&str] = &["@generated", "do not edit"];
+
+/// How generated files' header comments start, after an optional
+/// "this file is", "was" or "has been"
+const GENERATED_PREFIXES: &[&str] = &[
+    "generated by",
+    "auto-generated by",
+    "autogenerated by",
+    "automatically generated by",
+    "code generated by",
+];
+
+/// Whether the leading comment block marks the file as machine-generated,
+/// e.g. `# Generated by the protocol buffer compiler.  DO NOT EDIT!`.
+/// Comments that only mention generated things, such as "handles
+/// auto-generated IDs", don't.
+pub fn looks_generated(header: &[u8]) -> bool {
+    let header = &header[..header.len().min(GENERATED_HEADER_BYTES)];
+    String::from_utf8_lossy(header)
+        .lines()
+        .take(10)
+        .filter_map(|line| line.trim_start().strip_prefix('#'))
+        .any(|comment| {
+            let comment = comment.trim().to_ascii_lowercase();
+            if GENERATED_MARKERS.iter().any(|marker| comment.contains(marker)) {
+                return true;
+            }
+            let comment = ["this file is ", "this file was ", "this file has been "]
+                .iter()
+                .find_map(|lead| comment.strip_prefix(lead))
+                .unwrap_or(comment.as_str());
+            GENERATED_PREFIXES.iter().any(|prefix| comment.starts_with(prefix))
+        })
+}
+
+/// Deepest bracket nesting in `source`, ignoring strings and comments.
+///
+/// Parenthesized expressions, calls and literals all nest through brackets,
+/// so this bounds the expression depth without building an AST.
+pub fn max_bracket_depth(source: &str) -> usize {
+    let bytes = source.as_bytes();
+    let mut depth = 0usize;
+    let mut max_depth = 0usize;
+    let mut i = 0;
+
+    while i < bytes.len() {
+        match bytes[i] {
+            b'(' | b'[' | b'{' => {
+                depth += 1;
+                max_depth = max_depth.max(depth);
+            }
+            b')' | b']' | b'}' => depth = depth.saturating_sub(1),
+            b'#' => {
+                while i < bytes.len() && bytes[i] != b'\n' {
+                    i += 1;
+                }
+            }
+            quote @ (b'\'' | b'"') => {
+                let triple = bytes[i..].starts_with(&[quote; 3]);
+                i += if triple { 3 } else { 1 };
+                while i < bytes.len() {
+                    if bytes[i] == b'\\' {
+                        i += 2;
+                        continue;
+                    }
+                    if triple {
+                        if bytes[i..].starts_with(&[quote; 3]) {
+                            i += 2;
+                            break;
+                        }
+                    } else if bytes[i] == quote || bytes[i] == b'\n' {
+                        break;
+                    }
+                    i += 1;
+                }
+            }
+            _ => {}
+        }
+        i += 1;
+    }
+
+    max_depth
+}
@@ -0,0 +1,609 @@
+//! Per-function control-flow graphs and definite-assignment dataflow.
+//!
+//! Each function body is lowered once into basic blocks of assignment and use
+//! events over its locals, which are numbered densely so that the "definitely
+//! assigned" and "possibly assigned" sets are plain bitsets. Both problems
+//! are solved forward with a worklist and every use is classified afterwards.
+
+use crate::semantic::{BindingFlags, ScopeId, SemanticModel};
+use crate::walk;
+use rustpython_ast::{self as ast};
+use std::collections::{HashMap, VecDeque};
+
+/// How a local stands at one of its uses
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Verdict {
+    /// Assigned on some paths reaching the use but not all of them
+    PossiblyUnassigned,
+    /// Assigned on no path reaching the use
+    Unassigned,
+}
+
+/// Uses of a function's locals that are not assigned on every path, keyed
+/// by the source offset of the name
+pub type FlowVerdicts = HashMap<usize, Verdict>;
+
+/// Lower the body of the function owning `scope` and classify each use of
+/// its locals.
+pub fn analyze_function(body: &[ast::Stmt], model: &SemanticModel, scope: ScopeId) -> FlowVerdicts {
+    let mut names: Vec<&str> = model.scopes[scope]
+        .bindings
+        .iter()
+        .filter(|(_, binding)| {
+            !binding.is_declared(scope)
+                && binding
+                    .flags
+                    .intersects(BindingFlags::ASSIGNMENT | BindingFlags::DEFINITION)
+        })
+        .map(|(name, _)| name.as_str())
+        .collect();
+    if names.is_empty() {
+        return FlowVerdicts::new();
+    }
+    names.sort_unstable();
+    let locals = names.iter().enumerate().map(|(index, name)| (*name, index)).collect();
+
+    let mut builder = Builder::new(locals);
+    builder.lower_block(body);
+    let exit = builder.exit;
+    let current = builder.current;
+    builder.edge(current, exit);
+    builder.graph.classify(names.len())
+}
+
+#[derive(Debug, Clone, Copy)]
+enum Event {
+    Def(usize),
+    Kill(usize),
+    Use(usize, usize),
+}
+
+type BlockId = usize;
+
+#[derive(Debug, Default)]
+struct Block {
+    events: Vec<Event>,
+    succs: Vec<BlockId>,
+    preds: Vec<BlockId>,
+}
+
+#[derive(Debug, Clone, PartialEq, Eq)]
+struct BitSet {
+    words: Vec<u64>,
+}
+
+impl BitSet {
+    fn empty(len: usize) -> Self {
+        Self {
+            words: vec![0; (len + 63) / 64],
+        }
+    }
+
+    fn full(len: usize) -> Self {
+        let mut set = Self {
+            words: vec![u64::MAX; (len + 63) / 64],
+        };
+        if len % 64 != 0 {
+            if let Some(last) = set.words.last_mut() {
+                *last = (1u64 << (len % 64)) - 1;
+            }
+        }
+        set
+    }
+
+    fn insert(&mut self, bit: usize) {
+        self.words[bit / 64] |= 1 << (bit % 64);
+    }
+
+    fn remove(&mut self, bit: usize) {
+        self.words[bit / 64] &= !(1 << (bit % 64));
+    }
+
+    fn contains(&self, bit: usize) -> bool {
+        self.words[bit / 64] & (1 << (bit % 64)) != 0
+    }
+
+    fn intersect_with(&mut self, other: &Self) {
+        for (word, other) in self.words.iter_mut().zip(&other.words) {
+            *word &= other;
+        }
+    }
+
+    fn union_with(&mut self, other: &Self) {
+        for (word, other) in self.words.iter_mut().zip(&other.words) {
+            *word |= other;
+        }
+    }
+}
+
+#[derive(Debug, Default)]
+struct Graph {
+    blocks: Vec<Block>,
+}
+
+impl Graph {
+    const ENTRY: BlockId = 0;
+
+    /// Apply one event to the definite and possible sets
+    fn apply(event: Event, must: &mut BitSet, may: &mut BitSet) {
+        match event {
+            Event::Def(local) => {
+                must.insert(local);
+                may.insert(local);
+            }
+            Event::Kill(local) => {
+                must.remove(local);
+                may.remove(local);
+            }
+            Event::Use(..) => {}
+        }
+    }
+
+    /// Entry state of `block` given the exit states of its predecessors.
+    /// Blocks nothing jumps to are dead: they start with everything
+    /// definitely assigned so their uses are never reported, and with nothing
+    /// possibly assigned so they add nothing where they rejoin live code.
+    fn meet(&self, block: BlockId, len: usize, must_out: &[BitSet], may_out: &[BitSet]) -> (BitSet, BitSet) {
+        let preds = &self.blocks[block].preds;
+        if block == Self::ENTRY {
+            return (BitSet::empty(len), BitSet::empty(len));
+        }
+        if preds.is_empty() {
+            return (BitSet::full(len), BitSet::empty(len));
+        }
+        let mut must = BitSet::full(len);
+        let mut may = BitSet::empty(len);
+        for &pred in preds {
+            must.intersect_with(&must_out[pred]);
+            may.union_with(&may_out[pred]);
+        }
+        (must, may)
+    }
+
+    fn classify(&self, len: usize) -> FlowVerdicts {
+        let count = self.blocks.len();
+        let mut must_out = vec![BitSet::full(len); count];
+        let mut may_out = vec![BitSet::empty(len); count];
+
+        let mut queued = vec![true; count];
+        let mut worklist: VecDeque<BlockId> = (0..count).collect();
+        while let Some(block) = worklist.pop_front() {
+            queued[block] = false;
+            let (mut must, mut may) = self.meet(block, len, &must_out, &may_out);
+            for &event in &self.blocks[block].events {
+                Self::apply(event, &mut must, &mut may);
+            }
+            if must != must_out[block] || may != may_out[block] {
+                must_out[block] = must;
+                may_out[block] = may;
+                for &succ in &self.blocks[block].succs {
+                    if !queued[succ] {
+                        queued[succ] = true;
+                        worklist.push_back(succ);
+                    }
+                }
+            }
+        }
+
+        // A `finally` body is lowered once per way of reaching it, so a use
+        // can be classified more than once; disagreeing copies mean the name
+        // is only possibly assigned.
+        let mut seen: HashMap<usize, Option<Verdict>> = HashMap::new();
+        for block in 0..count {
+            let (mut must, mut may) = self.meet(block, len, &must_out, &may_out);
+            for &event in &self.blocks[block].events {
+                match event {
+                    Event::Use(local, offset) => {
+                        let verdict = if must.contains(local) {
+                            None
+                        } else if may.contains(local) {
+                            Some(Verdict::PossiblyUnassigned)
+                        } else {
+                            Some(Verdict::Unassigned)
+                        };
+                        let merged = match seen.get(&offset) {
+                            Some(&previous) if previous != verdict => Some(Verdict::PossiblyUnassigned),
+                            _ => verdict,
+                        };
+                        seen.insert(offset, merged);
+                    }
+                    _ => Self::apply(event, &mut must, &mut may),
+                }
+            }
+        }
+        seen.into_iter()
+            .filter_map(|(offset, verdict)| verdict.map(|verdict| (offset, verdict)))
+            .collect()
+    }
+}
+
+struct Loop {
+    /// Where `continue` and the end of the body go
+    back: BlockId,
+    /// Where `break` goes
+    after: BlockId,
+}
+
+struct Builder<'a> {
+    locals: HashMap<&'a str, usize>,
+    graph: Graph,
+    current: BlockId,
+    exit: BlockId,
+    loops: Vec<Loop>,
+    /// Exception dispatch blocks of the enclosing `try` statements
+    handlers: Vec<BlockId>,
+}
+
+impl<'a> Builder<'a> {
+    fn new(locals: HashMap<&'a str, usize>) -> Self {
+        let mut builder = Self {
+            locals,
+            graph: Graph::default(),
+            current: Graph::ENTRY,
+            exit: Graph::ENTRY,
+            loops: Vec::new(),
+            handlers: Vec::new(),
+        };
+        builder.current = builder.new_block();
+        builder.exit = builder.new_block();
+        builder
+    }
+
+    fn new_block(&mut self) -> BlockId {
+        self.graph.blocks.push(Block::default());
+        self.graph.blocks.len() - 1
+    }
+
+    fn edge(&mut self, from: BlockId, to: BlockId) {
+        self.graph.blocks[from].succs.push(to);
+        self.graph.blocks[to].preds.push(from);
+    }
+
+    /// Continue lowering in a fresh block nothing flows into, after a jump
+    fn start_unreachable(&mut self) {
+        self.current = self.new_block();
+    }
+
+    fn raise_target(&self) -> BlockId {
+        self.handlers.last().copied().unwrap_or(self.exit)
+    }
+
+    fn push_event(&mut self, event: Event) {
+        self.graph.blocks[self.current].events.push(event);
+    }
+
+    fn def(&mut self, name: &str) {
+        if let Some(&local) = self.locals.get(name) {
+            self.push_event(Event::Def(local));
+        }
+    }
+
+    fn kill(&mut self, name: &str) {
+        if let Some(&local) = self.locals.get(name) {
+            self.push_event(Event::Kill(local));
+        }
+    }
+
+    /// Record the uses of locals in an expression evaluated in this scope
+    fn uses(&mut self, expr: &'a ast::Expr) {
+        let mut stack = vec![expr];
+        while let Some(expr) = stack.pop() {
+            if let ast::Expr::Name(name) = expr {
+                if matches!(name.ctx, ast::ExprContext::Load) {
+                    if let Some(&local) = self.locals.get(name.id.as_str()) {
+                        let offset = name.range.start().to_usize();
+                        self.push_event(Event::Use(local, offset));
+                    }
+                }
+                continue;
+            }
+            walk::push_children(expr, &mut stack);
+        }
+    }
+
+    fn assign_target(&mut self, target: &'a ast::Expr) {
+        match target {
+            ast::Expr::Name(name) => self.def(name.id.as_str()),
+            ast::Expr::Tuple(tuple) => {
+                for elt in &tuple.elts {
+                    self.assign_target(elt);
+                }
+            }
+            ast::Expr::List(list) => {
+                for elt in &list.elts {
+                    self.assign_target(elt);
+                }
+            }
+            ast::Expr::Starred(starred) => self.assign_target(&starred.value),
+            _ => self.uses(target),
+        }
+    }
+
+    fn lower_block(&mut self, body: &'a [ast::Stmt]) {
+        for stmt in body {
+            self.lower_stmt(stmt);
+            // Any statement inside a `try` body may raise once it has run
+            if let Some(&dispatch) = self.handlers.last() {
+                let current = self.current;
+                self.edge(current, dispatch);
+            }
+        }
+    }
+
+    fn lower_stmt(&mut self, stmt: &'a ast::Stmt) {
+        match stmt {
+            ast::Stmt::FunctionDef(func) => self.def(func.name.as_str()),
+            ast::Stmt::AsyncFunctionDef(func) => self.def(func.name.as_str()),
+            ast::Stmt::ClassDef(class) => self.def(class.name.as_str()),
+            ast::Stmt::Return(ret) => {
+                if let Some(value) = &ret.value {
+                    self.uses(value);
+                }
+                let (current, exit) = (self.current, self.exit);
+                self.edge(current, exit);
+                self.start_unreachable();
+            }
+            ast::Stmt::Raise(raise) => {
+                if let Some(exc) = &raise.exc {
+                    self.uses(exc);
+                }
+                if let Some(cause) = &raise.cause {
+                    self.uses(cause);
+                }
+                let (current, target) = (self.current, self.raise_target());
+                self.edge(current, target);
+                self.start_unreachable();
+            }
+            ast::Stmt::Break(_) => {
+                if let Some(after) = self.loops.last().map(|l| l.after) {
+                    let current = self.current;
+                    self.edge(current, after);
+                }
+                self.start_unreachable();
+            }
+            ast::Stmt::Continue(_) => {
+                if let Some(back) = self.loops.last().map(|l| l.back) {
+                    let current = self.current;
+                    self.edge(current, back);
+                }
+                self.start_unreachable();
+            }
+            ast::Stmt::Assign(assign) => {
+                self.uses(&assign.value);
+                for target in &assign.targets {
+                    self.assign_target(target);
+                }
+            }
+            ast::Stmt::AugAssign(aug) => {
+                if let ast::Expr::Name(name) = aug.target.as_ref() {
+                    if let Some(&local) = self.locals.get(name.id.as_str()) {
+                        let offset = name.range.start().to_usize();
+                        self.push_event(Event::Use(local, offset));
+                    }
+                } else {
+                    self.uses(&aug.target);
+                }
+                self.uses(&aug.value);
+                self.assign_target(&aug.target);
+            }
+            ast::Stmt::AnnAssign(ann) => {
+                if let Some(value) = &ann.value {
+                    self.uses(value);
+                    self.assign_target(&ann.target);
+                }
+            }
+            ast::Stmt::Expr(expr) => self.uses(&expr.value),
+            ast::Stmt::Assert(assert) => {
+                self.uses(&assert.test);
+                if let Some(msg) = &assert.msg {
+                    self.uses(msg);
+                }
+            }
+            ast::Stmt::Delete(delete) => {
+                for target in &delete.targets {
+                    match target {
+                        ast::Expr::Name(name) => self.kill(name.id.as_str()),
+                        _ => self.uses(target),
+                    }
+                }
+            }
+            ast::Stmt::If(if_stmt) => self.lower_if(if_stmt),
+            ast::Stmt::While(while_stmt) => self.lower_while(while_stmt),
+            ast::Stmt::For(for_stmt) => {
+                self.lower_for(&for_stmt.target, &for_stmt.iter, &for_stmt.body, &for_stmt.orelse)
+            }
+            ast::Stmt::AsyncFor(for_stmt) => {
+                self.lower_for(&for_stmt.target, &for_stmt.iter, &for_stmt.body, &for_stmt.orelse)
+            }
+            ast::Stmt::With(with_stmt) => self.lower_with(&with_stmt.items, &with_stmt.body),
+            ast::Stmt::AsyncWith(with_stmt) => self.lower_with(&with_stmt.items, &with_stmt.body),
+            ast::Stmt::Try(try_stmt) => self.lower_try(
+                &try_stmt.body,
+                &try_stmt.handlers,
+                &try_stmt.orelse,
+                &try_stmt.finalbody,
+            ),
+            _ => {}
+        }
+    }
+
+    fn lower_if(&mut self, if_stmt: &'a ast::StmtIf) {
+        self.uses(&if_stmt.test);
+        let condition = self.current;
+
+        let body = self.new_block();
+        // `if False:` bodies never run
+        if !is_constant_bool(&if_stmt.test, false) {
+            self.edge(condition, body);
+        }
+        self.current = body;
+        self.lower_block(&if_stmt.body);
+        let body_end = self.current;
+
+        let orelse = self.new_block();
+        self.edge(condition, orelse);
+        self.current = orelse;
+        self.lower_block(&if_stmt.orelse);
+        let orelse_end = self.current;
+
+        let after = self.new_block();
+        self.edge(body_end, after);
+        self.edge(orelse_end, after);
+        self.current = after;
+    }
+
+    /// Loops leave through the end of their body rather than straight from
+    /// the header: like pylint, names bound in a loop body are treated as
+    /// assigned after the loop.
+    fn lower_while(&mut self, while_stmt: &'a ast::StmtWhile) {
+        let header = self.new_block();
+        let entry = self.current;
+        self.edge(entry, header);
+        self.current = header;
+        self.uses(&while_stmt.test);
+
+        let body = self.new_block();
+        let back = self.new_block();
+        let after = self.new_block();
+        self.edge(header, body);
+        self.edge(back, header);
+
+        self.loops.push(Loop { back, after });
+        self.current = body;
+        self.lower_block(&while_stmt.body);
+        let body_end = self.current;
+        self.edge(body_end, back);
+        self.loops.pop();
+
+        let orelse = self.new_block();
+        // `while True:` only ends through `break`
+        if !is_constant_bool(&while_stmt.test, true) {
+            self.edge(back, orelse);
+        }
+        self.current = orelse;
+        self.lower_block(&while_stmt.orelse);
+        let orelse_end = self.current;
+        self.edge(orelse_end, after);
+        self.current = after;
+    }
+
+    fn lower_for(
+        &mut self,
+        target: &'a ast::Expr,
+        iter: &'a ast::Expr,
+        body: &'a [ast::Stmt],
+        orelse: &'a [ast::Stmt],
+    ) {
+        self.uses(iter);
+        let header = self.new_block();
+        let entry = self.current;
+        self.edge(entry, header);
+        self.current = header;
+        self.assign_target(target);
+
+        let body_entry = self.new_block();
+        let back = self.new_block();
+        let after = self.new_block();
+        self.edge(header, body_entry);
+        self.edge(back, header);
+
+        self.loops.push(Loop { back, after });
+        self.current = body_entry;
+        self.lower_block(body);
+        let body_end = self.current;
+        self.edge(body_end, back);
+        self.loops.pop();
+
+        let orelse_entry = self.new_block();
+        self.edge(back, orelse_entry);
+        self.current = orelse_entry;
+        self.lower_block(orelse);
+        let orelse_end = self.current;
+        self.edge(orelse_end, after);
+        self.current = after;
+    }
+
+    fn lower_with(&mut self, items: &'a [ast::WithItem], body: &'a [ast::Stmt]) {
+        for item in items {
+            self.uses(&item.context_expr);
+            if let Some(vars) = &item.optional_vars {
+                self.assign_target(vars);
+            }
+        }
+        self.lower_block(body);
+    }
+
+    fn lower_try(
+        &mut self,
+        body: &'a [ast::Stmt],
+        handlers: &'a [ast::ExceptHandler],
+        orelse: &'a [ast::Stmt],
+        finalbody: &'a [ast::Stmt],
+    ) {
+        let dispatch = self.new_block();
+        // The body can raise before its first statement completes
+        let entry = self.current;
+        self.edge(entry, dispatch);
+        self.handlers.push(dispatch);
+        self.lower_block(body);
+        self.handlers.pop();
+
+        let orelse_entry = self.new_block();
+        let body_end = self.current;
+        self.edge(body_end, orelse_entry);
+        self.current = orelse_entry;
+        self.lower_block(orelse);
+        let mut ends = vec![self.current];
+
+        for handler in handlers {
+            match handler {
+                ast::ExceptHandler::ExceptHandler(h) => {
+                    let handler_entry = self.new_block();
+                    self.edge(dispatch, handler_entry);
+                    self.current = handler_entry;
+                    if let Some(name) = &h.name {
+                        self.def(name.as_str());
+                    }
+                    self.lower_block(&h.body);
+                    // The exception name is deleted when the handler ends
+                    if let Some(name) = &h.name {
+                        self.kill(name.as_str());
+                    }
+                    ends.push(self.current);
+                }
+            }
+        }
+
+        let finally_entry = self.new_block();
+        for end in ends {
+            self.edge(end, finally_entry);
+        }
+        self.current = finally_entry;
+        self.lower_block(finalbody);
+        let after = self.new_block();
+        let finally_end = self.current;
+        self.edge(finally_end, after);
+
+        // Without handlers the exception runs a second copy of `finally`
+        // and keeps propagating
+        if handlers.is_empty() {
+            let exceptional = self.new_block();
+            self.edge(dispatch, exceptional);
+            self.current = exceptional;
+            self.lower_block(finalbody);
+            let (current, target) = (self.current, self.raise_target());
+            self.edge(current, target);
+        }
+        self.current = after;
+    }
+}
+
+fn is_constant_bool(expr: &ast::Expr, value: bool) -> bool {
+    matches!(
+        expr,
+        ast::Expr::Constant(ast::ExprConstant {
+            value: ast::Constant::Bool(b),
+            ..
+        }) if *b == value
+    )
+}
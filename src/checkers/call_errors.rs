@@ -1,9 +1,10 @@
 use rustpython_ast::{self as ast};
+use serde::{Deserialize, Serialize};
 use crate::ast_visitor::AstContext;
 use crate::errors::{E1120, E1205};
 
 /// Track function signatures for argument checking
-#[derive(Debug, Clone)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub struct FunctionSignature {
     pub name: String,
     pub min_args: usize,
@@ -13,21 +14,65 @@ pub struct FunctionSignature {
     pub has_kwargs: bool,
 }
 
+impl FunctionSignature {
+    pub fn from_arguments(name: &str, args: &ast::Arguments) -> Self {
+        let mut required_args = Vec::new();
+        let mut min_args = 0;
+        
+        // Count required positional arguments
+        for arg in args.posonlyargs.iter().chain(args.args.iter()) {
+            if arg.default.is_none() {
+                required_args.push(arg.def.arg.to_string());
+                min_args += 1;
+            }
+        }
+        
+        let max_args = if args.vararg.is_some() {
+            None
+        } else {
+            Some(args.posonlyargs.len() + args.args.len() + args.kwonlyargs.len())
+        };
+        
+        Self {
+            name: name.to_string(),
+            min_args,
+            max_args,
+            required_args,
+            has_varargs: args.vararg.is_some(),
+            has_kwargs: args.kwarg.is_some(),
+        }
+    }
+    
+    /// The signature as seen by callers of a bound method or a class, with
+    /// `self` dropped
+    pub fn without_receiver(mut self) -> Self {
+        if !self.required_args.is_empty() {
+            self.required_args.remove(0);
+            self.min_args -= 1;
+        }
+        self.max_args = self.max_args.map(|max| max.saturating_sub(1));
+        self
+    }
+}
+
 impl AstContext {
     /// Check function call arguments for E1120 errors
     pub fn check_function_call_args(&mut self, call: &ast::ExprCall) {
         let start = call.range.start();
         let (line, col) = self.offset_to_line_col(start);
         
-        // Check for logging functions with E1205
-        if let ast::Expr::Attribute(attr) = &*call.func {
-            if let ast::Expr::Name(name) = &*attr.value {
-                let obj_name = name.id.as_str();
-                let method_name = attr.attr.as_str();
-                
-                // Check for logging calls
-                if obj_name == "LOG" || obj_name == "logger" || obj_name == "logging" {
-                    self.check_logging_format(call, method_name, line, col);
+        // Check for logging functions with E1205, unless the prescan found
+        // no logger names in the file
+        if self.families.logging {
+            if let ast::Expr::Attribute(attr) = &*call.func {
+                if let ast::Expr::Name(name) = &*attr.value {
+                    let obj_name = name.id.as_str();
+                    let method_name = attr.attr.as_str();
+                    
+                    // Check for logging calls
+                    if obj_name == "LOG" || obj_name == "logger" || obj_name == "logging" {
+                        self.check_logging_format(call, method_name, line, col);
+                    }
                 }
             }
         }
@@ -39,6 +84,11 @@ impl AstContext {
             // Check for functions we've seen defined (clone to avoid borrow issue)
             if let Some(sig) = self.function_signatures.get(&func_name).cloned() {
                 self.check_call_against_signature(call, &sig, line, col);
+            } else if self.deferred_imports.contains_key(&func_name) && !self.in_unreachable_code {
+                // Imported from a project module the slow tier will load
+                if let Some(call) = DeferredCall::new(func_name, call, line, col) {
+                    self.deferred_calls.push(call);
+                }
             }
         }
     }
@@ -87,34 +137,74 @@ impl AstContext {
     
     /// Check a function call against a known signature
     fn check_call_against_signature(&mut self, call: &ast::ExprCall, sig: &FunctionSignature, line: usize, col: usize) {
-        let provided_args = call.args.len();
-        let provided_kwargs = call.keywords.len();
-        
-        // Check minimum arguments - even functions with **kwargs need their required positional args
-        if provided_args < sig.min_args {
-            // Find which required arguments are missing
-            for (i, arg_name) in sig.required_args.iter().enumerate() {
-                if i >= provided_args {
-                    // Check if this arg was provided as a keyword
-                    let provided_as_kwarg = call.keywords.iter().any(|kw| {
-                        kw.arg.as_ref().map_or(false, |arg| arg.as_str() == arg_name)
-                    });
-                    
-                    if !provided_as_kwarg {
-                        self.add_issue(
-                            &E1120,
-                            line,
-                            col,
-                            vec![arg_name.clone()],
-                        );
-                        break; // Only report the first missing arg
-                    }
-                }
-            }
+        // Unpacked arguments could supply anything
+        if is_unpacking(call) {
+            return;
+        }
+
+        let missing = first_missing_argument(sig, call.args.len(), |name| {
+            call.keywords.iter().any(|kw| kw.arg.as_ref().map_or(false, |arg| arg.as_str() == name))
+        });
+        if let Some(arg_name) = missing {
+            self.add_issue(&E1120, line, col, vec![arg_name.to_string()]);
         }
     }
 }
 
+/// A call to a name imported from a project module, recorded by the fast
+/// tier so the slow tier can check it once the module's symbols are loaded
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct DeferredCall {
+    pub name: String,
+    pub positional: usize,
+    pub keywords: Vec<String>,
+    pub line: usize,
+    pub column: usize,
+}
+
+impl DeferredCall {
+    /// The shape of `call`, or `None` when unpacking makes it uncheckable
+    pub fn new(name: String, call: &ast::ExprCall, line: usize, column: usize) -> Option<Self> {
+        if is_unpacking(call) {
+            return None;
+        }
+        Some(Self {
+            name,
+            positional: call.args.len(),
+            keywords: call.keywords.iter().filter_map(|kw| kw.arg.as_ref().map(|arg| arg.to_string())).collect(),
+            line,
+            column,
+        })
+    }
+
+    /// The first required argument this call leaves out
+    pub fn missing_argument<'a>(&self, sig: &'a FunctionSignature) -> Option<&'a str> {
+        first_missing_argument(sig, self.positional, |name| self.keywords.iter().any(|kw| kw == name))
+    }
+}
+
+fn is_unpacking(call: &ast::ExprCall) -> bool {
+    call.args.iter().any(|arg| matches!(arg, ast::Expr::Starred(_)))
+        || call.keywords.iter().any(|kw| kw.arg.is_none())
+}
+
+/// Find the first required argument neither passed positionally nor by
+/// keyword. Even functions with **kwargs need their required positional args.
+fn first_missing_argument<'a>(
+    sig: &'a FunctionSignature,
+    provided_args: usize,
+    has_keyword: impl Fn(&str) -> bool,
+) -> Option<&'a str> {
+    if provided_args >= sig.min_args {
+        return None;
+    }
+    sig.required_args
+        .iter()
+        .skip(provided_args)
+        .map(String::as_str)
+        .find(|arg_name| !has_keyword(arg_name))
+}
+
 /// Count Python format string placeholders
 fn count_format_placeholders(s: &str) -> usize {
     let mut count = 0;
@@ -10,6 +10,33 @@ use crate::Args;
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct Config {
     pub jobs: usize,
+    /// Dedicated file reader threads; 0 reads files on the worker threads
+    #[serde(default)]
+    pub io_threads: usize,
+    /// Upper bound on source bytes being analyzed at once
+    #[serde(default)]
+    pub max_memory: Option<u64>,
+    /// Files larger than this many bytes are skipped
+    #[serde(default)]
+    pub max_file_size: Option<u64>,
+    /// Files nesting brackets deeper than this only get syntax checks
+    #[serde(default)]
+    pub max_nesting_depth: Option<usize>,
+    /// Per-file analysis time budget in milliseconds
+    #[serde(default)]
+    pub file_timeout_ms: Option<u64>,
+    /// Skip files whose header marks them as generated
+    #[serde(default)]
+    pub skip_generated: bool,
+    /// Where the project symbol index is kept between runs
+    #[serde(default)]
+    pub cache_dir: Option<PathBuf>,
+    /// `major.minor` version selecting the standard library signatures
+    #[serde(default)]
+    pub python_version: Option<String>,
+    /// Stop linting once this many issues were reported
+    #[serde(default)]
+    pub max_issues: Option<usize>,
     pub output_format: OutputFormat,
     pub enabled_checkers: HashSet<String>,
     pub disabled_checkers: HashSet<String>,
@@ -23,6 +50,10 @@ pub enum OutputFormat {
     Text,
     Json,
     Parseable,
+    /// One compact JSON record per line: each issue, then a summary per file
+    Ndjson,
+    /// Length-prefixed records for the Python package, see `binary_report`
+    Binary,
 }
 
 impl Default for Config {
@@ -31,6 +62,15 @@ impl Default for Config {
             jobs: std::thread::available_parallelism()
                 .map(|n| n.get())
                 .unwrap_or(1),
+            io_threads: 0,
+            max_memory: None,
+            max_file_size: None,
+            max_nesting_depth: None,
+            file_timeout_ms: None,
+            skip_generated: false,
+            cache_dir: None,
+            python_version: None,
+            max_issues: None,
             output_format: OutputFormat::Text,
             enabled_checkers: HashSet::new(),
             disabled_checkers: HashSet::new(),
@@ -53,10 +93,51 @@ impl Config {
             config.jobs = args.jobs;
         }
 
+        if let Some(io_threads) = args.io_threads {
+            config.io_threads = io_threads;
+        }
+
+        if let Some(max_memory) = &args.max_memory {
+            config.max_memory = Some(parse_byte_size(max_memory)?);
+        }
+
+        if let Some(max_file_size) = &args.max_file_size {
+            config.max_file_size = Some(parse_byte_size(max_file_size)?);
+        }
+
+        if args.max_nesting_depth.is_some() {
+            config.max_nesting_depth = args.max_nesting_depth;
+        }
+
+        if args.file_timeout.is_some() {
+            config.file_timeout_ms = args.file_timeout;
+        }
+
+        if args.skip_generated {
+            config.skip_generated = true;
+        }
+
+        if args.cache_dir.is_some() {
+            config.cache_dir = args.cache_dir.clone();
+        }
+
+        if args.py_version.is_some() {
+            config.python_version = args.py_version.clone();
+        }
+
+        if args.fail_fast {
+            config.max_issues = Some(1);
+        } else if let Some(max_issues) = args.max_issues {
+            // 0 lifts a limit set in the configuration file
+            config.max_issues = (max_issues > 0).then_some(max_issues);
+        }
+
         if let Some(format) = &args.output_format {
             config.output_format = match format.as_str() {
                 "json" => OutputFormat::Json,
                 "parseable" => OutputFormat::Parseable,
+                "ndjson" => OutputFormat::Ndjson,
+                "binary" => OutputFormat::Binary,
                 _ => OutputFormat::Text,
             };
         }
@@ -106,3 +187,26 @@ impl Config {
     }
 }
 
+/// Parse a byte count such as `1048576`, `512K`, `256MB` or `2GiB`.
+pub fn parse_byte_size(value: &str) -> Result<u64> {
+    let value = value.trim();
+    let digits_end = value
+        .find(|c: char| !c.is_ascii_digit())
+        .unwrap_or(value.len());
+    let (number, unit) = value.split_at(digits_end);
+    let number: u64 = number
+        .parse()
+        .map_err(|_| anyhow::anyhow!("Invalid size: {:?}", value))?;
+
+    let multiplier: u64 = match unit.trim().to_ascii_uppercase().as_str() {
+        "" | "B" => 1,
+        "K" | "KB" | "KIB" => 1 << 10,
+        "M" | "MB" | "MIB" => 1 << 20,
+        "G" | "GB" | "GIB" => 1 << 30,
+        _ => return Err(anyhow::anyhow!("Invalid size unit in {:?}", value)),
+    };
+
+    number
+        .checked_mul(multiplier)
+        .ok_or_else(|| anyhow::anyhow!("Size too large: {:?}", value))
+}
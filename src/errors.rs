@@ -22,6 +22,20 @@ pub enum Severity {
     Information,
 }
 
+impl Severity {
+    /// The severity a code's first letter stands for
+    pub fn of_code(code: &str) -> Self {
+        match code.chars().next() {
+            Some('E') => Severity::Error,
+            Some('W') => Severity::Warning,
+            Some('C') => Severity::Convention,
+            Some('R') => Severity::Refactor,
+            Some('I') => Severity::Information,
+            _ => Severity::Error,
+        }
+    }
+}
+
 impl fmt::Display for Severity {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
         match self {
@@ -43,14 +57,7 @@ impl Issue {
         column: usize,
         symbol: String,
     ) -> Self {
-        let severity = match code.chars().next() {
-            Some('E') => Severity::Error,
-            Some('W') => Severity::Warning,
-            Some('C') => Severity::Convention,
-            Some('R') => Severity::Refactor,
-            Some('I') => Severity::Information,
-            _ => Severity::Error,
-        };
+        let severity = Severity::of_code(&code);
 
         Self {
             code,
@@ -71,6 +78,18 @@ pub struct ErrorCode {
     pub message_template: &'static str,
 }
 
+impl ErrorCode {
+    /// Fill the `{}` placeholders of the message template with `args`
+    pub fn format_message(&self, args: &[String]) -> String {
+        let mut msg = self.message_template.to_string();
+        for (i, arg) in args.iter().enumerate() {
+            msg = msg.replace(&format!("{{{}}}", i), arg);
+            msg = msg.replace("{}", arg);
+        }
+        msg
+    }
+}
+
 pub const E0001: ErrorCode = ErrorCode {
     code: "E0001",
     symbol: "syntax-error",
@@ -316,4 +335,16 @@ pub const E1205: ErrorCode = ErrorCode {
     code: "E1205",
     symbol: "logging-too-many-args",
     message_template: "Too many arguments for logging format string",
-};
\ No newline at end of file
+};
+
+pub const I0013: ErrorCode = ErrorCode {
+    code: "I0013",
+    symbol: "file-ignored",
+    message_template: "Ignoring entire file: {}",
+};
+
+pub const I0014: ErrorCode = ErrorCode {
+    code: "I0014",
+    symbol: "analysis-budget-exceeded",
+    message_template: "File only partially analyzed: {}",
+};
@@ -0,0 +1,303 @@
+//! The local git repository, read through the `git` command line: changed
+//! files and lines, so `--diff` lints only what a branch touches without
+//! walking the tree, and the files of any revision, so `--rev` lints it
+//! without a checkout.
+
+use anyhow::{Context, Result};
+use std::collections::HashMap;
+use std::io::{BufRead, BufReader, Read, Write};
+use std::ops::Range;
+use std::path::{Path, PathBuf};
+use std::process::{Child, ChildStdout, Command, Stdio};
+use std::thread::{self, JoinHandle};
+
+use crate::errors::Issue;
+
+/// Pathspecs of the files prylint lints
+const PYTHON_PATHSPECS: &[&str] = &["*.py", "*.pyi"];
+
+/// Lines added or changed per file since a base revision
+#[derive(Debug, Default, Clone)]
+pub struct ChangedLines {
+    files: HashMap<PathBuf, Vec<Range<usize>>>,
+}
+
+impl ChangedLines {
+    /// Whether `line` of `file` was added or changed
+    pub fn contains(&self, file: &Path, line: usize) -> bool {
+        self.files
+            .get(file)
+            .map_or(false, |ranges| ranges.iter().any(|range| range.contains(&line)))
+    }
+
+    /// Keep only the issues on changed lines of `file`
+    pub fn retain_changed(&self, file: &Path, issues: &mut Vec<Issue>) {
+        issues.retain(|issue| self.contains(file, issue.line));
+    }
+}
+
+/// The Python files changed since a base revision, and their changed lines
+#[derive(Debug, Default)]
+pub struct DiffScope {
+    /// Changed files that still exist, relative to the working directory
+    /// when they are inside it
+    pub files: Vec<PathBuf>,
+    pub lines: ChangedLines,
+}
+
+/// Python files changed between the merge base of `base` and `HEAD` and the
+/// working tree, including untracked files, limited to files under `paths`
+/// when any are given. Deleted files are left out.
+///
+/// The repository is the one containing the first path, or the working
+/// directory.
+pub fn diff_scope(base: &str, paths: &[PathBuf]) -> Result<DiffScope> {
+    let cwd = std::env::current_dir()?;
+    let start = match paths.first() {
+        Some(path) if path.is_dir() => path.clone(),
+        Some(path) => match path.parent() {
+            Some(dir) if !dir.as_os_str().is_empty() => dir.to_path_buf(),
+            _ => cwd.clone(),
+        },
+        None => cwd.clone(),
+    };
+    let root = repository_root(&start)?;
+    let merge_base = git(&root, &["merge-base", base, "HEAD"])?;
+    let merge_base = merge_base.trim_end();
+
+    let mut args = vec![
+        "-c", "core.quotePath=false", "diff", "-U0", "--no-color", "--no-ext-diff", "--diff-filter=d",
+        // Whatever diff.noprefix or diff.mnemonicPrefix say, the parser
+        // expects the default prefixes
+        "--src-prefix=a/", "--dst-prefix=b/",
+        merge_base, "--",
+    ];
+    args.extend(PYTHON_PATHSPECS);
+    let mut changed = parse_unified_diff(&git(&root, &args)?);
+
+    let mut args = vec!["ls-files", "--others", "--exclude-standard", "-z", "--"];
+    args.extend(PYTHON_PATHSPECS);
+    for untracked in git(&root, &args)?.split('\0').filter(|path| !path.is_empty()) {
+        changed.push((PathBuf::from(untracked), vec![1..usize::MAX]));
+    }
+
+    // Report paths the way the user would type them from here
+    let cwd = cwd.canonicalize().unwrap_or(cwd);
+    let within: Vec<PathBuf> = paths.iter().filter_map(|path| path.canonicalize().ok()).collect();
+    let mut scope = DiffScope::default();
+    for (relative, ranges) in changed {
+        let absolute = root.join(&relative);
+        if !absolute.is_file() || (!paths.is_empty() && !within.iter().any(|dir| absolute.starts_with(dir))) {
+            continue;
+        }
+        let file = absolute.strip_prefix(&cwd).map(Path::to_path_buf).unwrap_or(absolute);
+        scope.files.push(file.clone());
+        scope.lines.files.insert(file, ranges);
+    }
+    Ok(scope)
+}
+
+/// A Python file in a revision's tree
+#[derive(Debug, Clone)]
+pub struct TreeFile {
+    /// Relative to the repository root
+    pub path: PathBuf,
+    /// Object id of the file's blob
+    pub oid: String,
+}
+
+/// The root of the repository containing `dir`
+pub fn repository_root(dir: &Path) -> Result<PathBuf> {
+    Ok(PathBuf::from(git(dir, &["rev-parse", "--show-toplevel"])?.trim_end()))
+}
+
+/// The Python files in the tree of `rev`, in path order, limited to `paths`
+/// relative to the repository root when any are given. Symlinks and
+/// submodules are left out.
+pub fn tree_files(root: &Path, rev: &str, paths: &[PathBuf]) -> Result<Vec<TreeFile>> {
+    let paths: Vec<String> = paths.iter().map(|path| path.to_string_lossy().into_owned()).collect();
+    let mut args = vec!["ls-tree", "-r", "-z", "--full-tree", rev, "--"];
+    args.extend(paths.iter().map(String::as_str));
+
+    let mut files = Vec::new();
+    for entry in git(root, &args)?.split('\0').filter(|entry| !entry.is_empty()) {
+        // <mode> SP <type> SP <object> TAB <path>
+        let Some((meta, path)) = entry.split_once('\t') else { continue };
+        let mut meta = meta.split(' ');
+        let (mode, kind, oid) = (meta.next(), meta.next(), meta.next());
+        let path = PathBuf::from(path);
+        let is_python = path.extension().map_or(false, |ext| ext == "py" || ext == "pyi");
+        if kind == Some("blob") && mode != Some("120000") && is_python {
+            if let Some(oid) = oid {
+                files.push(TreeFile { path, oid: oid.to_string() });
+            }
+        }
+    }
+    Ok(files)
+}
+
+/// A blob read from the object database
+pub struct Blob {
+    pub oid: String,
+    pub data: Vec<u8>,
+}
+
+/// Blobs streamed from one `git cat-file --batch`, in the order they were
+/// asked for
+pub struct BlobReader {
+    child: Child,
+    stdout: BufReader<ChildStdout>,
+    /// Writes the requested object ids while their contents are read
+    requests: Option<JoinHandle<()>>,
+}
+
+impl BlobReader {
+    pub fn new(root: &Path, oids: Vec<String>) -> Result<Self> {
+        let mut child = Command::new("git")
+            .args(["cat-file", "--batch"])
+            .current_dir(root)
+            .stdin(Stdio::piped())
+            .stdout(Stdio::piped())
+            .spawn()
+            .context("Failed to run git")?;
+        let mut stdin = child.stdin.take().expect("piped stdin");
+        let stdout = BufReader::new(child.stdout.take().expect("piped stdout"));
+        let requests = thread::spawn(move || {
+            for oid in oids {
+                if writeln!(stdin, "{}", oid).is_err() {
+                    break;
+                }
+            }
+        });
+        Ok(Self { child, stdout, requests: Some(requests) })
+    }
+
+    fn read_blob(&mut self) -> Result<Option<Blob>> {
+        // <oid> SP <type> SP <size> LF <contents> LF, or <oid> SP missing LF
+        let mut header = String::new();
+        if self.stdout.read_line(&mut header)? == 0 {
+            return Ok(None);
+        }
+        let mut fields = header.split_whitespace();
+        let oid = fields.next().unwrap_or_default().to_string();
+        let size: usize = match (fields.next(), fields.next()) {
+            (Some("blob"), Some(size)) => size.parse()?,
+            _ => return Err(anyhow::anyhow!("git cat-file could not read blob {}: {}", oid, header.trim_end())),
+        };
+        let mut data = vec![0; size + 1];
+        self.stdout.read_exact(&mut data)?;
+        data.truncate(size);
+        Ok(Some(Blob { oid, data }))
+    }
+}
+
+impl Iterator for BlobReader {
+    type Item = Result<Blob>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        self.read_blob().transpose()
+    }
+}
+
+impl Drop for BlobReader {
+    fn drop(&mut self) {
+        // Readers may stop early; git is done with us either way
+        let _ = self.child.kill();
+        let _ = self.child.wait();
+        if let Some(requests) = self.requests.take() {
+            let _ = requests.join();
+        }
+    }
+}
+
+/// Files and the line ranges added on their new side, from `git diff -U0`.
+/// Files with only deletions have no ranges, but a deleted import or
+/// assignment can still break the lines left, so they are kept.
+fn parse_unified_diff(diff: &str) -> Vec<(PathBuf, Vec<Range<usize>>)> {
+    let mut files: Vec<(PathBuf, Vec<Range<usize>>)> = Vec::new();
+    // Whether the hunks that follow belong to the last file in `files`
+    let mut in_file = false;
+    for line in diff.lines() {
+        if let Some(name) = line.strip_prefix("+++ ") {
+            let path = diff_file_name(name).and_then(|name| name.strip_prefix("b/").map(str::to_string));
+            in_file = path.is_some();
+            if let Some(path) = path {
+                files.push((PathBuf::from(path), Vec::new()));
+            }
+        } else if let Some(hunk) = line.strip_prefix("@@ ") {
+            if let (true, Some((_, ranges)), Some(range)) = (in_file, files.last_mut(), parse_hunk_header(hunk)) {
+                ranges.push(range);
+            }
+        }
+    }
+    files
+}
+
+/// The file name of a `---`/`+++` line. Git ends names containing a space
+/// with a tab, and C-quotes names with `"`, `\` or control characters.
+fn diff_file_name(name: &str) -> Option<std::borrow::Cow<'_, str>> {
+    let name = name.strip_suffix('\t').unwrap_or(name);
+    match name.strip_prefix('"') {
+        Some(quoted) => unquote_c_style(quoted.strip_suffix('"')?).map(std::borrow::Cow::Owned),
+        None => Some(std::borrow::Cow::Borrowed(name)),
+    }
+}
+
+/// Undo git's C-style quoting of a path, without the surrounding quotes
+fn unquote_c_style(quoted: &str) -> Option<String> {
+    let mut bytes = Vec::with_capacity(quoted.len());
+    let mut chars = quoted.bytes();
+    while let Some(byte) = chars.next() {
+        if byte != b'\\' {
+            bytes.push(byte);
+            continue;
+        }
+        let escaped = match chars.next()? {
+            b'a' => 0x07,
+            b'b' => 0x08,
+            b't' => b'\t',
+            b'n' => b'\n',
+            b'v' => 0x0b,
+            b'f' => 0x0c,
+            b'r' => b'\r',
+            digit @ b'0'..=b'3' => {
+                // Three octal digits for a byte outside printable ASCII
+                let mut value = digit - b'0';
+                for _ in 0..2 {
+                    let digit = chars.next().filter(|d| (b'0'..=b'7').contains(d))?;
+                    value = value * 8 + (digit - b'0');
+                }
+                value
+            }
+            other => other,
+        };
+        bytes.push(escaped);
+    }
+    String::from_utf8(bytes).ok()
+}
+
+/// The new-side lines of a hunk header such as `-10,2 +12,3 @@ def f():`
+fn parse_hunk_header(hunk: &str) -> Option<Range<usize>> {
+    let new_side = hunk.split(' ').find_map(|part| part.strip_prefix('+'))?;
+    let (start, count) = match new_side.split_once(',') {
+        Some((start, count)) => (start.parse().ok()?, count.parse().ok()?),
+        None => (new_side.parse().ok()?, 1),
+    };
+    (count > 0).then(|| start..start + count)
+}
+
+fn git(dir: &Path, args: &[&str]) -> Result<String> {
+    let output = Command::new("git")
+        .args(args)
+        .current_dir(dir)
+        .output()
+        .context("Failed to run git")?;
+    if !output.status.success() {
+        return Err(anyhow::anyhow!(
+            "`git {}` failed: {}",
+            args.join(" "),
+            String::from_utf8_lossy(&output.stderr).trim()
+        ));
+    }
+    String::from_utf8(output.stdout).context("git printed a path that is not UTF-8")
+}
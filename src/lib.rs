@@ -1,9 +1,23 @@
+pub mod archive;
 pub mod ast_visitor;
+pub mod binary_report;
+pub mod blob_cache;
+pub mod budgets;
+pub mod cfg;
 pub mod checkers;
 pub mod config;
 pub mod errors;
+pub mod git;
 pub mod linter;
+pub mod pipeline;
+pub mod prefilter;
 pub mod reporter;
+pub mod semantic;
+pub mod statistics;
+pub mod stdlib;
+pub mod symbol_index;
+pub mod tiers;
+pub mod walk;
 
 // Re-export Args for library usage
 use clap::Parser;
@@ -11,18 +25,66 @@ use clap::Parser;
 #[derive(Parser, Debug)]
 #[clap(author, version, about, long_about = None)]
 pub struct Args {
-    #[clap(help = "Python files or directories to lint")]
+    #[clap(help = "Python files, directories or archives (.whl, .zip, .tar.gz, .tar.xz) to lint")]
     pub paths: Vec<std::path::PathBuf>,
 
     #[clap(short = 'e', long = "errors-only", short_alias = 'E', help = "Display only error messages")]
     pub errors_only: bool,
 
-    #[clap(short = 'f', long, help = "Output format (text, json, parseable)")]
+    #[clap(short = 'f', long, help = "Output format (text, json, parseable, ndjson, binary)")]
     pub output_format: Option<String>,
 
     #[clap(short = 'j', long, help = "Number of parallel jobs", default_value = "0")]
     pub jobs: usize,
 
+    #[clap(long, help = "Number of threads prefetching file contents (0 reads on the job threads)")]
+    pub io_threads: Option<usize>,
+
+    #[clap(long, help = "Cap on source bytes analyzed at once, e.g. 512M")]
+    pub max_memory: Option<String>,
+
+    #[clap(long, help = "Skip files larger than this size, e.g. 2M")]
+    pub max_file_size: Option<String>,
+
+    #[clap(long, help = "Only syntax-check files nesting brackets deeper than this")]
+    pub max_nesting_depth: Option<usize>,
+
+    #[clap(long, value_name = "MS", help = "Stop analyzing a file after this many milliseconds")]
+    pub file_timeout: Option<u64>,
+
+    #[clap(long, help = "Skip files with a generated-code header comment")]
+    pub skip_generated: bool,
+
+    #[clap(long, help = "Directory for the persistent project symbol index")]
+    pub cache_dir: Option<std::path::PathBuf>,
+
+    #[clap(long, value_name = "X.Y", help = "Python version whose standard library signatures to check against")]
+    pub py_version: Option<String>,
+
+    #[clap(long, help = "Report each file's local checks as soon as it is done, before cross-module checks")]
+    pub fast_first: bool,
+
+    #[clap(long, help = "Write each file's results as soon as it is done, in no particular order")]
+    pub unordered: bool,
+
+    #[clap(long, help = "Only count issues by code and by file, and print those counts")]
+    pub statistics: bool,
+
+    #[clap(long, help = "Stop at the first reported issue")]
+    pub fail_fast: bool,
+
+    #[clap(long, value_name = "N", help = "Stop once N issues were reported (0 for no limit)")]
+    pub max_issues: Option<usize>,
+
+    #[clap(long, value_name = "BASE", help = "Lint only Python files changed since the merge base with this git revision")]
+    pub diff: Option<String>,
+
+    #[clap(long, requires = "diff", help = "With --diff, report only issues on changed lines")]
+    pub changed_lines_only: bool,
+
+    #[clap(long, value_name = "TREE-ISH", conflicts_with_all = ["diff", "statistics", "fast_first"], help = "Lint a git revision from the object database; paths are then relative to the repository root")]
+    pub rev: Option<String>,
+
     #[clap(long, help = "Configuration file")]
     pub rcfile: Option<std::path::PathBuf>,
 
@@ -1,24 +1,75 @@
 use anyhow::{Context, Result};
 use rayon::prelude::*;
+use std::collections::{HashMap, HashSet};
 use std::fs;
 use std::path::{Path, PathBuf};
+use std::sync::mpsc::sync_channel;
+use std::sync::{Arc, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
 use walkdir::WalkDir;
 
+use crate::archive;
 use crate::ast_visitor::AstContext;
+use crate::blob_cache::{self, BlobCache, BlobResult};
+use crate::budgets;
 use crate::config::Config;
-use crate::errors::Issue;
+use crate::errors::{ErrorCode, Issue, Severity, I0013, I0014};
+use crate::git::{self, ChangedLines};
+use crate::pipeline::{self, Claim, IssueLimit};
+use crate::statistics::{Statistics, Tally};
+use crate::stdlib::StdlibTable;
+use crate::symbol_index::{self, SymbolIndex};
+use crate::tiers::SlowTier;
+
+/// Sources at least this large have their top-level function and class
+/// bodies visited in parallel when more than one job is allowed and no
+/// memory budget is set
+const PARALLEL_BODIES_MIN_BYTES: usize = 256 * 1024;
 
 pub struct Linter {
     config: Config,
+    symbols: Arc<SymbolIndex>,
+    /// Fast tiers of git blobs, for `--rev`
+    blobs: BlobCache,
+    /// Set by `max_issues`, and counted afresh by every streamed run
+    limit: Option<IssueLimit>,
+    /// Only issues on these lines are reported, for `--diff`
+    changed_lines: Option<ChangedLines>,
 }
 
 impl Linter {
     pub fn new(config: Config) -> Self {
-        Self { config }
+        // An unreadable index only costs speed, so fall back to one that
+        // lives for this run
+        let symbols = config
+            .cache_dir
+            .as_ref()
+            .and_then(|dir| SymbolIndex::open(&dir.join(symbol_index::INDEX_FILE)).ok())
+            .unwrap_or_else(SymbolIndex::in_memory);
+        let blobs = match &config.cache_dir {
+            Some(dir) => BlobCache::open(&dir.join(blob_cache::CACHE_DIR), blob_cache::fingerprint(&config)),
+            None => BlobCache::in_memory(),
+        };
+        let limit = config.max_issues.map(IssueLimit::new);
+        Self {
+            config,
+            symbols: Arc::new(symbols),
+            blobs,
+            limit,
+            changed_lines: None,
+        }
+    }
+
+    /// Report only issues on `lines` from streamed and fast-first runs
+    pub fn set_changed_lines(&mut self, lines: ChangedLines) {
+        self.changed_lines = Some(lines);
     }
 
     pub fn check_path(&mut self, path: &Path) -> Result<Vec<Issue>> {
-        if path.is_file() {
+        if path.is_file() && archive::is_archive(path) {
+            self.check_inputs(&[], &[path.to_path_buf()])
+        } else if path.is_file() {
             self.check_file(path)
         } else if path.is_dir() {
             self.check_directory(path)
@@ -27,8 +78,62 @@ impl Linter {
         }
     }
 
+    /// Lint every file reachable from `paths` as a single work set, so that
+    /// many path arguments share one parallel pipeline and one report.
+    /// Archives among `paths` are linted in place.
+    pub fn check_paths(&mut self, paths: &[PathBuf]) -> Result<Vec<Issue>> {
+        let (archives, paths): (Vec<PathBuf>, Vec<PathBuf>) =
+            paths.iter().cloned().partition(|path| path.is_file() && archive::is_archive(path));
+        let files = self.collect_files(&paths)?;
+        self.check_inputs(&files, &archives)
+    }
+
     pub fn check_directory(&mut self, dir: &Path) -> Result<Vec<Issue>> {
-        let python_files: Vec<PathBuf> = WalkDir::new(dir)
+        let python_files = self.discover_directory(dir);
+        self.check_files(&python_files)
+    }
+
+    /// Expand files and directories into one de-duplicated list of Python
+    /// files, keeping the order in which they were first reached.
+    pub fn collect_files(&self, paths: &[PathBuf]) -> Result<Vec<PathBuf>> {
+        // Overlap is only possible between arguments, so a lone directory
+        // argument doesn't pay for canonicalizing every file it contains
+        let dedupe = paths.len() > 1;
+        let mut seen = HashSet::new();
+        let mut files = Vec::new();
+
+        for path in paths {
+            let discovered = if path.is_file() {
+                vec![path.to_path_buf()]
+            } else if path.is_dir() {
+                self.discover_directory(path)
+            } else {
+                return Err(anyhow::anyhow!("Path does not exist: {:?}", path));
+            };
+
+            for file in discovered {
+                if dedupe {
+                    let key = fs::canonicalize(&file).unwrap_or_else(|_| file.clone());
+                    if !seen.insert(key) {
+                        continue;
+                    }
+                }
+                files.push(file);
+            }
+        }
+
+        Ok(files)
+    }
+
+    /// Drop the files ignore patterns exclude, for file lists that didn't
+    /// come from discovery
+    pub fn without_ignored(&self, mut files: Vec<PathBuf>) -> Vec<PathBuf> {
+        files.retain(|file| !self.should_ignore(file));
+        files
+    }
+
+    fn discover_directory(&self, dir: &Path) -> Vec<PathBuf> {
+        WalkDir::new(dir)
             .into_iter()
             .filter_map(|e| e.ok())
             .filter(|e| {
@@ -39,69 +144,607 @@ impl Linter {
             })
             .filter(|e| !self.should_ignore(e.path()))
             .map(|e| e.path().to_path_buf())
-            .collect();
+            .collect()
+    }
+
+    pub fn check_files(&self, files: &[PathBuf]) -> Result<Vec<Issue>> {
+        self.check_inputs(files, &[])
+    }
+
+    /// Lint `files` and the members of `archives`, in that order
+    pub fn check_inputs(&self, files: &[PathBuf], archives: &[PathBuf]) -> Result<Vec<Issue>> {
+        let results = Mutex::new(Vec::with_capacity(files.len()));
+        self.check_inputs_streaming(files, archives, |index, _, issues| results.lock().unwrap().push((index, issues)))?;
+
+        let mut results = results.into_inner().unwrap();
+        results.sort_unstable_by_key(|(index, _)| *index);
+        Ok(results.into_iter().flat_map(|(_, issues)| issues).collect())
+    }
+
+    /// Lint `files`, handing each file's issues to `emit` together with its
+    /// index in `files` and its path as soon as that file is done. Files
+    /// finish in no particular order.
+    ///
+    /// Under `max_issues`, files that finish after the limit was reached are
+    /// not emitted and files not started by then are skipped.
+    pub fn check_files_streaming<F>(&self, files: &[PathBuf], emit: F) -> Result<()>
+    where
+        F: Fn(usize, &Path, Vec<Issue>) + Sync,
+    {
+        self.check_inputs_streaming(files, &[], emit)
+    }
+
+    /// Lint `files` and the Python files inside `archives` as one run, like
+    /// [`Linter::check_files_streaming`]. Archive members are numbered after
+    /// `files`, in the order they are read, and reported under the archive's
+    /// path joined with their name.
+    pub fn check_inputs_streaming<F>(&self, files: &[PathBuf], archives: &[PathBuf], emit: F) -> Result<()>
+    where
+        F: Fn(usize, &Path, Vec<Issue>) + Sync,
+    {
+        self.reset_limit();
+        let emit = |index: usize, path: &Path, mut issues: Vec<Issue>| {
+            if self.admit(path, &mut issues) {
+                emit(index, path, issues);
+            }
+        };
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(self.config.jobs.max(1))
+            .build()?;
+        pool.install(|| {
+            self.stream_files(files, &emit)?;
+            self.stream_archives(archives, files.len(), &emit)
+        })
+    }
+
+    fn stream_files<F>(&self, files: &[PathBuf], emit: &F) -> Result<()>
+    where
+        F: Fn(usize, &Path, Vec<Issue>) + Sync,
+    {
+        self.for_each_fast_tier(files, |index, (mut issues, slow)| {
+            issues.extend(self.run_slow_tier(slow));
+            emit(index, &files[index], issues);
+        })
+    }
+
+    /// Lint the Python members of each archive without extracting it,
+    /// numbering them from `first_index`
+    ///
+    /// Members are decompressed one at a time on a reader thread and linted
+    /// in parallel as they arrive. Their slow tiers wait until the whole
+    /// archive is read: its members stand in for the disk, like the files
+    /// of a git tree, so imports between them resolve and other project
+    /// imports aren't reported.
+    fn stream_archives<F>(&self, archives: &[PathBuf], first_index: usize, emit: &F) -> Result<()>
+    where
+        F: Fn(usize, &Path, Vec<Issue>) + Sync,
+    {
+        let mut next_index = first_index;
+        for path in archives {
+            if self.stopping() {
+                break;
+            }
+            let linted = Mutex::new(Vec::new());
+            let (sender, receiver) = sync_channel(self.config.jobs.max(1) * 2);
+            let read = thread::scope(|scope| {
+                let reader = scope.spawn(move || {
+                    let mut read = 0;
+                    archive::for_each_python_member(path, self.config.max_file_size, |member| {
+                        if self.should_ignore(&member.path) {
+                            return true;
+                        }
+                        if self.stopping() || sender.send((read, member)).is_err() {
+                            return false;
+                        }
+                        read += 1;
+                        true
+                    })?;
+                    Ok::<_, anyhow::Error>(read)
+                });
+                receiver.into_iter().par_bridge().for_each(|(offset, member): (usize, archive::Member)| {
+                    if self.stopping() {
+                        return;
+                    }
+                    let result = match member.contents {
+                        archive::Contents::Source(source) => self.check_source_tiered(&member.path, source),
+                        archive::Contents::TooLarge(size) => {
+                            let limit = self
+                                .config
+                                .max_file_size
+                                .map_or(archive::MAX_MEMBER_BYTES, |size| size.min(archive::MAX_MEMBER_BYTES));
+                            (self.skipped(&member.path, too_large(size, limit)), SlowTier::default())
+                        }
+                    };
+                    linted.lock().unwrap().push((offset, member.path, result));
+                });
+                reader.join().expect("archive reader panicked")
+            })?;
+
+            let linted = linted.into_inner().unwrap();
+            let members: Arc<HashSet<PathBuf>> = Arc::new(linted.iter().map(|(_, path, _)| path.clone()).collect());
+            linted.into_par_iter().for_each(|(offset, path, (mut issues, mut slow))| {
+                if self.stopping() {
+                    return;
+                }
+                slow.tree = Some(Arc::clone(&members));
+                issues.extend(self.run_slow_tier(slow));
+                emit(next_index + offset, &path, issues);
+            });
+            next_index += read;
+        }
+        Ok(())
+    }
+
+    /// Lint the Python files of a git revision straight from the object
+    /// database of the repository containing `repo`, handing each file's
+    /// issues to `emit` like [`Linter::check_files_streaming`]. `paths` are
+    /// relative to the repository root and narrow the files.
+    ///
+    /// Blobs are read with one `git cat-file --batch` and their fast tiers
+    /// are kept by object id, across runs when there is a cache directory,
+    /// so a revision close to one linted before only analyzes what changed.
+    /// Project modules of the revision aren't on disk, so of the imports
+    /// only those from the standard library are checked.
+    pub fn check_revision_streaming<F>(&self, repo: &Path, rev: &str, paths: &[PathBuf], emit: F) -> Result<()>
+    where
+        F: Fn(usize, &Path, Vec<Issue>) + Sync,
+    {
+        self.reset_limit();
+        let root = git::repository_root(repo)?;
+        let mut files = git::tree_files(&root, rev, paths)?;
+        files.retain(|file| !self.should_ignore(&file.path));
+        let tree: Arc<HashSet<PathBuf>> = Arc::new(files.iter().map(|file| file.path.clone()).collect());
+        let stdlib = StdlibTable::for_version(self.config.python_version.as_deref());
+
+        // Files by blob, so each blob is analyzed once however many paths
+        // hold it
+        let mut by_oid: HashMap<&str, Vec<usize>> = HashMap::new();
+        for (index, file) in files.iter().enumerate() {
+            by_oid.entry(file.oid.as_str()).or_default().push(index);
+        }
+        let finish = |result: &BlobResult, indexes: &[usize]| {
+            for &index in indexes {
+                if self.stopping() {
+                    return;
+                }
+                let path = &files[index].path;
+                let (mut issues, mut slow) = result.at(path);
+                slow.stdlib = stdlib;
+                slow.tree = Some(Arc::clone(&tree));
+                issues.extend(self.run_slow_tier(slow));
+                if self.admit(path, &mut issues) {
+                    emit(index, path, issues);
+                }
+            }
+        };
 
-        let issues: Vec<Issue> = if self.config.jobs > 1 {
-            python_files
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(self.config.jobs.max(1))
+            .build()?;
+        pool.install(|| {
+            let missing: Vec<String> = by_oid
                 .par_iter()
-                .map(|file| self.check_file(file))
-                .collect::<Result<Vec<_>>>()?
-                .into_iter()
-                .flatten()
-                .collect()
-        } else {
-            python_files
-                .iter()
-                .map(|file| self.check_file(file))
-                .collect::<Result<Vec<_>>>()?
-                .into_iter()
-                .flatten()
-                .collect()
+                .filter_map(|(oid, indexes)| match self.blobs.get(oid) {
+                    Some(result) => {
+                        finish(&result, indexes);
+                        None
+                    }
+                    None => Some(oid.to_string()),
+                })
+                .collect();
+            if missing.is_empty() || self.stopping() {
+                return Ok(());
+            }
+
+            git::BlobReader::new(&root, missing)?
+                .par_bridge()
+                .try_for_each(|blob| -> Result<()> {
+                    let blob = blob?;
+                    if self.stopping() {
+                        return Ok(());
+                    }
+                    let indexes = &by_oid[blob.oid.as_str()];
+                    let source = match String::from_utf8(blob.data) {
+                        Ok(source) => source,
+                        Err(e) => String::from_utf8_lossy(e.as_bytes()).into_owned(),
+                    };
+                    let (issues, slow, complete) = self.fast_tier(&files[indexes[0]].path, source);
+                    let result = Arc::new(BlobResult::new(issues, slow));
+                    // Cut short by the file timeout or a stopping run, the
+                    // result isn't the blob's
+                    if complete && !self.stopping() {
+                        self.blobs.insert(blob.oid, Arc::clone(&result));
+                    }
+                    finish(&result, indexes);
+                    Ok(())
+                })
+        })
+    }
+
+    /// Run the fast tier on every file and pass each result to `done` with
+    /// the file's index
+    ///
+    /// Byte-identical copies share one fast tier, and its issues are moved
+    /// to every copy. The slow tier resolves imports from each copy's own
+    /// location, so it is left to run once per path.
+    fn for_each_fast_tier<F>(&self, files: &[PathBuf], done: F) -> Result<()>
+    where
+        F: Fn(usize, (Vec<Issue>, SlowTier)) + Sync,
+    {
+        let copies = pipeline::IdenticalSources::new(files);
+        let fast_tier = |index: usize, source: String| {
+            let file = &files[index];
+            match copies.claim(index, source.as_bytes()) {
+                Claim::Unique => done(index, self.check_source_tiered(file, source)),
+                Claim::Queued => {}
+                Claim::Copy(result) => done(index, relocated(&result, file)),
+                Claim::First(key) => {
+                    let result = Arc::new(self.check_source_tiered(file, source));
+                    for copy in copies.finish(key, Arc::clone(&result)) {
+                        done(copy, relocated(&result, &files[copy]));
+                    }
+                    done(index, relocated(&result, file));
+                }
+            }
+        };
+        let read_and_check = |index: usize| -> Result<()> {
+            let file = &files[index];
+            if let Some(reason) = self.skip_before_reading(file)? {
+                done(index, (self.skipped(file, reason), SlowTier::default()));
+                return Ok(());
+            }
+            let source = fs::read_to_string(file)
+                .with_context(|| format!("Failed to read file: {:?}", file))?;
+            fast_tier(index, source);
+            Ok(())
         };
 
-        Ok(issues)
+        if self.config.jobs <= 1 || files.len() <= 1 {
+            for index in 0..files.len() {
+                if self.stopping() {
+                    break;
+                }
+                read_and_check(index)?;
+            }
+            return Ok(());
+        }
+
+        let budget = self.config.max_memory.map(pipeline::ByteBudget::new);
+        let budget = budget.as_ref();
+        if self.config.io_threads > 0 {
+            // Dedicated readers keep the CPU workers busy on slow filesystems
+            pipeline::run_prefetched(
+                files,
+                self.config.io_threads,
+                self.config.jobs * 2,
+                budget,
+                self.limit.as_ref().map(IssueLimit::flag),
+                |file| self.skip_before_reading(file),
+                |index, file, fetched| match fetched {
+                    _ if self.stopping() => {}
+                    pipeline::Fetched::Skipped(reason) => {
+                        done(index, (self.skipped(file, reason), SlowTier::default()))
+                    }
+                    pipeline::Fetched::Source(source) => fast_tier(index, source),
+                },
+            )?;
+            Ok(())
+        } else {
+            (0..files.len()).into_par_iter().try_for_each(|index| {
+                if self.stopping() {
+                    return Ok(());
+                }
+                let _permit = budget.map(|b| b.acquire(pipeline::file_size(&files[index])));
+                read_and_check(index)
+            })
+        }
     }
 
     pub fn check_file(&self, file: &Path) -> Result<Vec<Issue>> {
+        let (mut issues, slow) = self.check_file_tiered(file)?;
+        issues.extend(self.run_slow_tier(slow));
+        Ok(issues)
+    }
+
+    /// Lint `files` fast tier first: each file's local issues are handed to
+    /// `on_fast` as soon as that file is done, and the cross-file checks all
+    /// files left behind run afterwards. Returns the slow tier's issues, in
+    /// the order of `files`.
+    pub fn check_files_tiered<F>(&self, files: &[PathBuf], on_fast: F) -> Result<Vec<Issue>>
+    where
+        F: Fn(&Path, Vec<Issue>) + Sync,
+    {
+        self.reset_limit();
+        let run_slow = |(index, slow): (usize, SlowTier)| {
+            let file = &files[index];
+            let mut issues = if self.stopping() { Vec::new() } else { self.run_slow_tier(slow) };
+            if !self.admit(file, &mut issues) {
+                issues.clear();
+            }
+            issues
+        };
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(self.config.jobs.max(1))
+            .build()?;
+        pool.install(|| {
+            // Only the slow tiers are kept; each file's issues are handed
+            // over and freed as soon as it is done
+            let slow_tiers = Mutex::new(Vec::new());
+            self.for_each_fast_tier(files, |index, (mut issues, slow)| {
+                let file = &files[index];
+                if self.admit(file, &mut issues) {
+                    on_fast(file, issues);
+                }
+                if !slow.is_empty() {
+                    slow_tiers.lock().unwrap().push((index, slow));
+                }
+            })?;
+
+            let mut slow_tiers = slow_tiers.into_inner().unwrap();
+            slow_tiers.sort_unstable_by_key(|(index, _)| *index);
+            Ok(slow_tiers.into_par_iter().flat_map_iter(run_slow).collect())
+        })
+    }
+
+    /// Run only the fast tier on `file`, returning its issues and the
+    /// cross-file checks it left for the slow tier
+    pub fn check_file_tiered(&self, file: &Path) -> Result<(Vec<Issue>, SlowTier)> {
+        if let Some(reason) = self.skip_before_reading(file)? {
+            return Ok((self.skipped(file, reason), SlowTier::default()));
+        }
+
         let source = fs::read_to_string(file)
             .with_context(|| format!("Failed to read file: {:?}", file))?;
 
+        Ok(self.check_source_tiered(file, source))
+    }
+
+    /// Count the issues in `files` by rule and by file, without building
+    /// them. Each worker folds the files it lints into its own statistics,
+    /// and those are merged once all files are done.
+    pub fn check_files_statistics(&self, files: &[PathBuf]) -> Result<Statistics> {
+        let pool = rayon::ThreadPoolBuilder::new()
+            .num_threads(self.config.jobs.max(1))
+            .build()?;
+        let budget = self.config.max_memory.map(pipeline::ByteBudget::new);
+        let budget = budget.as_ref();
+        pool.install(|| {
+            files
+                .par_iter()
+                .try_fold(Statistics::default, |mut statistics, file| -> Result<Statistics> {
+                    let tally = {
+                        let _permit = budget.map(|b| b.acquire(pipeline::file_size(file)));
+                        self.tally_file(file)?
+                    };
+                    statistics.add_file(file, tally);
+                    Ok(statistics)
+                })
+                .try_reduce(Statistics::default, |a, b| Ok(a.merge(b)))
+        })
+    }
+
+    /// Count the issues [`Linter::check_file`] would report for `file`
+    pub fn tally_file(&self, file: &Path) -> Result<Tally> {
+        if self.skip_before_reading(file)?.is_some() {
+            return Ok(self.skipped_tally());
+        }
+
+        let source = fs::read_to_string(file)
+            .with_context(|| format!("Failed to read file: {:?}", file))?;
+
+        Ok(self.tally_source(file, source))
+    }
+
+    /// Count the issues [`Linter::check_source`] would report, formatting no
+    /// messages
+    pub fn tally_source(&self, file: &Path, source: String) -> Tally {
         if source.is_empty() {
-            return Ok(Vec::new());
+            return Tally::default();
+        }
+        if self.skip_source(&source).is_some() {
+            return self.skipped_tally();
         }
 
+        let (mut context, budget_note) = self.visit_source(file, source, true);
+        let mut tally = std::mem::take(&mut context.tally);
+        let slow = context.take_slow_tier();
+        drop(context);
+
+        if budget_note.is_some() {
+            tally.add(&I0014);
+        }
+        slow.count(&mut tally);
+        tally.retain(|code| self.keeps(code));
+        tally
+    }
+
+    /// Why `file` is skipped, when that is settled without reading it whole
+    fn skip_before_reading(&self, file: &Path) -> Result<Option<String>> {
+        // Settle size and generated-header budgets before reading the whole file
+        if let Some(limit) = self.config.max_file_size {
+            let size = pipeline::file_size(file);
+            if size > limit {
+                return Ok(Some(too_large(size, limit)));
+            }
+        }
+        if self.config.skip_generated {
+            let header = budgets::read_header(file)
+                .with_context(|| format!("Failed to read file: {:?}", file))?;
+            if budgets::looks_generated(&header) {
+                return Ok(Some("generated file".to_string()));
+            }
+        }
+        Ok(None)
+    }
+
+    /// Why a file with this `source` is skipped, if it is
+    fn skip_source(&self, source: &str) -> Option<String> {
+        if let Some(limit) = self.config.max_file_size {
+            if source.len() as u64 > limit {
+                return Some(too_large(source.len() as u64, limit));
+            }
+        }
+        if self.config.skip_generated && budgets::looks_generated(source.as_bytes()) {
+            return Some("generated file".to_string());
+        }
+        None
+    }
+
+    /// Lint source text that has already been read for `file`.
+    pub fn check_source(&self, file: &Path, source: String) -> Vec<Issue> {
+        let (mut issues, slow) = self.check_source_tiered(file, source);
+        issues.extend(self.run_slow_tier(slow));
+        issues
+    }
+
+    /// Run the cross-file checks a fast tier left behind
+    pub fn run_slow_tier(&self, slow: SlowTier) -> Vec<Issue> {
+        if slow.is_empty() {
+            return Vec::new();
+        }
+        self.filter_issues(slow.run())
+    }
+
+    /// The fast tier of [`Linter::check_source`]
+    pub fn check_source_tiered(&self, file: &Path, source: String) -> (Vec<Issue>, SlowTier) {
+        let (issues, slow, _) = self.fast_tier(file, source);
+        (issues, slow)
+    }
+
+    /// [`Linter::check_source_tiered`], also saying whether the result is
+    /// complete: a file timeout or a stopping run cuts the visit short at a
+    /// point that depends on timing, whether or not I0014 is reported
+    fn fast_tier(&self, file: &Path, source: String) -> (Vec<Issue>, SlowTier, bool) {
+        if source.is_empty() {
+            return (Vec::new(), SlowTier::default(), true);
+        }
+        if let Some(reason) = self.skip_source(&source) {
+            return (self.skipped(file, reason), SlowTier::default(), true);
+        }
+
+        let (mut context, budget_note) = self.visit_source(file, source, false);
+
+        // Take the issues and free the source and visitor state right away
+        let mut issues = std::mem::take(&mut context.issues);
+        let slow = context.take_slow_tier();
+        let complete = !context.budget_exhausted;
+        drop(context);
+
+        if let Some(note) = budget_note {
+            issues.push(budget_issue(&I0014, file, note));
+        }
+
+        (self.filter_issues(issues), slow, complete)
+    }
+
+    /// Run the fast-tier rules over `source`, returning the visited context
+    /// and a note when a budget cut the visit short
+    fn visit_source(&self, file: &Path, source: String, count_only: bool) -> (AstContext, Option<String>) {
+        let too_deep = self.config.max_nesting_depth.and_then(|limit| {
+            let depth = budgets::max_bracket_depth(&source);
+            (depth > limit).then(|| format!("nesting depth {} exceeds max-nesting-depth of {}", depth, limit))
+        });
+
+        // Under a memory budget, workers hold permits while they lint. A
+        // worker waiting on its nested bodies could steal another file,
+        // block on the budget and never release its own permit, so large
+        // files are then visited sequentially.
+        let parallel_bodies = self.config.jobs > 1
+            && self.config.max_memory.is_none()
+            && source.len() >= PARALLEL_BODIES_MIN_BYTES;
         let mut context = AstContext::new(file, source);
-        
-        match context.parse_and_check() {
-            Ok(_) => {}
-            Err(_) => {}
+        context.parallel_bodies = parallel_bodies;
+        context.symbols = Some(Arc::clone(&self.symbols));
+        context.stdlib = StdlibTable::for_version(self.config.python_version.as_deref());
+        context.defer_cross_module = true;
+        context.count_only = count_only;
+        context.cancel = self.limit.as_ref().map(IssueLimit::shared_flag);
+        let mut budget_note = None;
+
+        if let Some(reason) = too_deep {
+            // Deep nesting is what overflows the recursive visitor, so only parse
+            let _ = context.check_syntax();
+            budget_note = Some(format!("only syntax checks were run, {}", reason));
+        } else {
+            context.deadline = self
+                .config
+                .file_timeout_ms
+                .map(|ms| Instant::now() + Duration::from_millis(ms));
+
+            match context.parse_and_check() {
+                Ok(_) => {}
+                Err(_) => {}
+            }
+
+            // A visit cut short by a stopping run isn't reported at all
+            if context.budget_exhausted && !self.stopping() {
+                budget_note = Some(format!(
+                    "stopped after the {} ms file-timeout",
+                    self.config.file_timeout_ms.unwrap_or_default()
+                ));
+            }
         }
 
-        let issues = context.issues.clone();
-        
-        let mut filtered_issues = if !self.config.enabled_checkers.is_empty() {
-            issues
-                .into_iter()
-                .filter(|issue| self.config.enabled_checkers.contains(&issue.code))
-                .collect()
-        } else if !self.config.disabled_checkers.is_empty() {
-            issues
-                .into_iter()
-                .filter(|issue| !self.config.disabled_checkers.contains(&issue.code))
-                .collect()
+        (context, budget_note)
+    }
+
+    /// Persist modules parsed for cross-module checks to the cache directory
+    pub fn save_symbol_index(&self) -> Result<()> {
+        self.symbols.save()
+    }
+
+    /// Persist the fast tiers of blobs analyzed by revision runs
+    pub fn save_blob_cache(&self) -> Result<()> {
+        self.blobs.save()
+    }
+
+    fn skipped(&self, file: &Path, reason: String) -> Vec<Issue> {
+        self.filter_issues(vec![budget_issue(&I0013, file, reason)])
+    }
+
+    /// Whether a run under `max_issues` has reached it
+    fn stopping(&self) -> bool {
+        self.limit.as_ref().map_or(false, IssueLimit::reached)
+    }
+
+    /// Drop a finished file's issues outside the changed lines, and count
+    /// the rest against `max_issues`, returning whether the file is reported
+    fn admit(&self, file: &Path, issues: &mut Vec<Issue>) -> bool {
+        if let Some(changed) = &self.changed_lines {
+            changed.retain_changed(file, issues);
+        }
+        self.limit.as_ref().map_or(true, |limit| limit.admit(issues))
+    }
+
+    fn reset_limit(&self) {
+        if let Some(limit) = &self.limit {
+            limit.reset();
+        }
+    }
+
+    fn skipped_tally(&self) -> Tally {
+        let mut tally = Tally::default();
+        tally.add(&I0013);
+        tally.retain(|code| self.keeps(code));
+        tally
+    }
+
+    fn filter_issues(&self, mut issues: Vec<Issue>) -> Vec<Issue> {
+        issues.retain(|issue| self.keeps(&issue.code));
+        issues
+    }
+
+    /// Whether issues with `code` are reported under the enable, disable
+    /// and errors-only settings
+    fn keeps(&self, code: &str) -> bool {
+        let enabled = if !self.config.enabled_checkers.is_empty() {
+            self.config.enabled_checkers.contains(code)
         } else {
-            issues
+            !self.config.disabled_checkers.contains(code)
         };
-        
-        // Apply errors_only filter if enabled
-        if self.config.errors_only {
-            filtered_issues = filtered_issues
-                .into_iter()
-                .filter(|issue| matches!(issue.severity, crate::errors::Severity::Error))
-                .collect();
-        }
 
-        Ok(filtered_issues)
+        // Apply errors_only filter if enabled
+        enabled && (!self.config.errors_only || Severity::of_code(code) == Severity::Error)
     }
 
     fn should_ignore(&self, path: &Path) -> bool {
@@ -121,4 +764,30 @@ impl Linter {
                 || c.as_os_str() == ".pytest_cache"
         })
     }
-}
\ No newline at end of file
+}
+
+/// Why a file over the size limit was skipped
+fn too_large(size: u64, limit: u64) -> String {
+    format!("{} bytes exceeds max-file-size of {}", size, limit)
+}
+
+/// A copy's fast-tier result, moved to `file`
+fn relocated((issues, slow): &(Vec<Issue>, SlowTier), file: &Path) -> (Vec<Issue>, SlowTier) {
+    let issues = issues
+        .iter()
+        .map(|issue| Issue { file: file.to_path_buf(), ..issue.clone() })
+        .collect();
+    (issues, slow.for_file(file))
+}
+
+/// File-level informational issue explaining why checks were skipped
+fn budget_issue(code: &ErrorCode, file: &Path, reason: String) -> Issue {
+    Issue::new(
+        code.code.to_string(),
+        code.format_message(&[reason]),
+        file.to_path_buf(),
+        1,
+        1,
+        code.symbol.to_string(),
+    )
+}
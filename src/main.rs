@@ -1,14 +1,17 @@
 use anyhow::Result;
 use clap::Parser;
 use colored::*;
+use std::path::{Path, PathBuf};
 use std::process;
+use std::sync::Mutex;
 
-use prylint::{Args, config::Config, linter::Linter, reporter::Reporter};
+use prylint::reporter::{stream_report, IssueCounts, Reporter, StreamOrder};
+use prylint::{archive, Args, config::Config, git, linter::Linter};
 
 fn main() -> Result<()> {
     let args = Args::parse();
 
-    if args.paths.is_empty() {
+    if args.paths.is_empty() && args.diff.is_none() && args.rev.is_none() {
         eprintln!("{}: No files or directories specified", "Error".red().bold());
         process::exit(1);
     }
@@ -17,13 +20,68 @@ fn main() -> Result<()> {
     let mut linter = Linter::new(config);
 
     let mut exit_code = 0;
+
+    // Report missing paths up front, then lint everything else as one work set
+    let mut paths: Vec<PathBuf> = Vec::new();
     for path in &args.paths {
-        match linter.check_path(path) {
-            Ok(issues) => {
-                if !issues.is_empty() {
+        // With --rev paths name files in the revision, not on disk
+        if args.rev.is_some() || path.exists() {
+            paths.push(path.clone());
+        } else {
+            eprintln!("{}: Path does not exist: {:?}", "Error".red().bold(), path);
+            exit_code = 2;
+        }
+    }
+
+    // Without any paths we only get here with --diff or --rev, which then
+    // cover the whole repository
+    if !paths.is_empty() || args.paths.is_empty() {
+        let reporter = Reporter::new(args.output_format.as_deref());
+        let result = if let Some(rev) = &args.rev {
+            // The revision's tree names its own files
+            check_revision(&linter, rev, &paths, reporter, args.unordered).map(|counts| counts.failures())
+        } else {
+            // Archives are linted in place, never walked or diffed
+            let (archives, paths): (Vec<PathBuf>, Vec<PathBuf>) = if args.diff.is_some() {
+                (Vec::new(), paths)
+            } else {
+                paths.into_iter().partition(|path| path.is_file() && archive::is_archive(path))
+            };
+            let files = match &args.diff {
+                // Git names the changed files, so the tree is never walked
+                Some(base) => git::diff_scope(base, &paths).map(|scope| {
+                    if args.changed_lines_only {
+                        linter.set_changed_lines(scope.lines);
+                    }
+                    linter.without_ignored(scope.files)
+                }),
+                None => linter.collect_files(&paths),
+            };
+            files.and_then(|files| {
+                if args.statistics && !archives.is_empty() {
+                    Err(anyhow::anyhow!("--statistics can't count issues inside archives"))
+                } else if args.statistics {
+                    check_statistics(&linter, &files, &reporter)
+                } else if args.fast_first && reporter.can_stream() && archives.is_empty() {
+                    check_fast_first(&linter, &files, &reporter).map(|counts| counts.failures())
+                } else {
+                    if args.fast_first {
+                        let reason = if reporter.can_stream() {
+                            "isn't supported with archives"
+                        } else {
+                            "needs an output format written in batches"
+                        };
+                        eprintln!("{}: --fast-first {}; writing the full report", "Warning".yellow().bold(), reason);
+                    }
+                    check_streaming(&linter, files, &archives, reporter, args.unordered).map(|counts| counts.failures())
+                }
+            })
+        };
+
+        match result {
+            Ok(failures) => {
+                if failures > 0 && exit_code == 0 {
                     exit_code = 1;
-                    let reporter = Reporter::new(args.output_format.as_deref());
-                    reporter.report(&issues)?;
                 }
             }
             Err(e) => {
@@ -31,7 +89,66 @@ fn main() -> Result<()> {
                 exit_code = 2;
             }
         }
+
+        // A stale cache only costs speed on the next run
+        if let Err(e) = linter.save_symbol_index().and_then(|_| linter.save_blob_cache()) {
+            eprintln!("{}: {:#}", "Warning".yellow().bold(), e);
+        }
     }
 
     process::exit(exit_code);
-}
\ No newline at end of file
+}
+
+/// Write each file's issues while the rest of the tree is still being
+/// linted. Ordered output lists files by path, then the members of each
+/// archive in archive order.
+fn check_streaming(
+    linter: &Linter,
+    mut files: Vec<PathBuf>,
+    archives: &[PathBuf],
+    reporter: Reporter,
+    unordered: bool,
+) -> Result<IssueCounts> {
+    let order = if unordered {
+        StreamOrder::Unordered
+    } else {
+        files.sort();
+        StreamOrder::Ordered
+    };
+    stream_report(reporter, order, |emit| linter.check_inputs_streaming(&files, archives, emit))
+}
+
+/// Lint a git revision from the object database, writing each file's issues
+/// as it is done. Files are listed in path order unless unordered.
+fn check_revision(linter: &Linter, rev: &str, paths: &[PathBuf], reporter: Reporter, unordered: bool) -> Result<IssueCounts> {
+    let order = if unordered { StreamOrder::Unordered } else { StreamOrder::Ordered };
+    stream_report(reporter, order, |emit| linter.check_revision_streaming(Path::new("."), rev, paths, emit))
+}
+
+/// Count issues by code and by file without building them, then print the
+/// counts. Returns the count of issues that fail the run.
+fn check_statistics(linter: &Linter, files: &[PathBuf], reporter: &Reporter) -> Result<usize> {
+    let statistics = linter.check_files_statistics(files)?;
+    reporter.report_statistics(&statistics)?;
+    Ok(statistics.counts.failures())
+}
+
+/// Print each file's fast-tier issues as soon as it is linted, then the
+/// cross-module issues, then the summary over both
+fn check_fast_first(linter: &Linter, files: &[PathBuf], reporter: &Reporter) -> Result<IssueCounts> {
+    // Also keeps batches from interleaving
+    let counts = Mutex::new(IssueCounts::default());
+    let slow = linter.check_files_tiered(files, |_, issues| {
+        let mut counts = counts.lock().unwrap();
+        if let Err(e) = reporter.report_batch(&issues) {
+            eprintln!("{}: {}", "Error".red().bold(), e);
+        }
+        counts.merge(&IssueCounts::of(&issues));
+    })?;
+    reporter.report_batch(&slow)?;
+
+    let mut counts = counts.into_inner().unwrap();
+    counts.merge(&IssueCounts::of(&slow));
+    reporter.report_summary(&counts)?;
+    Ok(counts)
+}
@@ -0,0 +1,361 @@
+use anyhow::{Context, Result};
+use rayon::prelude::*;
+use std::collections::hash_map::{Entry, HashMap};
+use std::collections::HashSet;
+use std::fs;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+use std::sync::mpsc::sync_channel;
+use std::sync::{Arc, Condvar, Mutex};
+use std::thread;
+
+use crate::errors::Issue;
+
+/// Caps how many source bytes are being read or analyzed at the same time.
+///
+/// Parsed ASTs and visitor state grow with the source size, so bounding the
+/// in-flight source bounds peak memory across all workers.
+pub struct ByteBudget {
+    limit: u64,
+    state: Mutex<BudgetState>,
+    released: Condvar,
+}
+
+#[derive(Default)]
+struct BudgetState {
+    in_flight: u64,
+    peak: u64,
+}
+
+/// Bytes reserved from a `ByteBudget`, returned when dropped
+pub struct BudgetPermit<'a> {
+    budget: &'a ByteBudget,
+    bytes: u64,
+}
+
+impl ByteBudget {
+    pub fn new(limit: u64) -> Self {
+        Self {
+            limit,
+            state: Mutex::new(BudgetState::default()),
+            released: Condvar::new(),
+        }
+    }
+
+    /// Block until `bytes` fit in the budget. A file larger than the whole
+    /// budget is still admitted once nothing else is in flight.
+    pub fn acquire(&self, bytes: u64) -> BudgetPermit<'_> {
+        let mut state = self.state.lock().unwrap();
+        while state.in_flight > 0 && state.in_flight + bytes > self.limit {
+            state = self.released.wait(state).unwrap();
+        }
+        state.in_flight += bytes;
+        state.peak = state.peak.max(state.in_flight);
+        BudgetPermit { budget: self, bytes }
+    }
+
+    /// Highest number of source bytes that were in flight at once
+    pub fn peak(&self) -> u64 {
+        self.state.lock().unwrap().peak
+    }
+}
+
+impl Drop for BudgetPermit<'_> {
+    fn drop(&mut self) {
+        let mut state = self.budget.state.lock().unwrap();
+        state.in_flight -= self.bytes;
+        self.budget.released.notify_all();
+    }
+}
+
+/// Stops a run once it has reported enough issues, for `--max-issues` and
+/// `--fail-fast`.
+///
+/// Finished files report through `admit`. Once the limit is reached the
+/// stop flag is raised: schedulers skip the files they haven't started,
+/// visitors give up on the ones they have, and those are not reported.
+pub struct IssueLimit {
+    limit: usize,
+    reported: AtomicUsize,
+    stop: Arc<AtomicBool>,
+}
+
+impl IssueLimit {
+    pub fn new(limit: usize) -> Self {
+        Self {
+            limit: limit.max(1),
+            reported: AtomicUsize::new(0),
+            stop: Arc::new(AtomicBool::new(false)),
+        }
+    }
+
+    pub fn reached(&self) -> bool {
+        self.stop.load(Ordering::Relaxed)
+    }
+
+    /// The flag raised when the limit is reached, for readers to poll
+    pub fn flag(&self) -> &AtomicBool {
+        &self.stop
+    }
+
+    /// A handle on the flag for visitors to poll
+    pub fn shared_flag(&self) -> Arc<AtomicBool> {
+        Arc::clone(&self.stop)
+    }
+
+    /// Count a finished file's issues against the limit, dropping those
+    /// past it. Returns whether the file is reported at all: once the limit
+    /// is reached no further file is, not even one without issues.
+    pub fn admit(&self, issues: &mut Vec<Issue>) -> bool {
+        if issues.is_empty() {
+            return !self.reached();
+        }
+        let before = self.reported.fetch_add(issues.len(), Ordering::Relaxed);
+        if before >= self.limit {
+            return false;
+        }
+        let left = self.limit - before;
+        if issues.len() >= left {
+            issues.truncate(left);
+            self.stop.store(true, Ordering::Relaxed);
+        }
+        true
+    }
+
+    /// Start counting from zero for another run
+    pub fn reset(&self) {
+        self.reported.store(0, Ordering::Relaxed);
+        self.stop.store(false, Ordering::Relaxed);
+    }
+}
+
+/// Size of `path` on disk, used to reserve budget before reading it
+pub fn file_size(path: &Path) -> u64 {
+    fs::metadata(path).map(|m| m.len()).unwrap_or(0)
+}
+
+/// 64-bit FNV-1a hash of file contents, used to recognize unchanged and
+/// identical sources
+pub fn content_hash(bytes: &[u8]) -> u64 {
+    const OFFSET_BASIS: u64 = 0xcbf2_9ce4_8422_2325;
+    const PRIME: u64 = 0x0000_0100_0000_01b3;
+
+    bytes
+        .iter()
+        .fold(OFFSET_BASIS, |hash, &byte| (hash ^ u64::from(byte)).wrapping_mul(PRIME))
+}
+
+/// Fast-tier results by content, so byte-identical copies of a source, such
+/// as libraries vendored under several services, are analyzed once.
+///
+/// Sources are hashed as the fast tier reads them, and only when another
+/// file has the same size on disk, so a tree without copies costs one
+/// `stat` per file. The first copy read claims its contents. Copies read
+/// while it is analyzed queue behind it and are handed its result when it
+/// is done; copies read later take the stored result. A result is dropped
+/// once every file of its size has been read.
+pub struct IdenticalSources<T> {
+    /// Sizes shared by several files
+    shared: HashSet<u64>,
+    state: Mutex<CopiesState<T>>,
+}
+
+struct CopiesState<T> {
+    /// Files of each shared size not read yet
+    unread: HashMap<u64, usize>,
+    /// Results by size and content hash
+    slots: HashMap<u64, HashMap<u64, Slot<T>>>,
+}
+
+enum Slot<T> {
+    /// Being analyzed, with the indexes of the copies queued behind it
+    Running(Vec<usize>),
+    Done(Arc<T>),
+}
+
+/// What to do with a source just read, from [`IdenticalSources::claim`]
+pub enum Claim<T> {
+    /// No other file can hold the same contents: analyze it
+    Unique,
+    /// The first copy of these contents: analyze it and pass the result to
+    /// [`IdenticalSources::finish`]
+    First(SourceKey),
+    /// A copy of contents still being analyzed, which [`IdenticalSources::finish`]
+    /// hands back with the first copy's result
+    Queued,
+    /// A copy of contents already analyzed
+    Copy(Arc<T>),
+}
+
+/// The size and content hash of a claimed source
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct SourceKey {
+    size: u64,
+    hash: u64,
+}
+
+impl<T> IdenticalSources<T> {
+    pub fn new(files: &[PathBuf]) -> Self {
+        let mut unread: HashMap<u64, usize> = HashMap::new();
+        if files.len() > 1 {
+            let sizes: Vec<Option<u64>> = files
+                .par_iter()
+                .map(|path| fs::metadata(path).ok().map(|m| m.len()))
+                .collect();
+            for size in sizes.into_iter().flatten() {
+                *unread.entry(size).or_default() += 1;
+            }
+            unread.retain(|_, count| *count > 1);
+        }
+        Self {
+            shared: unread.keys().copied().collect(),
+            state: Mutex::new(CopiesState { unread, slots: HashMap::new() }),
+        }
+    }
+
+    /// Look up the source of the file at `index` among the sources read so far
+    pub fn claim(&self, index: usize, source: &[u8]) -> Claim<T> {
+        let size = source.len() as u64;
+        if !self.shared.contains(&size) {
+            return Claim::Unique;
+        }
+        let key = SourceKey { size, hash: content_hash(source) };
+
+        let mut state = self.state.lock().unwrap();
+        let unread = state.unread.get_mut(&size).expect("shared size");
+        *unread = unread.saturating_sub(1);
+        let claim = match state.slots.entry(size).or_default().entry(key.hash) {
+            Entry::Vacant(slot) => {
+                slot.insert(Slot::Running(Vec::new()));
+                Claim::First(key)
+            }
+            Entry::Occupied(mut slot) => match slot.get_mut() {
+                Slot::Running(queued) => {
+                    queued.push(index);
+                    Claim::Queued
+                }
+                Slot::Done(result) => Claim::Copy(Arc::clone(result)),
+            },
+        };
+        state.prune(size);
+        claim
+    }
+
+    /// Store the result of the first copy of `key`, returning the indexes
+    /// of the copies queued behind it
+    pub fn finish(&self, key: SourceKey, result: Arc<T>) -> Vec<usize> {
+        let mut state = self.state.lock().unwrap();
+        let slot = state
+            .slots
+            .get_mut(&key.size)
+            .and_then(|slots| slots.get_mut(&key.hash))
+            .expect("claimed source");
+        let queued = match std::mem::replace(slot, Slot::Done(result)) {
+            Slot::Running(queued) => queued,
+            Slot::Done(_) => Vec::new(),
+        };
+        state.prune(key.size);
+        queued
+    }
+}
+
+impl<T> CopiesState<T> {
+    /// Drop the results of `size` once no file of that size is left to read
+    fn prune(&mut self, size: u64) {
+        if self.unread.get(&size).map_or(false, |unread| *unread > 0) {
+            return;
+        }
+        if let Some(slots) = self.slots.get_mut(&size) {
+            slots.retain(|_, slot| matches!(slot, Slot::Running(_)));
+            if slots.is_empty() {
+                self.slots.remove(&size);
+            }
+        }
+    }
+}
+
+/// What the prefetch stage hands over for a file
+pub enum Fetched {
+    Source(String),
+    /// Skipped before reading, for this reason
+    Skipped(String),
+}
+
+/// A file the prefetch stage is done with
+struct Prefetched<'a> {
+    index: usize,
+    fetched: Result<Fetched>,
+    _permit: Option<BudgetPermit<'a>>,
+}
+
+/// Read `files` on `readers` dedicated I/O threads and hand each source,
+/// with the file's index in `files`, to `analyze` on the current rayon pool,
+/// so CPU workers never block on reads.
+///
+/// Readers first ask `skip` whether a file can be settled without reading
+/// it; such files are handed over as [`Fetched::Skipped`] and take nothing
+/// from the budget. At most `queue_depth` read-but-unanalyzed files are
+/// buffered, and when a `budget` is given a file's bytes stay reserved until
+/// its analysis is done. Readers stop early once `stop` is raised. Results
+/// are returned in the same order as `files`, for the files that were read.
+pub fn run_prefetched<T, S, F>(
+    files: &[PathBuf],
+    readers: usize,
+    queue_depth: usize,
+    budget: Option<&ByteBudget>,
+    stop: Option<&AtomicBool>,
+    skip: S,
+    analyze: F,
+) -> Result<Vec<T>>
+where
+    T: Send,
+    S: Fn(&Path) -> Result<Option<String>> + Sync,
+    F: Fn(usize, &Path, Fetched) -> T + Sync,
+{
+    let next = AtomicUsize::new(0);
+    let (sender, receiver) = sync_channel(queue_depth.max(1));
+
+    let mut results: Vec<(usize, Result<T>)> = thread::scope(|scope| {
+        for _ in 0..readers.max(1) {
+            let sender = sender.clone();
+            let next = &next;
+            let skip = &skip;
+            scope.spawn(move || loop {
+                if stop.map_or(false, |stop| stop.load(Ordering::Relaxed)) {
+                    break;
+                }
+                let index = next.fetch_add(1, Ordering::Relaxed);
+                let Some(path) = files.get(index) else { break };
+                let (fetched, permit) = match skip(path) {
+                    Ok(Some(reason)) => (Ok(Fetched::Skipped(reason)), None),
+                    Ok(None) => {
+                        let permit = budget.map(|b| b.acquire(file_size(path)));
+                        let source = fs::read_to_string(path)
+                            .with_context(|| format!("Failed to read file: {:?}", path));
+                        (source.map(Fetched::Source), permit)
+                    }
+                    Err(e) => (Err(e), None),
+                };
+                if sender.send(Prefetched { index, fetched, _permit: permit }).is_err() {
+                    break;
+                }
+            });
+        }
+        // Only the readers hold senders now, so the queue closes when they finish
+        drop(sender);
+
+        receiver
+            .into_iter()
+            .par_bridge()
+            .map(|file| {
+                let path = &files[file.index];
+                let Prefetched { index, fetched, _permit } = file;
+                let result = fetched.map(|fetched| analyze(index, path, fetched));
+                (index, result)
+            })
+            .collect()
+    });
+
+    results.sort_unstable_by_key(|(index, _)| *index);
+    results.into_iter().map(|(_, result)| result).collect()
+}
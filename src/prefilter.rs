@@ -0,0 +1,75 @@
+//! A byte-level prescan of the source, run before parsing, that records which
+//! rule families a file can possibly trigger.
+
+use aho_corasick::AhoCorasick;
+use std::sync::OnceLock;
+
+/// Trigger tokens, in the order of the flags they set
+const TOKENS: &[&str] = &[
+    "global",
+    "nonlocal",
+    "yield",
+    "LOG",
+    "logger",
+    "logging",
+    "NotImplemented",
+];
+
+/// Rule families whose trigger tokens appear somewhere in the source. A token
+/// inside a string or a longer identifier still counts, so a family is only
+/// ever switched off when it cannot fire.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct RuleFamilies {
+    /// E0115, E0118: `global` statements
+    pub globals: bool,
+    /// E0115, E0117: `nonlocal` statements
+    pub nonlocals: bool,
+    /// E0100, E0105: generators
+    pub yields: bool,
+    /// E1205: calls on `LOG`, `logger` or `logging`
+    pub logging: bool,
+    /// E0711: `NotImplemented`
+    pub not_implemented: bool,
+}
+
+impl Default for RuleFamilies {
+    /// Every family enabled, for sources that were never scanned
+    fn default() -> Self {
+        Self {
+            globals: true,
+            nonlocals: true,
+            yields: true,
+            logging: true,
+            not_implemented: true,
+        }
+    }
+}
+
+impl RuleFamilies {
+    pub fn scan(source: &str) -> Self {
+        static MATCHER: OnceLock<AhoCorasick> = OnceLock::new();
+        let matcher = MATCHER
+            .get_or_init(|| AhoCorasick::new(TOKENS).expect("trigger tokens form a valid automaton"));
+
+        let mut found = [false; TOKENS.len()];
+        let mut remaining = TOKENS.len();
+        for token in matcher.find_overlapping_iter(source) {
+            let seen = &mut found[token.pattern().as_usize()];
+            if !*seen {
+                *seen = true;
+                remaining -= 1;
+                if remaining == 0 {
+                    break;
+                }
+            }
+        }
+
+        Self {
+            globals: found[0],
+            nonlocals: found[1],
+            yields: found[2],
+            logging: found[3] || found[4] || found[5],
+            not_implemented: found[6],
+        }
+    }
+}
@@ -1,24 +1,45 @@
 use anyhow::Result;
-use colored::*;
 use serde_json;
+use serde::Serialize;
 use std::collections::BTreeMap;
-use std::path::Path;
+use std::fmt;
+use std::io::{self, BufWriter, IsTerminal, Write};
+use std::path::{Path, PathBuf};
+use std::sync::mpsc::sync_channel;
+use std::thread;
 
+use crate::binary_report::BinaryEncoder;
 use crate::config::OutputFormat;
 use crate::errors::{Issue, Severity};
+use crate::statistics::Statistics;
+
+/// Output buffer size; large enough that writing a report takes few syscalls
+const OUTPUT_BUFFER_BYTES: usize = 64 * 1024;
 
 pub struct Reporter {
     format: OutputFormat,
+    /// Style text output with ANSI escapes
+    color: bool,
 }
 
 impl Reporter {
+    /// A reporter for stdout, which only styles its output when stdout is a
+    /// terminal and the environment doesn't disable colors
     pub fn new(format: Option<&str>) -> Self {
         let format = match format {
             Some("json") => OutputFormat::Json,
             Some("parseable") => OutputFormat::Parseable,
+            Some("ndjson") => OutputFormat::Ndjson,
+            Some("binary") => OutputFormat::Binary,
             _ => OutputFormat::Text,
         };
-        Self { format }
+        let color = io::stdout().is_terminal() && colored::control::SHOULD_COLORIZE.should_colorize();
+        Self { format, color }
+    }
+
+    pub fn with_color(mut self, color: bool) -> Self {
+        self.color = color;
+        self
     }
 
     pub fn report(&self, issues: &[Issue]) -> Result<()> {
@@ -26,107 +47,415 @@ impl Reporter {
             return Ok(());
         }
 
+        let mut out = stdout_writer();
+        self.write_issues(&mut out, issues)?;
+        if matches!(self.format, OutputFormat::Text) {
+            self.write_summary(&mut out, &IssueCounts::of(issues))?;
+        }
+        out.flush()?;
+        Ok(())
+    }
+
+    /// Whether issues can be written in batches as they are found, rather
+    /// than all at once as `report` does
+    pub fn can_stream(&self) -> bool {
+        !matches!(self.format, OutputFormat::Json | OutputFormat::Binary)
+    }
+
+    /// Write one batch of issues without the closing summary
+    pub fn report_batch(&self, issues: &[Issue]) -> Result<()> {
+        let mut out = stdout_writer();
+        self.write_issues(&mut out, issues)?;
+        out.flush()?;
+        Ok(())
+    }
+
+    /// Close a streamed text report with the summary of all its batches
+    pub fn report_summary(&self, counts: &IssueCounts) -> Result<()> {
+        if matches!(self.format, OutputFormat::Text) && counts.total() > 0 {
+            let mut out = stdout_writer();
+            self.write_summary(&mut out, counts)?;
+            out.flush()?;
+        }
+        Ok(())
+    }
+
+    /// Write `issues` in this reporter's format, without a summary
+    pub fn write_issues<W: Write>(&self, out: &mut W, issues: &[Issue]) -> io::Result<()> {
         match self.format {
-            OutputFormat::Text => self.report_text(issues),
-            OutputFormat::Json => self.report_json(issues),
-            OutputFormat::Parseable => self.report_parseable(issues),
+            OutputFormat::Text => self.write_text(out, issues),
+            OutputFormat::Json => {
+                serde_json::to_writer_pretty(&mut *out, issues)?;
+                out.write_all(b"\n")
+            }
+            OutputFormat::Parseable => write_parseable(out, issues),
+            OutputFormat::Ndjson => {
+                for issue in issues {
+                    write_record(out, &Record::Issue(issue))?;
+                }
+                Ok(())
+            }
+            OutputFormat::Binary => {
+                let mut encoder = BinaryEncoder::new();
+                encoder.write_issues(out, issues)?;
+                encoder.finish(out)
+            }
         }
     }
 
-    fn report_text(&self, issues: &[Issue]) -> Result<()> {
-        let mut issues_by_file: BTreeMap<&Path, Vec<&Issue>> = BTreeMap::new();
-        
+    fn write_text<W: Write>(&self, out: &mut W, issues: &[Issue]) -> io::Result<()> {
+        // Files arrive one at a time from the streaming pipeline, already in
+        // order, so only sort when a batch isn't
+        let sorted = issues
+            .windows(2)
+            .all(|pair| text_order(&pair[0]) <= text_order(&pair[1]));
+        if sorted {
+            return self.write_text_lines(out, issues.iter());
+        }
+        let mut by_position: Vec<&Issue> = issues.iter().collect();
+        by_position.sort_by(|a, b| text_order(a).cmp(&text_order(b)));
+        self.write_text_lines(out, by_position.into_iter())
+    }
+
+    fn write_text_lines<'a, W: Write>(&self, out: &mut W, issues: impl Iterator<Item = &'a Issue>) -> io::Result<()> {
+        let mut current_file = None;
         for issue in issues {
-            issues_by_file
-                .entry(&issue.file)
-                .or_insert_with(Vec::new)
-                .push(issue);
-        }
-
-        for (file, file_issues) in issues_by_file {
-            println!("\n{}", format!("************* Module {}", file.display()).bold());
-            
-            let mut sorted_issues = file_issues;
-            sorted_issues.sort_by_key(|i| (i.line, i.column));
-            
-            for issue in sorted_issues {
-                let severity_str = match issue.severity {
-                    Severity::Error => format!("{}", issue.code).red().bold(),
-                    Severity::Warning => format!("{}", issue.code).yellow().bold(),
-                    Severity::Convention => format!("{}", issue.code).blue().bold(),
-                    Severity::Refactor => format!("{}", issue.code).magenta().bold(),
-                    Severity::Information => format!("{}", issue.code).cyan().bold(),
-                };
-
-                println!(
-                    "{}:{}:{}: {}: {} ({})",
-                    file.display(),
-                    issue.line,
-                    issue.column,
-                    severity_str,
-                    issue.message,
-                    issue.symbol.dimmed()
-                );
+            if current_file != Some(&issue.file) {
+                current_file = Some(&issue.file);
+                out.write_all(b"\n")?;
+                styled(out, self.color, BOLD, format_args!("************* Module {}", issue.file.display()))?;
+                out.write_all(b"\n")?;
             }
+
+            write!(out, "{}:{}:{}: ", issue.file.display(), issue.line, issue.column)?;
+            styled(out, self.color, severity_style(&issue.severity), &issue.code)?;
+            write!(out, ": {} (", issue.message)?;
+            styled(out, self.color, DIMMED, &issue.symbol)?;
+            out.write_all(b")\n")?;
         }
+        Ok(())
+    }
 
-        self.print_summary(issues);
+    /// Write the per-severity summary that closes a text report
+    pub fn write_summary<W: Write>(&self, out: &mut W, counts: &IssueCounts) -> io::Result<()> {
+        out.write_all(b"\n")?;
+        styled(out, self.color, BOLD_UNDERLINE, "Summary:")?;
+        out.write_all(b"\n")?;
+
+        let lines = [
+            (counts.errors, Severity::Error, "error(s)"),
+            (counts.warnings, Severity::Warning, "warning(s)"),
+            (counts.conventions, Severity::Convention, "convention(s)"),
+            (counts.refactors, Severity::Refactor, "refactor(s)"),
+            (counts.infos, Severity::Information, "info(s)"),
+        ];
+        for (count, severity, label) in lines {
+            if count > 0 {
+                out.write_all(b"  ")?;
+                styled(out, self.color, severity_style(&severity), count)?;
+                writeln!(out, " {}", label)?;
+            }
+        }
         Ok(())
     }
 
-    fn report_json(&self, issues: &[Issue]) -> Result<()> {
-        let json_output = serde_json::to_string_pretty(issues)?;
-        println!("{}", json_output);
+    /// Print the counts of a `--statistics` run
+    pub fn report_statistics(&self, statistics: &Statistics) -> Result<()> {
+        let mut out = stdout_writer();
+        self.write_statistics(&mut out, statistics)?;
+        out.flush()?;
         Ok(())
     }
 
-    fn report_parseable(&self, issues: &[Issue]) -> Result<()> {
-        for issue in issues {
-            println!(
-                "{}:{}:{}: [{}] {}",
-                issue.file.display(),
-                issue.line,
-                issue.column,
-                issue.code,
-                issue.message
-            );
+    /// Write statistics as JSON for the `json` format and as text otherwise
+    pub fn write_statistics<W: Write>(&self, out: &mut W, statistics: &Statistics) -> io::Result<()> {
+        if matches!(self.format, OutputFormat::Json) {
+            serde_json::to_writer_pretty(&mut *out, statistics)?;
+            return out.write_all(b"\n");
+        }
+
+        styled(out, self.color, BOLD_UNDERLINE, "Issues by code:")?;
+        out.write_all(b"\n")?;
+        for (code, rule) in &statistics.by_code {
+            out.write_all(b"  ")?;
+            styled(out, self.color, severity_style(&Severity::of_code(code)), code)?;
+            writeln!(out, " ({}): {}", rule.symbol, rule.count)?;
+        }
+
+        out.write_all(b"\n")?;
+        styled(out, self.color, BOLD_UNDERLINE, "Issues by file:")?;
+        out.write_all(b"\n")?;
+        for (file, count) in &statistics.by_file {
+            writeln!(out, "  {}: {}", file.display(), count)?;
+        }
+
+        writeln!(out, "\n{} file(s) linted", statistics.files)?;
+        if statistics.total() > 0 {
+            self.write_summary(out, &statistics.counts)?;
         }
         Ok(())
     }
+}
+
+/// A line of `ndjson` output
+#[derive(Serialize)]
+#[serde(tag = "type", rename_all = "lowercase")]
+enum Record<'a> {
+    Issue(&'a Issue),
+    /// Written once a file is done, also for files without issues
+    File {
+        file: &'a Path,
+        issues: usize,
+        #[serde(flatten)]
+        counts: IssueCounts,
+    },
+}
+
+fn write_record<W: Write>(out: &mut W, record: &Record) -> io::Result<()> {
+    serde_json::to_writer(&mut *out, record)?;
+    out.write_all(b"\n")
+}
+
+fn write_parseable<W: Write>(out: &mut W, issues: &[Issue]) -> io::Result<()> {
+    for issue in issues {
+        writeln!(
+            out,
+            "{}:{}:{}: [{}] {}",
+            issue.file.display(),
+            issue.line,
+            issue.column,
+            issue.code,
+            issue.message
+        )?;
+    }
+    Ok(())
+}
+
+/// Stdout behind one lock and a large buffer for a whole report
+fn stdout_writer() -> BufWriter<io::StdoutLock<'static>> {
+    BufWriter::with_capacity(OUTPUT_BUFFER_BYTES, io::stdout().lock())
+}
+
+fn text_order(issue: &Issue) -> (&Path, usize, usize) {
+    (&issue.file, issue.line, issue.column)
+}
+
+const BOLD: &str = "1";
+const BOLD_UNDERLINE: &str = "1;4";
+const DIMMED: &str = "2";
+
+fn severity_style(severity: &Severity) -> &'static str {
+    match severity {
+        Severity::Error => "1;31",
+        Severity::Warning => "1;33",
+        Severity::Convention => "1;34",
+        Severity::Refactor => "1;35",
+        Severity::Information => "1;36",
+    }
+}
 
-    fn print_summary(&self, issues: &[Issue]) {
-        let mut error_count = 0;
-        let mut warning_count = 0;
-        let mut convention_count = 0;
-        let mut refactor_count = 0;
-        let mut info_count = 0;
+/// Write `text`, wrapped in the ANSI escape for `style` when `color` is set
+fn styled<W: Write>(out: &mut W, color: bool, style: &str, text: impl fmt::Display) -> io::Result<()> {
+    if color {
+        write!(out, "\x1b[{}m{}\x1b[0m", style, text)
+    } else {
+        write!(out, "{}", text)
+    }
+}
 
+/// Number of issues reported per severity
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Serialize)]
+pub struct IssueCounts {
+    pub errors: usize,
+    pub warnings: usize,
+    pub conventions: usize,
+    pub refactors: usize,
+    pub infos: usize,
+}
+
+impl IssueCounts {
+    pub fn of(issues: &[Issue]) -> Self {
+        let mut counts = Self::default();
         for issue in issues {
-            match issue.severity {
-                Severity::Error => error_count += 1,
-                Severity::Warning => warning_count += 1,
-                Severity::Convention => convention_count += 1,
-                Severity::Refactor => refactor_count += 1,
-                Severity::Information => info_count += 1,
+            counts.add(issue);
+        }
+        counts
+    }
+
+    pub fn add(&mut self, issue: &Issue) {
+        self.add_n(&issue.severity, 1);
+    }
+
+    pub fn add_n(&mut self, severity: &Severity, count: usize) {
+        match severity {
+            Severity::Error => self.errors += count,
+            Severity::Warning => self.warnings += count,
+            Severity::Convention => self.conventions += count,
+            Severity::Refactor => self.refactors += count,
+            Severity::Information => self.infos += count,
+        }
+    }
+
+    pub fn merge(&mut self, other: &IssueCounts) {
+        self.errors += other.errors;
+        self.warnings += other.warnings;
+        self.conventions += other.conventions;
+        self.refactors += other.refactors;
+        self.infos += other.infos;
+    }
+
+    pub fn total(&self) -> usize {
+        self.errors + self.warnings + self.conventions + self.refactors + self.infos
+    }
+
+    /// Issues that fail a run: all but the informational ones, which only
+    /// say why a file was skipped or cut short
+    pub fn failures(&self) -> usize {
+        self.total() - self.infos
+    }
+}
+
+/// In which order a streaming report writes files
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum StreamOrder {
+    /// As soon as each file finishes
+    Unordered,
+    /// In the order the files were given, holding back files that finish
+    /// before an earlier one
+    Ordered,
+}
+
+/// Files whose results may wait in the channel for the writer thread
+const STREAM_QUEUE_DEPTH: usize = 256;
+
+/// Writes each file's issues as they arrive and keeps only the counts for
+/// the summary, so a file's issues are freed once written
+pub struct StreamingReporter<W: Write> {
+    reporter: Reporter,
+    order: StreamOrder,
+    out: W,
+    /// Flush after every file, for someone watching the output live
+    flush_each_file: bool,
+    next: usize,
+    pending: BTreeMap<usize, (PathBuf, Vec<Issue>)>,
+    counts: IssueCounts,
+    binary: BinaryEncoder,
+}
+
+impl<W: Write> StreamingReporter<W> {
+    pub fn new(reporter: Reporter, order: StreamOrder, out: W) -> Self {
+        Self {
+            flush_each_file: false,
+            reporter,
+            order,
+            out,
+            next: 0,
+            pending: BTreeMap::new(),
+            counts: IssueCounts::default(),
+            binary: BinaryEncoder::new(),
+        }
+    }
+
+    /// Accept the issues of `file`, at position `index` of the linted files
+    pub fn file_done(&mut self, index: usize, file: PathBuf, issues: Vec<Issue>) -> Result<()> {
+        match self.order {
+            StreamOrder::Unordered => self.write(&file, issues),
+            StreamOrder::Ordered => {
+                self.pending.insert(index, (file, issues));
+                while let Some((file, issues)) = self.pending.remove(&self.next) {
+                    self.next += 1;
+                    self.write(&file, issues)?;
+                }
+                Ok(())
             }
         }
+    }
+
+    fn write(&mut self, file: &Path, issues: Vec<Issue>) -> Result<()> {
+        if let OutputFormat::Ndjson = self.reporter.format {
+            // Every file gets its summary record, and consumers see each
+            // file as soon as it is done
+            let counts = IssueCounts::of(&issues);
+            self.reporter.write_issues(&mut self.out, &issues)?;
+            write_record(&mut self.out, &Record::File { file, issues: counts.total(), counts })?;
+            self.out.flush()?;
+            self.counts.merge(&counts);
+            return Ok(());
+        }
 
-        println!("\n{}", "Summary:".bold().underline());
-        
-        if error_count > 0 {
-            println!("  {} error(s)", error_count.to_string().red().bold());
+        if issues.is_empty() {
+            return Ok(());
+        }
+        let first = self.counts.total() == 0;
+        for issue in &issues {
+            self.counts.add(issue);
         }
-        if warning_count > 0 {
-            println!("  {} warning(s)", warning_count.to_string().yellow().bold());
+
+        match self.reporter.format {
+            OutputFormat::Json => {
+                // Items of one array spread over the whole run
+                for (i, issue) in issues.iter().enumerate() {
+                    let separator: &[u8] = if first && i == 0 { b"[\n" } else { b",\n" };
+                    self.out.write_all(separator)?;
+                    serde_json::to_writer_pretty(&mut self.out, issue)?;
+                }
+            }
+            OutputFormat::Binary => self.binary.write_issues(&mut self.out, &issues)?,
+            _ => self.reporter.write_issues(&mut self.out, &issues)?,
         }
-        if convention_count > 0 {
-            println!("  {} convention(s)", convention_count.to_string().blue().bold());
+        if self.flush_each_file {
+            self.out.flush()?;
         }
-        if refactor_count > 0 {
-            println!("  {} refactor(s)", refactor_count.to_string().magenta().bold());
+        Ok(())
+    }
+
+    /// Write whatever is still held back and close the report
+    pub fn finish(mut self) -> Result<IssueCounts> {
+        for (file, issues) in std::mem::take(&mut self.pending).into_values() {
+            self.write(&file, issues)?;
         }
-        if info_count > 0 {
-            println!("  {} info(s)", info_count.to_string().cyan().bold());
+        if let OutputFormat::Binary = self.reporter.format {
+            self.binary.finish(&mut self.out)?;
+        } else if self.counts.total() > 0 {
+            match self.reporter.format {
+                OutputFormat::Json => self.out.write_all(b"\n]\n")?,
+                OutputFormat::Text => self.reporter.write_summary(&mut self.out, &self.counts)?,
+                OutputFormat::Parseable | OutputFormat::Ndjson | OutputFormat::Binary => {}
+            }
         }
+        self.out.flush()?;
+        Ok(self.counts)
     }
-}
\ No newline at end of file
+}
+
+/// Run `produce` with a callback that feeds a [`StreamingReporter`] on a
+/// dedicated writer thread, so workers never wait on output beyond the
+/// channel's capacity
+pub fn stream_report<F>(reporter: Reporter, order: StreamOrder, produce: F) -> Result<IssueCounts>
+where
+    F: FnOnce(&(dyn Fn(usize, &Path, Vec<Issue>) + Sync)) -> Result<()>,
+{
+    let (sender, receiver) = sync_channel::<(usize, PathBuf, Vec<Issue>)>(STREAM_QUEUE_DEPTH);
+    thread::scope(|scope| {
+        let writer = scope.spawn(move || {
+            let mut stream = StreamingReporter::new(reporter, order, stdout_writer());
+            stream.flush_each_file = io::stdout().is_terminal();
+            for (index, file, issues) in receiver {
+                stream.file_done(index, file, issues)?;
+            }
+            stream.finish()
+        });
+
+        // A writer that failed has dropped the receiver; its error is
+        // reported below
+        let emit = |index: usize, file: &Path, issues: Vec<Issue>| {
+            let _ = sender.send((index, file.to_path_buf(), issues));
+        };
+        let produced = produce(&emit);
+        drop(sender);
+
+        let counts = writer.join().expect("report writer panicked")?;
+        produced?;
+        Ok(counts)
+    })
+}
@@ -0,0 +1,446 @@
+//! Scope tree and name bindings for a module, built in one pass before the
+//! checks run so that every name is resolved once per reference.
+
+use crate::prefilter::RuleFamilies;
+use crate::walk;
+use rustpython_ast::{self as ast};
+use std::collections::HashMap;
+use std::ops::BitOr;
+
+pub type ScopeId = usize;
+
+/// The module scope is always the first scope
+pub const MODULE_SCOPE: ScopeId = 0;
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum ScopeKind {
+    Module,
+    Class,
+    Function,
+}
+
+/// The ways a name is bound in one scope; a name can be bound several ways
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct BindingFlags(u8);
+
+impl BindingFlags {
+    pub const ARGUMENT: Self = Self(1);
+    pub const IMPORT: Self = Self(1 << 1);
+    pub const GLOBAL: Self = Self(1 << 2);
+    pub const NONLOCAL: Self = Self(1 << 3);
+    pub const DEFINITION: Self = Self(1 << 4);
+    pub const ASSIGNMENT: Self = Self(1 << 5);
+
+    pub fn contains(self, other: Self) -> bool {
+        self.0 & other.0 == other.0
+    }
+
+    pub fn intersects(self, other: Self) -> bool {
+        self.0 & other.0 != 0
+    }
+}
+
+impl BitOr for BindingFlags {
+    type Output = Self;
+
+    fn bitor(self, other: Self) -> Self {
+        Self(self.0 | other.0)
+    }
+}
+
+#[derive(Debug, Clone)]
+pub struct Binding {
+    pub flags: BindingFlags,
+    /// Source offset of the first statement binding the name
+    pub offset: usize,
+}
+
+impl Binding {
+    /// Whether the name is usable anywhere in `scope` regardless of control
+    /// flow: arguments, imports, `global`/`nonlocal` declarations and
+    /// module-level functions and classes
+    pub fn is_declared(&self, scope: ScopeId) -> bool {
+        self.flags.intersects(
+            BindingFlags::ARGUMENT
+                | BindingFlags::IMPORT
+                | BindingFlags::GLOBAL
+                | BindingFlags::NONLOCAL,
+        ) || (scope == MODULE_SCOPE && self.flags.contains(BindingFlags::DEFINITION))
+    }
+}
+
+/// What a function body contains, gathered while the model is built so that
+/// rules never rescan the body. Nested functions keep their own facts.
+#[derive(Debug, Clone, Copy, Default)]
+pub struct FunctionFacts {
+    pub has_yield: bool,
+    pub has_return_value: bool,
+    pub has_global: bool,
+}
+
+#[derive(Debug, Clone)]
+pub struct Scope {
+    pub kind: ScopeKind,
+    pub parent: Option<ScopeId>,
+    pub bindings: HashMap<String, Binding>,
+    pub facts: FunctionFacts,
+}
+
+#[derive(Debug, Clone)]
+pub struct SemanticModel {
+    pub scopes: Vec<Scope>,
+    /// Function and class scopes keyed by the offset of their definition
+    scope_by_offset: HashMap<usize, ScopeId>,
+    /// Whether function facts need an expression walk; only `yield` is
+    /// found inside expressions
+    scan_expressions: bool,
+}
+
+impl Default for SemanticModel {
+    fn default() -> Self {
+        Self {
+            scopes: vec![Scope {
+                kind: ScopeKind::Module,
+                parent: None,
+                bindings: HashMap::new(),
+                facts: FunctionFacts::default(),
+            }],
+            scope_by_offset: HashMap::new(),
+            scan_expressions: true,
+        }
+    }
+}
+
+impl SemanticModel {
+    pub fn build(module: &ast::Mod, families: &RuleFamilies) -> Self {
+        let mut model = Self {
+            scan_expressions: families.yields,
+            ..Self::default()
+        };
+        if let ast::Mod::Module(ast::ModModule { body, .. }) = module {
+            model.collect_block(MODULE_SCOPE, body);
+        }
+        model
+    }
+
+    /// The scope opened by the function or class definition starting at `offset`
+    pub fn scope_at(&self, offset: usize) -> Option<ScopeId> {
+        self.scope_by_offset.get(&offset).copied()
+    }
+
+    /// Find the binding `name` refers to from `scope`. Like Python, lookups
+    /// from nested scopes skip the bodies of enclosing classes.
+    pub fn resolve(&self, scope: ScopeId, name: &str) -> Option<(ScopeId, &Binding)> {
+        let mut current = Some(scope);
+        while let Some(id) = current {
+            let candidate = &self.scopes[id];
+            if id == scope || candidate.kind != ScopeKind::Class {
+                if let Some(binding) = candidate.bindings.get(name) {
+                    return Some((id, binding));
+                }
+            }
+            current = candidate.parent;
+        }
+        None
+    }
+
+    /// Whether an enclosing function scope binds `name`, which a `nonlocal`
+    /// declaration in `scope` requires
+    pub fn has_enclosing_function_binding(&self, scope: ScopeId, name: &str) -> bool {
+        let mut current = self.scopes[scope].parent;
+        while let Some(id) = current {
+            let candidate = &self.scopes[id];
+            if candidate.kind == ScopeKind::Function {
+                let bound = candidate
+                    .bindings
+                    .get(name)
+                    .map_or(false, |binding| !binding.flags.contains(BindingFlags::GLOBAL));
+                if bound {
+                    return true;
+                }
+            }
+            current = candidate.parent;
+        }
+        false
+    }
+
+    /// Names declared both `global` and `nonlocal` in `scope`, sorted
+    pub fn global_and_nonlocal(&self, scope: ScopeId) -> Vec<String> {
+        let mut names: Vec<String> = self.scopes[scope]
+            .bindings
+            .iter()
+            .filter(|(_, binding)| {
+                binding.flags.contains(BindingFlags::GLOBAL | BindingFlags::NONLOCAL)
+            })
+            .map(|(name, _)| name.clone())
+            .collect();
+        names.sort_unstable();
+        names
+    }
+
+    fn push_scope(&mut self, kind: ScopeKind, parent: ScopeId, offset: usize) -> ScopeId {
+        let id = self.scopes.len();
+        self.scopes.push(Scope {
+            kind,
+            parent: Some(parent),
+            bindings: HashMap::new(),
+            facts: FunctionFacts::default(),
+        });
+        self.scope_by_offset.insert(offset, id);
+        id
+    }
+
+    fn bind(&mut self, scope: ScopeId, name: &str, flags: BindingFlags, offset: usize) {
+        self.scopes[scope]
+            .bindings
+            .entry(name.to_string())
+            .and_modify(|binding| binding.flags = binding.flags | flags)
+            .or_insert(Binding { flags, offset });
+    }
+
+    fn bind_target(&mut self, scope: ScopeId, target: &ast::Expr, offset: usize) {
+        match target {
+            ast::Expr::Name(name) => {
+                self.bind(scope, name.id.as_str(), BindingFlags::ASSIGNMENT, offset)
+            }
+            ast::Expr::Tuple(tuple) => {
+                for elt in &tuple.elts {
+                    self.bind_target(scope, elt, offset);
+                }
+            }
+            ast::Expr::List(list) => {
+                for elt in &list.elts {
+                    self.bind_target(scope, elt, offset);
+                }
+            }
+            ast::Expr::Starred(starred) => self.bind_target(scope, &starred.value, offset),
+            _ => {}
+        }
+    }
+
+    fn collect_block(&mut self, scope: ScopeId, body: &[ast::Stmt]) {
+        for stmt in body {
+            self.collect_stmt(scope, stmt);
+        }
+    }
+
+    /// Record what `stmt` contributes to the facts of the function `scope`
+    fn collect_facts(&mut self, scope: ScopeId, stmt: &ast::Stmt) {
+        let facts = &mut self.scopes[scope].facts;
+        match stmt {
+            ast::Stmt::Return(ret) => facts.has_return_value |= ret.value.is_some(),
+            ast::Stmt::Global(_) => facts.has_global = true,
+            _ => {}
+        }
+        if !self.scan_expressions {
+            return;
+        }
+
+        let mut stack = Vec::new();
+        walk::push_stmt_exprs(stmt, &mut stack);
+        while let Some(expr) = stack.pop() {
+            if matches!(expr, ast::Expr::Yield(_) | ast::Expr::YieldFrom(_)) {
+                facts.has_yield = true;
+            }
+            walk::push_children(expr, &mut stack);
+        }
+    }
+
+    fn collect_stmt(&mut self, scope: ScopeId, stmt: &ast::Stmt) {
+        use ast::Stmt::*;
+
+        if self.scopes[scope].kind == ScopeKind::Function {
+            self.collect_facts(scope, stmt);
+        }
+
+        match stmt {
+            FunctionDef(func) => {
+                let offset = func.range.start().to_usize();
+                self.collect_function(scope, func.name.as_str(), &func.args, &func.body, offset);
+            }
+            AsyncFunctionDef(func) => {
+                let offset = func.range.start().to_usize();
+                self.collect_function(scope, func.name.as_str(), &func.args, &func.body, offset);
+            }
+            ClassDef(cls) => {
+                let offset = cls.range.start().to_usize();
+                self.bind(scope, cls.name.as_str(), BindingFlags::DEFINITION, offset);
+                let class_scope = self.push_scope(ScopeKind::Class, scope, offset);
+                self.collect_block(class_scope, &cls.body);
+            }
+            Import(import) => {
+                let offset = import.range.start().to_usize();
+                for alias in &import.names {
+                    // `import a.b` binds `a`
+                    let name = match &alias.asname {
+                        Some(asname) => asname.as_str(),
+                        None => alias.name.as_str().split('.').next().unwrap_or_default(),
+                    };
+                    self.bind(scope, name, BindingFlags::IMPORT, offset);
+                }
+            }
+            ImportFrom(import) => {
+                let offset = import.range.start().to_usize();
+                for alias in &import.names {
+                    let name = alias.asname.as_ref().unwrap_or(&alias.name).as_str();
+                    if name != "*" {
+                        self.bind(scope, name, BindingFlags::IMPORT, offset);
+                    }
+                }
+            }
+            Global(global_stmt) => {
+                let offset = global_stmt.range.start().to_usize();
+                for name in &global_stmt.names {
+                    self.bind(scope, name.as_str(), BindingFlags::GLOBAL, offset);
+                    // The declaration makes the name a module global as well
+                    if scope != MODULE_SCOPE {
+                        self.bind(MODULE_SCOPE, name.as_str(), BindingFlags::GLOBAL, offset);
+                    }
+                }
+            }
+            Nonlocal(nonlocal_stmt) => {
+                let offset = nonlocal_stmt.range.start().to_usize();
+                for name in &nonlocal_stmt.names {
+                    self.bind(scope, name.as_str(), BindingFlags::NONLOCAL, offset);
+                }
+            }
+            Assign(assign) => {
+                let offset = assign.range.start().to_usize();
+                for target in &assign.targets {
+                    self.bind_target(scope, target, offset);
+                }
+            }
+            AugAssign(assign) => {
+                self.bind_target(scope, &assign.target, assign.range.start().to_usize());
+            }
+            AnnAssign(assign) => {
+                // A bare annotation doesn't bind anything
+                if assign.value.is_some() {
+                    self.bind_target(scope, &assign.target, assign.range.start().to_usize());
+                }
+            }
+            For(for_stmt) => {
+                self.bind_target(scope, &for_stmt.target, for_stmt.range.start().to_usize());
+                self.collect_block(scope, &for_stmt.body);
+                self.collect_block(scope, &for_stmt.orelse);
+            }
+            AsyncFor(for_stmt) => {
+                self.bind_target(scope, &for_stmt.target, for_stmt.range.start().to_usize());
+                self.collect_block(scope, &for_stmt.body);
+                self.collect_block(scope, &for_stmt.orelse);
+            }
+            While(while_stmt) => {
+                self.collect_block(scope, &while_stmt.body);
+                self.collect_block(scope, &while_stmt.orelse);
+            }
+            If(if_stmt) => {
+                self.collect_block(scope, &if_stmt.body);
+                self.collect_block(scope, &if_stmt.orelse);
+            }
+            With(with_stmt) => {
+                let offset = with_stmt.range.start().to_usize();
+                for item in &with_stmt.items {
+                    if let Some(vars) = &item.optional_vars {
+                        self.bind_target(scope, vars, offset);
+                    }
+                }
+                self.collect_block(scope, &with_stmt.body);
+            }
+            AsyncWith(with_stmt) => {
+                let offset = with_stmt.range.start().to_usize();
+                for item in &with_stmt.items {
+                    if let Some(vars) = &item.optional_vars {
+                        self.bind_target(scope, vars, offset);
+                    }
+                }
+                self.collect_block(scope, &with_stmt.body);
+            }
+            Try(try_stmt) => {
+                self.collect_block(scope, &try_stmt.body);
+                for handler in &try_stmt.handlers {
+                    match handler {
+                        ast::ExceptHandler::ExceptHandler(h) => {
+                            if let Some(name) = &h.name {
+                                let offset = h.range.start().to_usize();
+                                self.bind(scope, name.as_str(), BindingFlags::ASSIGNMENT, offset);
+                            }
+                            self.collect_block(scope, &h.body);
+                        }
+                    }
+                }
+                self.collect_block(scope, &try_stmt.orelse);
+                self.collect_block(scope, &try_stmt.finalbody);
+            }
+            _ => {}
+        }
+    }
+
+    fn collect_function(
+        &mut self,
+        scope: ScopeId,
+        name: &str,
+        args: &ast::Arguments,
+        body: &[ast::Stmt],
+        offset: usize,
+    ) {
+        self.bind(scope, name, BindingFlags::DEFINITION, offset);
+        let function_scope = self.push_scope(ScopeKind::Function, scope, offset);
+
+        for arg in args
+            .posonlyargs
+            .iter()
+            .chain(args.args.iter())
+            .chain(args.kwonlyargs.iter())
+        {
+            self.bind(function_scope, arg.def.arg.as_str(), BindingFlags::ARGUMENT, offset);
+        }
+        for arg in args.vararg.iter().chain(args.kwarg.iter()) {
+            self.bind(function_scope, arg.arg.as_str(), BindingFlags::ARGUMENT, offset);
+        }
+
+        self.collect_block(function_scope, body);
+    }
+}
+
+/// Names Python provides without an import
+const BUILTINS: &[&str] = &[
+    "print", "len", "range", "str", "int", "float", "bool",
+    "list", "dict", "set", "tuple", "type", "isinstance",
+    "open", "file", "input", "sum", "min", "max", "abs",
+    "round", "sorted", "reversed", "enumerate", "zip",
+    "map", "filter", "any", "all", "hex", "oct", "bin",
+    "ord", "chr", "dir", "help", "id", "hash", "iter",
+    "next", "super", "property", "staticmethod",
+    "classmethod", "getattr", "setattr", "hasattr",
+    "delattr", "vars", "globals", "locals", "eval",
+    "exec", "compile", "True", "False", "None",
+    "__name__", "__file__", "__doc__", "Exception",
+    "ValueError", "TypeError", "KeyError", "IndexError",
+    "RuntimeError", "NotImplementedError", "AttributeError",
+    "bytes", "bytearray", "callable", "issubclass", "object",
+    "AssertionError", "UnicodeEncodeError", "IOError",
+    "OSError", "ImportError", "NameError", "StopIteration",
+    "GeneratorExit", "SystemExit", "KeyboardInterrupt",
+    "MemoryError", "OverflowError", "ZeroDivisionError",
+    "SyntaxError", "IndentationError", "TabError",
+    "SystemError", "UnicodeError", "UnicodeDecodeError",
+    "Warning", "DeprecationWarning", "FutureWarning",
+    "UserWarning", "PendingDeprecationWarning",
+    "BaseException", "ArithmeticError", "LookupError",
+    "EnvironmentError", "ReferenceError", "EOFError",
+    "BufferError", "FloatingPointError", "StandardError",
+    "StopAsyncIteration", "ConnectionError", "BrokenPipeError",
+    "ConnectionAbortedError", "ConnectionRefusedError",
+    "ConnectionResetError", "FileExistsError", "FileNotFoundError",
+    "InterruptedError", "IsADirectoryError", "NotADirectoryError",
+    "PermissionError", "ProcessLookupError", "TimeoutError",
+    "NotImplemented", "Ellipsis", "__debug__", "quit", "exit",
+    "copyright", "credits", "license", "__import__",
+    "format", "repr", "ascii", "memoryview", "frozenset",
+    "complex", "divmod", "pow", "slice", "__build_class__",
+    "__loader__", "__spec__", "__package__", "__cached__",
+];
+
+pub fn is_builtin(name: &str) -> bool {
+    BUILTINS.contains(&name)
+}
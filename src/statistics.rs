@@ -0,0 +1,103 @@
+//! Count-only linting: how many issues each rule and each file has, without
+//! building the issues themselves. Rules record a hit in the file's `Tally`
+//! instead of formatting a message, and workers fold their files into
+//! `Statistics` that are merged once all files are done.
+
+use serde::Serialize;
+use std::collections::BTreeMap;
+use std::path::{Path, PathBuf};
+
+use crate::errors::{ErrorCode, Severity};
+use crate::reporter::IssueCounts;
+
+/// Issue counts of one file, by rule
+#[derive(Debug, Default, Clone)]
+pub struct Tally {
+    /// Hits by code and symbol
+    rules: BTreeMap<(&'static str, &'static str), usize>,
+}
+
+impl Tally {
+    pub fn add(&mut self, code: &ErrorCode) {
+        self.add_n(code, 1);
+    }
+
+    pub fn add_n(&mut self, code: &ErrorCode, count: usize) {
+        if count > 0 {
+            *self.rules.entry((code.code, code.symbol)).or_insert(0) += count;
+        }
+    }
+
+    pub fn merge(&mut self, other: Tally) {
+        for (rule, count) in other.rules {
+            *self.rules.entry(rule).or_insert(0) += count;
+        }
+    }
+
+    /// Keep only the rules whose code `keep` accepts
+    pub fn retain(&mut self, mut keep: impl FnMut(&str) -> bool) {
+        self.rules.retain(|(code, _), _| keep(code));
+    }
+
+    pub fn total(&self) -> usize {
+        self.rules.values().sum()
+    }
+
+    /// Hits of the rule with `code`
+    pub fn count(&self, code: &str) -> usize {
+        self.rules
+            .iter()
+            .filter(|((rule, _), _)| *rule == code)
+            .map(|(_, count)| count)
+            .sum()
+    }
+}
+
+/// Hits of one rule across all files
+#[derive(Debug, Clone, PartialEq, Eq, Serialize)]
+pub struct RuleCount {
+    pub symbol: &'static str,
+    pub count: usize,
+}
+
+/// Counts over a whole run
+#[derive(Debug, Default, Serialize)]
+pub struct Statistics {
+    /// Files linted, with or without issues
+    pub files: usize,
+    #[serde(flatten)]
+    pub counts: IssueCounts,
+    pub by_code: BTreeMap<&'static str, RuleCount>,
+    /// Issues per file, for files that have any
+    pub by_file: BTreeMap<PathBuf, usize>,
+}
+
+impl Statistics {
+    pub fn add_file(&mut self, file: &Path, tally: Tally) {
+        self.files += 1;
+        let total = tally.total();
+        if total > 0 {
+            *self.by_file.entry(file.to_path_buf()).or_insert(0) += total;
+        }
+        for ((code, symbol), count) in tally.rules {
+            self.counts.add_n(&Severity::of_code(code), count);
+            self.by_code.entry(code).or_insert(RuleCount { symbol, count: 0 }).count += count;
+        }
+    }
+
+    pub fn merge(mut self, other: Statistics) -> Statistics {
+        self.files += other.files;
+        self.counts.merge(&other.counts);
+        for (code, rule) in other.by_code {
+            self.by_code.entry(code).or_insert(RuleCount { symbol: rule.symbol, count: 0 }).count += rule.count;
+        }
+        for (file, count) in other.by_file {
+            *self.by_file.entry(file).or_insert(0) += count;
+        }
+        self
+    }
+
+    pub fn total(&self) -> usize {
+        self.counts.total()
+    }
+}
@@ -0,0 +1,118 @@
+//! Signatures of the CPython standard library, so calls into it can be
+//! checked without parsing its sources.
+//!
+//! One table per Python minor version is generated by
+//! `scripts/gen_stdlib_signatures.py` and embedded in the binary. A table is
+//! sorted by key and searched in place: the only setup is indexing its line
+//! starts on first use, and a signature is decoded only when it is looked up.
+
+use std::sync::OnceLock;
+
+use crate::checkers::call_errors::FunctionSignature;
+
+/// Embedded tables, oldest version first
+const TABLES: &[(&str, &str)] = &[("3.11", include_str!("stdlib/3.11.tsv"))];
+
+/// Line starts of each table, built on its first lookup
+static INDEXES: [OnceLock<Vec<u32>>; TABLES.len()] = [UNINDEXED; TABLES.len()];
+
+#[allow(clippy::declare_interior_mutable_const)]
+const UNINDEXED: OnceLock<Vec<u32>> = OnceLock::new();
+
+#[derive(Debug, Clone, Copy)]
+pub struct StdlibTable {
+    slot: usize,
+}
+
+impl StdlibTable {
+    /// The table for a `major.minor` version. Versions without a table of
+    /// their own use the newest table not newer than them, or the oldest one.
+    pub fn for_version(version: Option<&str>) -> Self {
+        let wanted = match version.and_then(parse_version) {
+            Some(wanted) => wanted,
+            None => return Self::latest(),
+        };
+        let slot = TABLES
+            .iter()
+            .rposition(|(v, _)| parse_version(v).map_or(false, |v| v <= wanted))
+            .unwrap_or(0);
+        Self { slot }
+    }
+
+    pub fn latest() -> Self {
+        Self { slot: TABLES.len() - 1 }
+    }
+
+    pub fn version(&self) -> &'static str {
+        TABLES[self.slot].0
+    }
+
+    /// The signature for calling `module.name`, as imported under `local_name`
+    pub fn callable(&self, module: &str, name: &str, local_name: &str) -> Option<FunctionSignature> {
+        let line = self.find(module, name)?;
+        let mut fields = line.split('\t').skip(1);
+        let min_args = fields.next()?.parse().ok()?;
+        let max_args = match fields.next()? {
+            "-" => None,
+            max => Some(max.parse().ok()?),
+        };
+        let has_kwargs = fields.next()?.contains('k');
+        let required_args = fields
+            .next()?
+            .split(',')
+            .filter(|arg| !arg.is_empty())
+            .map(str::to_string)
+            .collect();
+        Some(FunctionSignature {
+            name: local_name.to_string(),
+            min_args,
+            max_args,
+            required_args,
+            has_varargs: max_args.is_none(),
+            has_kwargs,
+        })
+    }
+
+    fn find(&self, module: &str, name: &str) -> Option<&'static str> {
+        let text = TABLES[self.slot].1;
+        let starts = INDEXES[self.slot].get_or_init(|| line_starts(text));
+        let index = starts
+            .binary_search_by(|&start| {
+                let line = &text[start as usize..];
+                let key = &line[..line.find('\t').unwrap_or(line.len())];
+                compare_key(key, module, name)
+            })
+            .ok()?;
+        let end = starts.get(index + 1).map_or(text.len(), |&next| next as usize - 1);
+        Some(text[starts[index] as usize..end].trim_end_matches('\n'))
+    }
+}
+
+impl Default for StdlibTable {
+    fn default() -> Self {
+        Self::latest()
+    }
+}
+
+fn line_starts(text: &str) -> Vec<u32> {
+    let mut starts = vec![0];
+    starts.extend(
+        text.match_indices('\n')
+            .map(|(i, _)| i as u32 + 1)
+            .filter(|&start| (start as usize) < text.len()),
+    );
+    starts
+}
+
+/// Compare a table key against `module.name` without building the latter
+fn compare_key(key: &str, module: &str, name: &str) -> std::cmp::Ordering {
+    let wanted = module.bytes().chain(std::iter::once(b'.')).chain(name.bytes());
+    key.bytes().cmp(wanted)
+}
+
+fn parse_version(version: &str) -> Option<(u32, u32)> {
+    let mut parts = version.trim().split('.');
+    let major = parts.next()?.parse().ok()?;
+    let minor = parts.next()?.parse().ok()?;
+    Some((major, minor))
+}
@@ -0,0 +1,289 @@
+//! A persistent index of the functions and classes each project module
+//! exports, so cross-module call checks cost a lookup instead of a parse.
+//!
+//! The index file is memory-mapped and its entry table is only decoded on the
+//! first lookup. Entries are keyed by the module's canonical path and record
+//! the content hash they were built from; modules whose contents changed are
+//! parsed again and written back by [`SymbolIndex::save`].
+
+use anyhow::{Context, Result};
+use memmap2::Mmap;
+use rustpython_ast::{self as ast};
+use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::fs::{self, File};
+use std::ops::Range;
+use std::path::{Path, PathBuf};
+use std::sync::{Arc, Mutex, OnceLock};
+
+use crate::checkers::call_errors::FunctionSignature;
+use crate::pipeline::content_hash;
+
+/// File name of the index inside the cache directory
+pub const INDEX_FILE: &str = "symbols.idx";
+
+const MAGIC: &[u8; 8] = b"PRYSYM01";
+
+/// What a module exports for call checking
+#[derive(Debug, Clone, Default, PartialEq, Serialize, Deserialize)]
+pub struct ModuleSymbols {
+    pub functions: HashMap<String, FunctionSignature>,
+    /// Classes mapped to the signature of calling them, taken from their own
+    /// `__init__` without `self`; `None` when the class doesn't define one
+    pub classes: HashMap<String, Option<FunctionSignature>>,
+}
+
+impl ModuleSymbols {
+    pub fn from_source(source: &str) -> Option<Self> {
+        rustpython_parser::parse(source, rustpython_parser::Mode::Module, "<module>")
+            .ok()
+            .map(|module| Self::from_module(&module))
+    }
+
+    pub fn from_module(module: &ast::Mod) -> Self {
+        let mut symbols = Self::default();
+        if let ast::Mod::Module(ast::ModModule { body, .. }) = module {
+            for stmt in body {
+                match stmt {
+                    ast::Stmt::FunctionDef(func) => {
+                        let signature = FunctionSignature::from_arguments(func.name.as_str(), &func.args);
+                        symbols.functions.insert(func.name.to_string(), signature);
+                    }
+                    ast::Stmt::ClassDef(cls) => {
+                        // The last `__init__` is the one Python keeps, and
+                        // the implementation after any `@overload` stubs
+                        let init = cls.body.iter().rev().find_map(|stmt| match stmt {
+                            ast::Stmt::FunctionDef(func) if func.name.as_str() == "__init__" => Some(
+                                FunctionSignature::from_arguments(cls.name.as_str(), &func.args).without_receiver(),
+                            ),
+                            _ => None,
+                        });
+                        symbols.classes.insert(cls.name.to_string(), init);
+                    }
+                    _ => {}
+                }
+            }
+        }
+        symbols
+    }
+
+    /// The signature for calling `name`, as imported under `local_name`
+    pub fn callable(&self, name: &str, local_name: &str) -> Option<FunctionSignature> {
+        let signature = match self.functions.get(name) {
+            Some(signature) => signature,
+            None => self.classes.get(name)?.as_ref()?,
+        };
+        Some(FunctionSignature {
+            name: local_name.to_string(),
+            ..signature.clone()
+        })
+    }
+}
+
+struct Entry {
+    hash: u64,
+    payload: Range<usize>,
+}
+
+pub struct SymbolIndex {
+    /// Where the index is persisted; `None` keeps it for this run only
+    path: Option<PathBuf>,
+    mapped: Option<Mmap>,
+    entries: OnceLock<HashMap<String, Entry>>,
+    /// Modules already resolved during this run, shared by all workers
+    loaded: Mutex<HashMap<PathBuf, Option<Arc<ModuleSymbols>>>>,
+    /// Modules parsed during this run, to be written back
+    updated: Mutex<HashMap<String, (u64, Arc<ModuleSymbols>)>>,
+}
+
+impl SymbolIndex {
+    /// An index that only lives for this run
+    pub fn in_memory() -> Self {
+        Self {
+            path: None,
+            mapped: None,
+            entries: OnceLock::new(),
+            loaded: Mutex::new(HashMap::new()),
+            updated: Mutex::new(HashMap::new()),
+        }
+    }
+
+    /// Map the index stored at `path`; a missing file starts an empty index
+    pub fn open(path: &Path) -> Result<Self> {
+        let mapped = match File::open(path) {
+            Ok(file) => {
+                if file.metadata()?.len() == 0 {
+                    None
+                } else {
+                    // SAFETY: the index is only ever replaced by renaming a
+                    // new file over it, never modified in place
+                    let map = unsafe { Mmap::map(&file) };
+                    Some(map.with_context(|| format!("mapping {}", path.display()))?)
+                }
+            }
+            Err(e) if e.kind() == std::io::ErrorKind::NotFound => None,
+            Err(e) => return Err(e).with_context(|| format!("opening {}", path.display())),
+        };
+        Ok(Self {
+            path: Some(path.to_path_buf()),
+            mapped,
+            ..Self::in_memory()
+        })
+    }
+
+    /// Exported symbols of the module at `path`, or `None` if it can't be
+    /// read or parsed
+    pub fn module_symbols(&self, path: &Path) -> Option<Arc<ModuleSymbols>> {
+        if let Some(symbols) = self.loaded.lock().unwrap().get(path) {
+            return symbols.clone();
+        }
+        let symbols = self.load(path);
+        self.loaded
+            .lock()
+            .unwrap()
+            .insert(path.to_path_buf(), symbols.clone());
+        symbols
+    }
+
+    fn load(&self, path: &Path) -> Option<Arc<ModuleSymbols>> {
+        let source = fs::read(path).ok()?;
+        let hash = content_hash(&source);
+        let key = fs::canonicalize(path)
+            .unwrap_or_else(|_| path.to_path_buf())
+            .to_string_lossy()
+            .into_owned();
+
+        if let Some(symbols) = self.stored(&key, hash) {
+            return Some(Arc::new(symbols));
+        }
+
+        let source = String::from_utf8(source).ok()?;
+        let symbols = Arc::new(ModuleSymbols::from_source(&source)?);
+        if self.path.is_some() {
+            self.updated
+                .lock()
+                .unwrap()
+                .insert(key, (hash, Arc::clone(&symbols)));
+        }
+        Some(symbols)
+    }
+
+    /// The stored symbols for `key`, if they were built from the same contents
+    fn stored(&self, key: &str, hash: u64) -> Option<ModuleSymbols> {
+        let mapped = self.mapped.as_ref()?;
+        let entry = self.entries.get_or_init(|| decode_table(mapped)).get(key)?;
+        if entry.hash != hash {
+            return None;
+        }
+        serde_json::from_slice(&mapped[entry.payload.clone()]).ok()
+    }
+
+    /// Write the index back if any module was parsed during this run. Stored
+    /// entries for modules that no longer exist are dropped.
+    pub fn save(&self) -> Result<()> {
+        let path = match &self.path {
+            Some(path) => path,
+            None => return Ok(()),
+        };
+        let updated = self.updated.lock().unwrap();
+        if updated.is_empty() {
+            return Ok(());
+        }
+
+        let mut records: Vec<(&str, u64, Vec<u8>)> = Vec::new();
+        if let Some(mapped) = &self.mapped {
+            for (key, entry) in self.entries.get_or_init(|| decode_table(mapped)) {
+                if !updated.contains_key(key) && Path::new(key).exists() {
+                    records.push((key.as_str(), entry.hash, mapped[entry.payload.clone()].to_vec()));
+                }
+            }
+        }
+        for (key, (hash, symbols)) in updated.iter() {
+            records.push((key.as_str(), *hash, serde_json::to_vec(symbols.as_ref())?));
+        }
+        records.sort_by(|a, b| a.0.cmp(b.0));
+
+        let mut bytes = Vec::new();
+        bytes.extend_from_slice(MAGIC);
+        bytes.extend_from_slice(&(records.len() as u32).to_le_bytes());
+        for (key, hash, payload) in &records {
+            bytes.extend_from_slice(&(key.len() as u32).to_le_bytes());
+            bytes.extend_from_slice(key.as_bytes());
+            bytes.extend_from_slice(&hash.to_le_bytes());
+            bytes.extend_from_slice(&(payload.len() as u32).to_le_bytes());
+            bytes.extend_from_slice(payload);
+        }
+
+        if let Some(dir) = path.parent() {
+            fs::create_dir_all(dir)?;
+        }
+        // Replace the file atomically so a concurrent run never maps a
+        // half-written index
+        let temp = path.with_extension(format!("tmp{}", std::process::id()));
+        fs::write(&temp, &bytes).with_context(|| format!("writing {}", temp.display()))?;
+        fs::rename(&temp, path).with_context(|| format!("replacing {}", path.display()))?;
+        Ok(())
+    }
+}
+
+/// Exported symbols of the module at `path`, through `index` when there is
+/// one and by parsing the file otherwise
+pub fn module_symbols(index: Option<&SymbolIndex>, path: &Path) -> Option<Arc<ModuleSymbols>> {
+    match index {
+        Some(index) => index.module_symbols(path),
+        None => fs::read_to_string(path)
+            .ok()
+            .and_then(|source| ModuleSymbols::from_source(&source))
+            .map(Arc::new),
+    }
+}
+
+/// Decode the entry table of a mapped index. A foreign or truncated file
+/// yields only the entries that could be read.
+fn decode_table(bytes: &[u8]) -> HashMap<String, Entry> {
+    let mut entries = HashMap::new();
+    if !bytes.starts_with(MAGIC) {
+        return entries;
+    }
+
+    let mut reader = Reader { bytes, pos: MAGIC.len() };
+    let count = match reader.u32() {
+        Some(count) => count,
+        None => return entries,
+    };
+    for _ in 0..count {
+        let record = (|| {
+            let key_len = reader.u32()? as usize;
+            let key = std::str::from_utf8(reader.take(key_len)?).ok()?.to_string();
+            let hash = u64::from_le_bytes(reader.take(8)?.try_into().ok()?);
+            let payload_len = reader.u32()? as usize;
+            let start = reader.pos;
+            reader.take(payload_len)?;
+            Some((key, Entry { hash, payload: start..start + payload_len }))
+        })();
+        match record {
+            Some((key, entry)) => {
+                entries.insert(key, entry);
+            }
+            None => break,
+        }
+    }
+    entries
+}
+
+struct Reader<'a> {
+    bytes: &'a [u8],
+    pos: usize,
+}
+
+impl<'a> Reader<'a> {
+    fn take(&mut self, len: usize) -> Option<&'a [u8]> {
+        let slice = self.bytes.get(self.pos..self.pos.checked_add(len)?)?;
+        self.pos += len;
+        Some(slice)
+    }
+
+    fn u32(&mut self) -> Option<u32> {
+        Some(u32::from_le_bytes(self.take(4)?.try_into().ok()?))
+    }
+}
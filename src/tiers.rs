@@ -0,0 +1,147 @@
+//! Rules run in two tiers. The fast tier is the visitor itself: every check
+//! that only needs the file being linted. The slow tier holds the checks that
+//! need other files, currently calls to imported names, so a slow import
+//! path never holds back a file's local results.
+//!
+//! The fast tier doesn't depend on where the file lives, only on its
+//! contents. Everything that does, such as which module an import resolves
+//! to, is left to the slow tier, so identical files can share one fast tier.
+
+use serde::{Deserialize, Serialize};
+use std::collections::{HashMap, HashSet};
+use std::path::{Path, PathBuf};
+use std::sync::Arc;
+
+use crate::checkers::call_errors::{DeferredCall, FunctionSignature};
+use crate::errors::{Issue, E1120};
+use crate::statistics::Tally;
+use crate::stdlib::StdlibTable;
+use crate::symbol_index::{self, SymbolIndex};
+
+/// A `from module import name`, resolved once the importing file's location
+/// is known
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct DeferredImport {
+    pub module_name: String,
+    /// Not a relative import, so it may name a standard-library module
+    pub absolute: bool,
+    pub imported_name: String,
+}
+
+impl DeferredImport {
+    /// The signature of the imported name as seen from `file`. A project
+    /// module next to the file wins over a standard-library module.
+    ///
+    /// When linting a git `tree` the project modules are the tree's files,
+    /// which aren't on disk, so importing from one of them gives no signature.
+    pub fn resolve(
+        &self,
+        file: &Path,
+        local_name: &str,
+        symbols: Option<&SymbolIndex>,
+        stdlib: &StdlibTable,
+        tree: Option<&HashSet<PathBuf>>,
+    ) -> Option<FunctionSignature> {
+        if let Some(tree) = tree {
+            let in_tree = module_paths(file, &self.module_name).iter().any(|path| tree.contains(path));
+            if in_tree || !self.absolute {
+                return None;
+            }
+            return stdlib.callable(&self.module_name, &self.imported_name, local_name);
+        }
+        match module_paths(file, &self.module_name).into_iter().find(|path| path.exists()) {
+            Some(path) => symbol_index::module_symbols(symbols, &path)?.callable(&self.imported_name, local_name),
+            None if self.absolute => stdlib.callable(&self.module_name, &self.imported_name, local_name),
+            None => None,
+        }
+    }
+}
+
+/// Where a module imported from `file` may live in the project
+pub fn module_paths(file: &Path, module_name: &str) -> Vec<PathBuf> {
+    let mut paths = Vec::new();
+
+    // Convert module name to path (e.g., "app.email_utils" -> "app/email_utils.py")
+    let module_path = format!("{}.py", module_name.replace('.', "/"));
+
+    // Try relative to current file's directory
+    if let Some(parent) = file.parent() {
+        paths.push(parent.join(&module_path));
+
+        // Also try from parent directory (common for imports like app.xxx when in app/)
+        if let Some(grandparent) = parent.parent() {
+            paths.push(grandparent.join(&module_path));
+        }
+    }
+
+    // Try from working directory
+    let cwd = std::env::current_dir().unwrap_or_default();
+    paths.push(cwd.join(&module_path));
+
+    paths
+}
+
+/// The cross-file checks the fast tier of one file left behind
+#[derive(Default, Clone)]
+pub struct SlowTier {
+    pub file: PathBuf,
+    pub imports: HashMap<String, DeferredImport>,
+    pub calls: Vec<DeferredCall>,
+    pub symbols: Option<Arc<SymbolIndex>>,
+    pub stdlib: StdlibTable,
+    /// Files of the git tree being linted, which stand in for the disk
+    pub tree: Option<Arc<HashSet<PathBuf>>>,
+}
+
+impl SlowTier {
+    pub fn is_empty(&self) -> bool {
+        self.calls.is_empty()
+    }
+
+    /// The same checks for an identical copy of the file at `file`
+    pub fn for_file(&self, file: &Path) -> Self {
+        Self {
+            file: file.to_path_buf(),
+            ..self.clone()
+        }
+    }
+
+    /// Resolve the imports the recorded calls need and check the calls
+    pub fn run(self) -> Vec<Issue> {
+        let mut issues = Vec::new();
+        self.for_each_missing_argument(|call, arg_name| {
+            issues.push(Issue::new(
+                E1120.code.to_string(),
+                E1120.format_message(&[arg_name.to_string()]),
+                self.file.clone(),
+                call.line,
+                call.column,
+                E1120.symbol.to_string(),
+            ));
+        });
+        issues
+    }
+
+    /// Count what `run` would report into `tally`
+    pub fn count(self, tally: &mut Tally) {
+        let mut missing = 0;
+        self.for_each_missing_argument(|_, _| missing += 1);
+        tally.add_n(&E1120, missing);
+    }
+
+    fn for_each_missing_argument(&self, mut found: impl FnMut(&DeferredCall, &str)) {
+        let mut resolved: HashMap<&str, Option<FunctionSignature>> = HashMap::new();
+        for call in &self.calls {
+            let import = match self.imports.get(&call.name) {
+                Some(import) => import,
+                None => continue,
+            };
+            let signature = resolved.entry(call.name.as_str()).or_insert_with(|| {
+                import.resolve(&self.file, &call.name, self.symbols.as_deref(), &self.stdlib, self.tree.as_deref())
+            });
+            if let Some(arg_name) = signature.as_ref().and_then(|signature| call.missing_argument(signature)) {
+                found(call, arg_name);
+            }
+        }
+    }
+}
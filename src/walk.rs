@@ -0,0 +1,138 @@
+//! Shared helpers for walking expression trees without recursion.
+
+use rustpython_ast::{self as ast};
+
+/// Push the direct subexpressions of `expr` that are evaluated in the
+/// enclosing scope. Lambdas and comprehensions open their own scopes and are
+/// treated as opaque.
+pub fn push_children<'a>(expr: &'a ast::Expr, stack: &mut Vec<&'a ast::Expr>) {
+    use ast::Expr::*;
+
+    match expr {
+        BoolOp(e) => stack.extend(&e.values),
+        NamedExpr(e) => {
+            stack.push(&e.value);
+            stack.push(&e.target);
+        }
+        BinOp(e) => {
+            stack.push(&e.right);
+            stack.push(&e.left);
+        }
+        UnaryOp(e) => stack.push(&e.operand),
+        IfExp(e) => {
+            stack.push(&e.orelse);
+            stack.push(&e.body);
+            stack.push(&e.test);
+        }
+        Dict(e) => {
+            stack.extend(&e.values);
+            stack.extend(e.keys.iter().flatten());
+        }
+        Set(e) => stack.extend(&e.elts),
+        Await(e) => stack.push(&e.value),
+        Yield(e) => stack.extend(e.value.as_deref()),
+        YieldFrom(e) => stack.push(&e.value),
+        Compare(e) => {
+            stack.extend(&e.comparators);
+            stack.push(&e.left);
+        }
+        Call(e) => {
+            stack.extend(e.keywords.iter().map(|keyword| &keyword.value));
+            stack.extend(&e.args);
+            stack.push(&e.func);
+        }
+        FormattedValue(e) => {
+            stack.extend(e.format_spec.as_deref());
+            stack.push(&e.value);
+        }
+        JoinedStr(e) => stack.extend(&e.values),
+        Attribute(e) => stack.push(&e.value),
+        Subscript(e) => {
+            stack.push(&e.slice);
+            stack.push(&e.value);
+        }
+        Starred(e) => stack.push(&e.value),
+        List(e) => stack.extend(&e.elts),
+        Tuple(e) => stack.extend(&e.elts),
+        Slice(e) => {
+            stack.extend(e.step.as_deref());
+            stack.extend(e.upper.as_deref());
+            stack.extend(e.lower.as_deref());
+        }
+        _ => {}
+    }
+}
+
+/// Push the expressions a statement evaluates itself, leaving out nested
+/// statement bodies and the bodies of nested functions and classes.
+pub fn push_stmt_exprs<'a>(stmt: &'a ast::Stmt, stack: &mut Vec<&'a ast::Expr>) {
+    use ast::Stmt::*;
+
+    match stmt {
+        FunctionDef(func) => {
+            stack.extend(&func.decorator_list);
+            stack.extend(default_values(&func.args));
+        }
+        AsyncFunctionDef(func) => {
+            stack.extend(&func.decorator_list);
+            stack.extend(default_values(&func.args));
+        }
+        ClassDef(cls) => {
+            stack.extend(&cls.decorator_list);
+            stack.extend(&cls.bases);
+            stack.extend(cls.keywords.iter().map(|keyword| &keyword.value));
+        }
+        Return(ret) => stack.extend(ret.value.as_deref()),
+        Delete(delete) => stack.extend(&delete.targets),
+        Assign(assign) => {
+            stack.extend(&assign.targets);
+            stack.push(&assign.value);
+        }
+        AugAssign(assign) => {
+            stack.push(&assign.target);
+            stack.push(&assign.value);
+        }
+        AnnAssign(assign) => {
+            stack.push(&assign.target);
+            stack.extend(assign.value.as_deref());
+        }
+        For(for_stmt) => {
+            stack.push(&for_stmt.target);
+            stack.push(&for_stmt.iter);
+        }
+        AsyncFor(for_stmt) => {
+            stack.push(&for_stmt.target);
+            stack.push(&for_stmt.iter);
+        }
+        While(while_stmt) => stack.push(&while_stmt.test),
+        If(if_stmt) => stack.push(&if_stmt.test),
+        With(with_stmt) => push_with_items(&with_stmt.items, stack),
+        AsyncWith(with_stmt) => push_with_items(&with_stmt.items, stack),
+        Raise(raise) => {
+            stack.extend(raise.exc.as_deref());
+            stack.extend(raise.cause.as_deref());
+        }
+        Assert(assert) => {
+            stack.push(&assert.test);
+            stack.extend(assert.msg.as_deref());
+        }
+        Expr(expr) => stack.push(&expr.value),
+        Match(match_stmt) => stack.push(&match_stmt.subject),
+        _ => {}
+    }
+}
+
+fn default_values(args: &ast::Arguments) -> impl Iterator<Item = &ast::Expr> {
+    args.posonlyargs
+        .iter()
+        .chain(&args.args)
+        .chain(&args.kwonlyargs)
+        .filter_map(|arg| arg.default.as_deref())
+}
+
+fn push_with_items<'a>(items: &'a [ast::WithItem], stack: &mut Vec<&'a ast::Expr>) {
+    for item in items {
+        stack.push(&item.context_expr);
+        stack.extend(item.optional_vars.as_deref());
+    }
+}
@@ -155,4 +155,762 @@ def func():
 "#;
     let issues = run_linter(code);
     assert!(issues.iter().any(|i| i.code == "E0117"));
-}
\ No newline at end of file
+}
+
+#[test]
+fn test_check_paths_deduplicates_overlapping_arguments() {
+    let dir = TempDir::new().unwrap();
+    let file_path = create_test_file(&dir, "test.py", "return 42\n");
+
+    let mut linter = Linter::new(Config::default());
+    let paths = vec![dir.path().to_path_buf(), file_path.clone(), file_path];
+    let issues = linter.check_paths(&paths).unwrap();
+
+    assert_eq!(issues.iter().filter(|i| i.code == "E0104").count(), 1);
+}
+
+#[test]
+fn test_prefetch_readers_match_direct_reads() {
+    let dir = TempDir::new().unwrap();
+    create_test_file(&dir, "a.py", "return 1\n");
+    create_test_file(&dir, "b.py", "yield 2\n");
+
+    let mut config = Config::default();
+    config.jobs = 2;
+    config.io_threads = 2;
+    let mut linter = Linter::new(config);
+    let issues = linter.check_paths(&[dir.path().to_path_buf()]).unwrap();
+
+    assert!(issues.iter().any(|i| i.code == "E0104"));
+    assert!(issues.iter().any(|i| i.code == "E0105"));
+}
+
+#[test]
+fn test_prefetch_readers_skip_before_reading() {
+    let dir = TempDir::new().unwrap();
+    create_test_file(&dir, "a.py", "return 1\n");
+    create_test_file(&dir, "gen.py", "# Generated by tool. DO NOT EDIT.\nreturn 1\n");
+    // Too large to lint, and not even UTF-8: it must never be read
+    fs::write(dir.path().join("big.py"), vec![0xff; 5000]).unwrap();
+
+    let mut config = Config::default();
+    config.jobs = 2;
+    config.io_threads = 2;
+    config.max_file_size = Some(1000);
+    config.skip_generated = true;
+    let mut linter = Linter::new(config);
+    let issues = linter.check_paths(&[dir.path().to_path_buf()]).unwrap();
+
+    let skipped = |name: &str| issues.iter().any(|i| i.code == "I0013" && i.file.ends_with(name));
+    assert!(skipped("big.py") && skipped("gen.py"));
+    assert_eq!(issues.iter().filter(|i| i.code == "E0104").count(), 1);
+}
+
+#[test]
+fn test_parse_byte_size() {
+    use prylint::config::parse_byte_size;
+
+    assert_eq!(parse_byte_size("4096").unwrap(), 4096);
+    assert_eq!(parse_byte_size("512K").unwrap(), 512 << 10);
+    assert_eq!(parse_byte_size("256MB").unwrap(), 256 << 20);
+    assert_eq!(parse_byte_size("2GiB").unwrap(), 2 << 30);
+    assert!(parse_byte_size("lots").is_err());
+}
+
+#[test]
+fn test_memory_budget_admits_files_larger_than_itself() {
+    let dir = TempDir::new().unwrap();
+    let mut files: Vec<PathBuf> = (0..12)
+        .map(|i| create_test_file(&dir, &format!("small_{}.py", i), &format!("print(missing_{})\n", i)))
+        .collect();
+    let mut big = String::new();
+    for i in 0..200 {
+        big.push_str(&format!("def function_{}():\n    return undefined_{}\n\n", i, i));
+    }
+    files.push(create_test_file(&dir, "big.py", &big));
+    let budget = 1024;
+    assert!(big.len() as u64 > budget);
+
+    let sorted = |mut issues: Vec<Issue>| {
+        issues.sort_by(|a, b| (&a.file, a.line, &a.code).cmp(&(&b.file, b.line, &b.code)));
+        issues.into_iter().map(|i| (i.file, i.line, i.code)).collect::<Vec<_>>()
+    };
+    let mut config = Config::default();
+    config.jobs = 4;
+    let expected = sorted(Linter::new(config.clone()).check_files(&files).unwrap());
+    let in_big = expected.iter().filter(|(file, _, code)| file.ends_with("big.py") && code == "E0602");
+    assert_eq!(in_big.count(), 200);
+
+    for io_threads in [0, 2] {
+        let mut config = config.clone();
+        config.io_threads = io_threads;
+        config.max_memory = Some(budget);
+        let files = files.clone();
+        // Run on a separate thread so a deadlock fails the test instead of
+        // hanging it
+        let (sender, receiver) = std::sync::mpsc::channel();
+        std::thread::spawn(move || {
+            let linter = Linter::new(config);
+            let issues = linter.check_files(&files).unwrap();
+            let statistics = linter.check_files_statistics(&files).unwrap();
+            sender.send((issues, statistics.total())).unwrap();
+        });
+        let (issues, total) = receiver
+            .recv_timeout(std::time::Duration::from_secs(60))
+            .expect("linting under a memory budget did not finish");
+        assert_eq!(sorted(issues), expected);
+        assert_eq!(total, expected.len());
+    }
+
+    // The whole budget is handed to an oversized file once nothing else is
+    // in flight
+    let budget = prylint::pipeline::ByteBudget::new(100);
+    drop(budget.acquire(10_000));
+    drop(budget.acquire(60));
+    assert_eq!(budget.peak(), 10_000);
+}
+
+#[test]
+fn test_per_file_budgets_degrade_gracefully() {
+    let dir = TempDir::new().unwrap();
+    let generated = create_test_file(&dir, "gen.py", "# Generated by tool. DO NOT EDIT.\nreturn 1\n");
+    let nested = create_test_file(
+        &dir,
+        "nested.py",
+        &format!("x = {}1{}\nreturn 1\n", "(".repeat(50), ")".repeat(50)),
+    );
+
+    let mut config = Config::default();
+    config.skip_generated = true;
+    config.max_nesting_depth = Some(10);
+    let linter = Linter::new(config);
+
+    let issues = linter.check_file(&generated).unwrap();
+    assert_eq!(issues.len(), 1);
+    assert_eq!(issues[0].code, "I0013");
+    // Skipped files don't fail the run
+    assert_eq!(prylint::reporter::IssueCounts::of(&issues).failures(), 0);
+
+    let issues = linter.check_file(&nested).unwrap();
+    assert!(issues.iter().any(|i| i.code == "I0014"));
+    assert!(!issues.iter().any(|i| i.code == "E0104"));
+
+    use prylint::budgets::looks_generated;
+    assert!(looks_generated(b"# -*- coding: utf-8 -*-\n# This file was generated by protoc\n"));
+    assert!(looks_generated(b"# Code generated by mockgen. DO NOT EDIT.\n"));
+    assert!(looks_generated(b"#!/usr/bin/env python\n# @generated\n"));
+    assert!(!looks_generated(b"# Handles auto-generated IDs\nimport uuid\n"));
+}
+
+#[test]
+fn test_long_operator_chain_does_not_overflow() {
+    let mut code = String::from("QUERY = undefined_name");
+    for i in 0..5_000 {
+        code.push_str(&format!(" + \"part {}\"", i));
+    }
+    code.push('\n');
+
+    let issues = run_linter(&code);
+    assert!(issues.iter().any(|i| i.code == "E0602"));
+}
+
+#[test]
+fn test_names_resolve_through_enclosing_scopes() {
+    let code = r#"
+import os.path
+
+def describe():
+    return os.path.join(PREFIX, helper())
+
+def helper():
+    return missing_name
+
+PREFIX = "prefix"
+"#;
+    let issues = run_linter(code);
+    let undefined: Vec<_> = issues.iter().filter(|i| i.code == "E0602").collect();
+    assert_eq!(undefined.len(), 1);
+    assert!(undefined[0].message.contains("missing_name"));
+}
+
+#[test]
+fn test_definite_assignment_follows_control_flow() {
+    let code = r#"
+def early_exit(flag):
+    try:
+        value = compute()
+    except ValueError:
+        return None
+    return value
+
+def maybe(flag):
+    if flag:
+        result = 1
+    return result
+
+def too_soon():
+    print(later)
+    later = 1
+
+def handled(flag):
+    while True:
+        found = flag
+        break
+    return found
+"#;
+    let issues = run_linter(code);
+    let flagged: Vec<_> = issues
+        .iter()
+        .filter(|i| i.code == "E0601" || i.code == "E0606")
+        .map(|i| (i.code.as_str(), i.line))
+        .collect();
+    assert_eq!(flagged, vec![("E0606", 12), ("E0601", 15)]);
+}
+
+#[test]
+fn test_function_facts_see_nested_statements() {
+    let code = r#"
+class Stream:
+    def __init__(self, source):
+        self.first = yield source
+
+class Config:
+    def __init__(self, path):
+        if not path:
+            return "missing"
+        self.path = path
+
+        def loader():
+            return path
+
+def counter():
+    print(total)
+    global total
+"#;
+    let issues = run_linter(code);
+    let codes: Vec<_> = issues.iter().map(|i| (i.code.as_str(), i.line)).collect();
+    assert!(codes.contains(&("E0100", 3)));
+    assert!(codes.contains(&("E0101", 7)));
+    assert!(codes.contains(&("E0118", 16)));
+}
+
+#[test]
+fn test_duplicate_keys_use_python_equality() {
+    let code = r#"
+TABLE = {
+    1: "int",
+    1.0: "float",
+    True: "bool",
+    "1": "str",
+    2.5: "float",
+    None: "none",
+    None: "again",
+}
+BIG = {
+    1e20: "float",
+    100000000000000000000: "int",
+    1e300: "float",
+    1.5e300: "another float",
+}
+"#;
+    let issues = run_linter(code);
+    let lines: Vec<_> = issues.iter().filter(|i| i.code == "E0109").map(|i| i.line).collect();
+    assert_eq!(lines, vec![4, 5, 9, 13]);
+}
+
+#[test]
+fn test_prefilter_detects_trigger_tokens() {
+    use prylint::prefilter::RuleFamilies;
+
+    let families = RuleFamilies::scan("def f():\n    global total\n    logger.info('x')\n");
+    assert!(families.globals && families.logging);
+    assert!(!families.nonlocals && !families.yields);
+    assert!(!families.not_implemented);
+
+    // Families stay on when their tokens appear, so results are unchanged
+    let issues = run_linter("def f():\n    raise NotImplemented\n");
+    assert!(issues.iter().any(|i| i.code == "E0711"));
+}
+
+#[test]
+fn test_parallel_bodies_match_sequential_visit() {
+    use prylint::ast_visitor::AstContext;
+
+    let mut code = String::from("import os\n\n");
+    for i in 0..200 {
+        code.push_str(&format!(
+            "def handler_{i}(flag):\n    if flag:\n        value = os.getcwd()\n    return value, undefined_{i}\n\n\
+             class Model{i}:\n    def method(other):\n        yield other\n\n"
+        ));
+    }
+    code.push_str("def uses_helper():\n    from helpers import greet\n    greet()\n\n");
+    code.push_str("handler_0()\n");
+
+    let run = |parallel: bool| {
+        let mut context = AstContext::new(&PathBuf::from("big.py"), code.clone());
+        context.parallel_bodies = parallel;
+        context.defer_cross_module = true;
+        context.parse_and_check().unwrap();
+        let mut issues = std::mem::take(&mut context.issues);
+        issues.sort_by_key(|issue| (issue.line, issue.column));
+        let slow = context.take_slow_tier();
+        let mut imports: Vec<String> = slow.imports.into_keys().collect();
+        imports.sort();
+        (issues, imports, slow.calls.len())
+    };
+
+    let sequential = run(false);
+    assert!(sequential.0.iter().any(|i| i.code == "E1120"));
+    assert!(sequential.0.iter().filter(|i| i.code == "E0606").count() == 200);
+    // The function-local import is handed to the slow tier with its call
+    assert_eq!((sequential.1.clone(), sequential.2), (vec!["greet".to_string()], 1));
+    assert_eq!(run(true), sequential);
+}
+
+#[test]
+fn test_symbol_index_persists_and_tracks_changes() {
+    let dir = TempDir::new().unwrap();
+    create_test_file(
+        &dir,
+        "helpers.py",
+        "from typing import overload\n\ndef greet(name, greeting):\n    pass\n\nclass Client:\n    @overload\n    def __init__(self): ...\n    def __init__(self, host):\n        self.host = host\n",
+    );
+    let main = create_test_file(&dir, "main.py", "from helpers import greet, Client\ngreet('x')\nClient()\n");
+
+    let mut config = Config::default();
+    config.cache_dir = Some(dir.path().join("cache"));
+    let check = |config: &Config| {
+        let linter = Linter::new(config.clone());
+        let issues = linter.check_file(&main).unwrap();
+        linter.save_symbol_index().unwrap();
+        issues.into_iter().filter(|i| i.code == "E1120").collect::<Vec<_>>()
+    };
+    let lint = |config: &Config| check(config).iter().map(|i| i.line).collect::<Vec<_>>();
+
+    assert_eq!(lint(&config), vec![2, 3]);
+    let index = dir.path().join("cache").join("symbols.idx");
+    assert!(index.exists());
+
+    // Rename the stored parameter without changing its length: the next run
+    // reports the new name only if it was served from the index
+    let bytes = fs::read(&index).unwrap();
+    let stored = bytes.windows(10).position(|w| w == b"\"greeting\"").unwrap();
+    let mut edited = bytes.clone();
+    edited[stored..stored + 10].copy_from_slice(b"\"greetinx\"");
+    fs::write(&index, &edited).unwrap();
+    let issues = check(&config);
+    assert_eq!(issues.iter().map(|i| i.line).collect::<Vec<_>>(), vec![2, 3]);
+    assert!(issues[0].message.contains("'greetinx'"));
+    // Nothing was parsed, so the index wasn't rewritten
+    assert_eq!(fs::read(&index).unwrap(), edited);
+
+    create_test_file(&dir, "helpers.py", "def greet(name, greeting='hi'):\n    pass\n");
+    assert!(lint(&config).is_empty());
+}
+
+#[test]
+fn test_stdlib_calls_checked_against_embedded_signatures() {
+    let issues = run_linter(
+        "from json import dumps\nfrom os.path import join as path_join\nfrom .json import loads\n\ndumps()\npath_join()\nloads()\ndumps(**{'obj': 1})\n",
+    );
+    let lines: Vec<_> = issues.iter().filter(|i| i.code == "E1120").map(|i| i.line).collect();
+    assert_eq!(lines, vec![5, 6]);
+
+    let table = prylint::stdlib::StdlibTable::for_version(Some("3.20"));
+    let signature = table.callable("json", "dumps", "dumps").unwrap();
+    assert_eq!(signature.required_args, vec!["obj".to_string()]);
+    assert!(table.callable("json", "no_such_function", "x").is_none());
+}
+
+#[test]
+fn test_fast_tier_reports_before_cross_module_checks() {
+    let dir = TempDir::new().unwrap();
+    create_test_file(&dir, "helpers.py", "def greet(name, greeting):\n    pass\n");
+    let main = create_test_file(
+        &dir,
+        "main.py",
+        "from helpers import greet\n\ndef local(a):\n    pass\n\ngreet('x')\nlocal()\nprint(undefined_name)\n",
+    );
+
+    let linter = Linter::new(Config::default());
+    let fast = std::sync::Mutex::new(Vec::new());
+    let slow = linter
+        .check_files_tiered(&[main.clone()], |_, issues| fast.lock().unwrap().extend(issues))
+        .unwrap();
+
+    let codes = |issues: &[Issue]| issues.iter().map(|i| (i.code.clone(), i.line)).collect::<Vec<_>>();
+    let fast = fast.into_inner().unwrap();
+    assert!(codes(&fast).contains(&("E1120".to_string(), 7)));
+    assert!(codes(&fast).contains(&("E0602".to_string(), 8)));
+    assert!(!codes(&fast).contains(&("E1120".to_string(), 6)));
+    assert_eq!(codes(&slow), vec![("E1120".to_string(), 6)]);
+
+    // Linting the file in one go reports both tiers
+    let all = linter.check_file(&main).unwrap();
+    assert_eq!(all.len(), fast.len() + slow.len());
+}
+
+#[test]
+fn test_identical_files_share_analysis_but_resolve_imports_locally() {
+    use prylint::pipeline::{Claim, IdenticalSources};
+
+    let dir = TempDir::new().unwrap();
+    let content = "from helpers import greet\n\ngreet('x')\nprint(missing)\n";
+    for service in ["a", "b", "c"] {
+        fs::create_dir(dir.path().join(service)).unwrap();
+        create_test_file(&dir, &format!("{}/main.py", service), content);
+    }
+    create_test_file(&dir, "a/helpers.py", "def greet(name, greeting):\n    pass\n");
+    create_test_file(&dir, "b/helpers.py", "def greet(name, greeting='hi'):\n    pass\n");
+
+    let files = [
+        dir.path().join("a/main.py"),
+        dir.path().join("a/helpers.py"),
+        dir.path().join("b/main.py"),
+        dir.path().join("c/main.py"),
+    ];
+    let copies = IdenticalSources::new(&files);
+    let claim = |index: usize| copies.claim(index, &fs::read(&files[index]).unwrap());
+    let Claim::First(key) = claim(0) else { panic!("the first copy wasn't claimed") };
+    assert!(matches!(claim(1), Claim::Unique));
+    assert!(matches!(claim(2), Claim::Queued));
+    assert_eq!(copies.finish(key, std::sync::Arc::new(7)), vec![2]);
+    assert!(matches!(claim(3), Claim::Copy(result) if *result == 7));
+
+    let mut config = Config::default();
+    config.jobs = 2;
+    let mut linter = Linter::new(config);
+    let issues = linter.check_directory(dir.path()).unwrap();
+    let found = |service: &str, code: &str| {
+        issues
+            .iter()
+            .any(|i| i.code == code && i.file == dir.path().join(service).join("main.py"))
+    };
+    for service in ["a", "b", "c"] {
+        assert!(found(service, "E0602"), "missing E0602 for {}", service);
+    }
+    assert!(found("a", "E1120"));
+    assert!(!found("b", "E1120"));
+    assert!(!found("c", "E1120"));
+}
+
+#[test]
+fn test_streaming_emits_each_file_once() {
+    use prylint::reporter::{stream_report, Reporter, StreamOrder};
+
+    let dir = TempDir::new().unwrap();
+    let files: Vec<PathBuf> = (0..6)
+        .map(|i| create_test_file(&dir, &format!("mod{}.py", i), &"print(missing)\n".repeat(i + 1)))
+        .collect();
+    let mut config = Config::default();
+    config.jobs = 3;
+    let linter = Linter::new(config);
+
+    let emitted = std::sync::Mutex::new(Vec::new());
+    linter
+        .check_files_streaming(&files, |index, _, issues| emitted.lock().unwrap().push((index, issues.len())))
+        .unwrap();
+    let mut emitted = emitted.into_inner().unwrap();
+    emitted.sort();
+    assert_eq!(emitted, (0..6).map(|i| (i, i + 1)).collect::<Vec<_>>());
+
+    for order in [StreamOrder::Ordered, StreamOrder::Unordered] {
+        let counts = stream_report(Reporter::new(Some("parseable")), order, |emit| {
+            linter.check_files_streaming(&files, emit)
+        })
+        .unwrap();
+        assert_eq!(counts.errors, 21);
+    }
+}
+
+#[test]
+fn test_ndjson_writes_issue_and_file_records() {
+    use prylint::reporter::{Reporter, StreamOrder, StreamingReporter};
+
+    let issues = run_linter("print(missing)\nprint(also_missing)\n");
+    let mut out = Vec::new();
+    let mut stream = StreamingReporter::new(Reporter::new(Some("ndjson")), StreamOrder::Ordered, &mut out);
+    stream.file_done(1, PathBuf::from("clean.py"), Vec::new()).unwrap();
+    stream.file_done(0, PathBuf::from("test.py"), issues).unwrap();
+    let counts = stream.finish().unwrap();
+    assert_eq!(counts.errors, 2);
+
+    let records: Vec<serde_json::Value> = String::from_utf8(out)
+        .unwrap()
+        .lines()
+        .map(|line| serde_json::from_str(line).unwrap())
+        .collect();
+    let kinds: Vec<&str> = records.iter().map(|r| r["type"].as_str().unwrap()).collect();
+    assert_eq!(kinds, vec!["issue", "issue", "file", "file"]);
+    assert_eq!(records[0]["code"], "E0602");
+    assert_eq!(records[2]["file"], "test.py");
+    assert_eq!(records[2]["errors"], 2);
+    assert_eq!(records[3]["file"], "clean.py");
+    assert_eq!(records[3]["issues"], 0);
+}
+
+#[test]
+fn test_binary_stream_interns_paths_and_rules() {
+    use prylint::binary_report::{BinaryEncoder, MAGIC, VERSION};
+
+    let issues = run_linter("print(a)\nprint(b)\nprint(c)\n");
+    assert_eq!(issues.len(), 3);
+    let mut out = Vec::new();
+    let mut encoder = BinaryEncoder::new();
+    encoder.write_issues(&mut out, &issues[..1]).unwrap();
+    encoder.write_issues(&mut out, &issues[1..]).unwrap();
+    encoder.finish(&mut out).unwrap();
+
+    assert_eq!(&out[..4], MAGIC);
+    assert_eq!(u16::from_le_bytes([out[4], out[5]]), VERSION);
+    let mut kinds = Vec::new();
+    let mut pos = 6;
+    while pos < out.len() {
+        kinds.push(out[pos]);
+        let len = u32::from_le_bytes(out[pos + 1..pos + 5].try_into().unwrap()) as usize;
+        pos += 5 + len;
+    }
+    assert_eq!(pos, out.len());
+    // One file and one rule definition, three issues, then the end record
+    assert_eq!(kinds, vec![1, 2, 3, 3, 3, 0]);
+    assert_eq!(&out[out.len() - 8..], &3u64.to_le_bytes());
+}
+
+#[test]
+fn test_statistics_match_full_report_counts() {
+    let dir = TempDir::new().unwrap();
+    let files = vec![
+        create_test_file(&dir, "a.py", "print(missing)\nprint(also_missing)\n"),
+        create_test_file(&dir, "b.py", "def f(x):\n    return x\nf()\nprint(missing)\n"),
+        create_test_file(&dir, "clean.py", "x = 1\n"),
+    ];
+    let mut config = Config::default();
+    config.jobs = 2;
+    let linter = Linter::new(config);
+
+    let issues = linter.check_files(&files).unwrap();
+    let statistics = linter.check_files_statistics(&files).unwrap();
+    assert_eq!(statistics.files, 3);
+    assert_eq!(statistics.total(), issues.len());
+    assert_eq!(statistics.by_code["E0602"].count, 3);
+    assert_eq!(statistics.by_code["E0602"].symbol, "undefined-variable");
+    assert_eq!(statistics.by_file[&files[0]], 2);
+    assert!(!statistics.by_file.contains_key(&files[2]));
+
+    let tally = linter.tally_source(&files[0], "print(missing)\n".to_string());
+    assert_eq!(tally.count("E0602"), 1);
+
+    let mut config = Config::default();
+    config.disabled_checkers.insert("E0602".to_string());
+    let linter = Linter::new(config);
+    let statistics = linter.check_files_statistics(&files).unwrap();
+    assert!(!statistics.by_code.contains_key("E0602"));
+}
+
+#[test]
+fn test_max_issues_stops_the_run_early() {
+    let dir = TempDir::new().unwrap();
+    let files: Vec<PathBuf> = (0..20)
+        .map(|i| create_test_file(&dir, &format!("mod{}.py", i), &format!("print(missing{})\nprint(other)\n", i)))
+        .collect();
+
+    for jobs in [1, 4] {
+        let mut config = Config::default();
+        config.jobs = jobs;
+        config.max_issues = Some(3);
+        let linter = Linter::new(config);
+        let issues = linter.check_files(&files).unwrap();
+        assert_eq!(issues.len(), 3);
+
+        // Each run counts from zero again
+        let emitted = std::sync::Mutex::new(0);
+        linter
+            .check_files_streaming(&files, |_, _, issues| *emitted.lock().unwrap() += issues.len())
+            .unwrap();
+        assert_eq!(emitted.into_inner().unwrap(), 3);
+    }
+
+    let mut config = Config::default();
+    config.max_issues = Some(1);
+    let linter = Linter::new(config);
+    assert_eq!(linter.check_files(&files[..1]).unwrap().len(), 1);
+    let clean = create_test_file(&dir, "clean.py", "x = 1\n");
+    assert!(linter.check_files(&[clean]).unwrap().is_empty());
+}
+
+#[test]
+fn test_diff_lints_changed_files_and_lines() {
+    use std::process::Command;
+
+    let dir = TempDir::new().unwrap();
+    let git = |args: &[&str]| {
+        let status = Command::new("git")
+            .args(["-c", "user.name=prylint", "-c", "user.email=prylint@example.com"])
+            .args(args)
+            .current_dir(dir.path())
+            .output()
+            .unwrap()
+            .status;
+        assert!(status.success(), "git {:?} failed", args);
+    };
+    git(&["init", "-q"]);
+    // The diff is parsed the same whatever prefixes are configured
+    git(&["config", "diff.noprefix", "true"]);
+    let changed = create_test_file(&dir, "changed.py", "print(old_missing)\nx = 1\n");
+    let shortened = create_test_file(&dir, "shortened.py", "import os\nos.getcwd()\n");
+    create_test_file(&dir, "untouched.py", "print(missing)\n");
+    // git ends this name with a tab, and C-quotes the next one
+    let spaced = create_test_file(&dir, "with space.py", "x = 1\n");
+    let quoted = create_test_file(&dir, "quo\"te.py", "print(quote_old)\n");
+    git(&["add", "."]);
+    git(&["commit", "-q", "-m", "base"]);
+    fs::write(&changed, "print(old_missing)\nprint(new_missing)\n").unwrap();
+    fs::write(&spaced, "x = 1\nprint(space_missing)\n").unwrap();
+    fs::write(&quoted, "print(quote_old)\nprint(quote_new)\n").unwrap();
+    // Only a deletion, which leaves `os` undefined
+    fs::write(&shortened, "os.getcwd()\n").unwrap();
+    let added = create_test_file(&dir, "added.py", "print(also_missing)\n");
+
+    let scope = prylint::git::diff_scope("HEAD", &[dir.path().to_path_buf()]).unwrap();
+    let mut files = scope.files.clone();
+    files.sort();
+    let canonical = |path: &PathBuf| path.canonicalize().unwrap();
+    assert_eq!(
+        files.iter().map(canonical).collect::<Vec<_>>(),
+        vec![canonical(&added), canonical(&changed), canonical(&quoted), canonical(&shortened), canonical(&spaced)]
+    );
+
+    let mut linter = Linter::new(Config::default());
+    assert_eq!(linter.check_files(&files).unwrap().len(), 7);
+    linter.set_changed_lines(scope.lines);
+    let issues = linter.check_files(&files).unwrap();
+    assert_eq!(issues.len(), 4);
+    assert!(issues.iter().all(|i| !i.message.contains("old_missing") && !i.message.contains("quote_old")));
+}
+
+#[test]
+fn test_rev_lints_blobs_without_checkout() {
+    use std::process::Command;
+
+    let dir = TempDir::new().unwrap();
+    let git = |args: &[&str]| {
+        let status = Command::new("git")
+            .args(["-c", "user.name=prylint", "-c", "user.email=prylint@example.com"])
+            .args(args)
+            .current_dir(dir.path())
+            .output()
+            .unwrap()
+            .status;
+        assert!(status.success(), "git {:?} failed", args);
+    };
+    git(&["init", "-q"]);
+    fs::create_dir(dir.path().join("pkg")).unwrap();
+    create_test_file(&dir, "pkg/a.py", "print(missing)\n");
+    create_test_file(&dir, "pkg/copy.py", "print(missing)\n");
+    create_test_file(&dir, "b.py", "import os\nos.path.join()\n");
+    git(&["add", "."]);
+    git(&["commit", "-q", "-m", "v1"]);
+    git(&["tag", "v1"]);
+    create_test_file(&dir, "pkg/a.py", "x = 1\n");
+    git(&["commit", "-q", "-am", "v2"]);
+    // Uncommitted changes aren't part of any revision
+    create_test_file(&dir, "b.py", "print(dirty)\n");
+
+    let cache = TempDir::new().unwrap();
+    let lint = |rev: &str, paths: &[PathBuf]| {
+        let mut config = Config::default();
+        config.cache_dir = Some(cache.path().to_path_buf());
+        let linter = Linter::new(config);
+        let found = std::sync::Mutex::new(Vec::new());
+        linter
+            .check_revision_streaming(dir.path(), rev, paths, |index, path, issues| {
+                found.lock().unwrap().push((index, path.to_path_buf(), issues.len()))
+            })
+            .unwrap();
+        linter.save_blob_cache().unwrap();
+        let mut found = found.into_inner().unwrap();
+        found.sort();
+        found
+    };
+
+    let v1 = lint("v1", &[]);
+    assert_eq!(
+        v1,
+        vec![(0, PathBuf::from("b.py"), 0), (1, PathBuf::from("pkg/a.py"), 1), (2, PathBuf::from("pkg/copy.py"), 1)]
+    );
+    assert!(cache.path().join(prylint::blob_cache::CACHE_DIR).is_dir());
+    assert_eq!(lint("v1", &[]), v1);
+    assert_eq!(lint("HEAD", &[PathBuf::from("pkg")]), vec![(0, PathBuf::from("pkg/a.py"), 0), (1, PathBuf::from("pkg/copy.py"), 1)]);
+}
+
+#[test]
+fn test_archives_are_linted_in_place() {
+    let dir = TempDir::new().unwrap();
+    let archive = dir.path().join("pkg-1.0.tar.gz");
+    let encoder = flate2::write::GzEncoder::new(fs::File::create(&archive).unwrap(), flate2::Compression::default());
+    let mut builder = tar::Builder::new(encoder);
+    for (name, source) in [
+        ("pkg-1.0/pkg/__init__.py", "from pkg.util import helper\nhelper()\n"),
+        ("pkg-1.0/pkg/util.py", "def helper():\n    print(missing)\n"),
+        ("pkg-1.0/PKG-INFO", "Name: pkg\n"),
+        ("pkg-1.0/pkg/big.py", "print(missing)\n".repeat(100).as_str()),
+    ] {
+        let mut header = tar::Header::new_gnu();
+        header.set_size(source.len() as u64);
+        header.set_mode(0o644);
+        header.set_cksum();
+        builder.append_data(&mut header, name, source.as_bytes()).unwrap();
+    }
+    builder.into_inner().unwrap().finish().unwrap();
+    let local = create_test_file(&dir, "local.py", "print(undefined)\n");
+
+    // Members over the size limit are skipped without being read whole
+    let mut config = Config::default();
+    config.max_file_size = Some(1000);
+    let mut linter = Linter::new(config);
+    let issues = linter.check_path(&archive).unwrap();
+    let found: Vec<(&str, PathBuf)> = issues.iter().map(|issue| (issue.code.as_str(), issue.file.clone())).collect();
+    assert_eq!(
+        found,
+        vec![("E0602", archive.join("pkg-1.0/pkg/util.py")), ("I0013", archive.join("pkg-1.0/pkg/big.py"))]
+    );
+
+    // Files come first, then archive members in archive order
+    let issues = linter.check_paths(&[archive.clone(), local.clone()]).unwrap();
+    let files: Vec<&PathBuf> = issues.iter().map(|issue| &issue.file).collect();
+    assert_eq!(files, vec![&local, &archive.join("pkg-1.0/pkg/util.py"), &archive.join("pkg-1.0/pkg/big.py")]);
+}
+
+/// The issues in `tests/fixtures/report.pryb`, which the Python decoder's
+/// tests read; written in two batches like a streamed report
+fn binary_fixture_batches() -> Vec<Vec<Issue>> {
+    let issue = |code: &str, message: &str, file: &str, line, column, symbol: &str| {
+        Issue::new(code.into(), message.into(), PathBuf::from(file), line, column, symbol.into())
+    };
+    vec![
+        vec![
+            issue("E0602", "Undefined variable 'x'", "a.py", 3, 4, "undefined-variable"),
+            issue("E0602", "Undefined variable 'y'", "a.py", 5, 0, "undefined-variable"),
+            issue("E1120", "No value for argument 'b' in function call", "pkg/b.py", 7, 8, "no-value-for-parameter"),
+        ],
+        vec![
+            issue("E0602", "Undefined variable 'é'", "pkg/b.py", 9, 2, "undefined-variable"),
+            issue("I0013", "Ignoring entire file: over 1000 bytes", "big.py", 1, 0, "file-ignored"),
+        ],
+    ]
+}
+
+#[test]
+fn test_binary_stream_matches_python_fixture() {
+    use prylint::binary_report::BinaryEncoder;
+
+    let mut out = Vec::new();
+    let mut encoder = BinaryEncoder::new();
+    for batch in binary_fixture_batches() {
+        encoder.write_issues(&mut out, &batch).unwrap();
+    }
+    encoder.finish(&mut out).unwrap();
+    // If the format changes on purpose, regenerate the fixture from `out`
+    // and update tests/test_python_package.py to match
+    assert_eq!(out, include_bytes!("fixtures/report.pryb").to_vec());
+}
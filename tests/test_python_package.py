@@ -0,0 +1,179 @@
+"""Tests for the Python package's binary decoder and IssueTable.
+
+``fixtures/report.pryb`` was written by the Rust encoder;
+``test_binary_stream_matches_python_fixture`` in ``test_prylint.rs`` fails
+if the encoder's output drifts from it.
+"""
+
+import os
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from prylint_package import linter
+from prylint_package.binary import BinaryFormatError, decode, decode_columns
+from prylint_package.linter import Issue, lint_directory, lint_table
+from prylint_package.table import IssueTable
+
+FIXTURE = (Path(__file__).parent / "fixtures" / "report.pryb").read_bytes()
+
+EXPECTED = [
+    ("E0602", "Undefined variable 'x'", "a.py", 3, 4, "error", "undefined-variable"),
+    ("E0602", "Undefined variable 'y'", "a.py", 5, 0, "error", "undefined-variable"),
+    ("E1120", "No value for argument 'b' in function call", "pkg/b.py", 7, 8, "error",
+     "no-value-for-parameter"),
+    ("E0602", "Undefined variable 'é'", "pkg/b.py", 9, 2, "error", "undefined-variable"),
+    ("I0013", "Ignoring entire file: over 1000 bytes", "big.py", 1, 0, "info", "file-ignored"),
+]
+
+
+def _rows(issues):
+    return [
+        (i.code, i.message, i.file, i.line, i.column, i.severity, i.symbol)
+        for i in issues
+    ]
+
+
+def test_decode_reads_every_issue():
+    assert _rows(decode(FIXTURE, Issue)) == EXPECTED
+
+
+def test_decode_columns_interns_paths_and_rules():
+    columns = decode_columns(FIXTURE)
+    assert columns.files == ["a.py", "pkg/b.py", "big.py"]
+    assert [code for code, _, _ in columns.rules] == ["E0602", "E1120", "I0013"]
+    assert list(columns.file_ids) == [0, 0, 1, 1, 2]
+    assert list(columns.rule_ids) == [0, 0, 1, 0, 2]
+
+
+def test_empty_stream_decodes_to_nothing():
+    assert decode(b"", Issue) == []
+    assert len(IssueTable.from_binary(b"")) == 0
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"PRY", "truncated header"),
+    (b"XXXX\x01\x00", "not a prylint binary stream"),
+    (b"PRYB\x02\x00", "unsupported stream version"),
+    (FIXTURE[:-13], "stream ended without an end record"),
+    (FIXTURE[:-10], "truncated record header"),
+    (FIXTURE[:-3], "truncated record$"),
+])
+def test_damaged_streams_raise_format_errors(data, message):
+    with pytest.raises(BinaryFormatError, match=message):
+        decode_columns(data)
+
+
+def test_malformed_payloads_raise_format_errors():
+    header = FIXTURE[:6]
+    end = struct.pack("<BIQ", 0, 8, 0)
+    short_issue = struct.pack("<BI", 3, 4) + b"\0" * 4
+    bad_severity = struct.pack("<BIIB", 2, 5, 0, 9)
+    long_string = struct.pack("<BII", 1, 8, 0) + struct.pack("<I", 100)
+    for record in (short_issue, bad_severity, long_string):
+        with pytest.raises(BinaryFormatError):
+            decode_columns(header + record + end)
+
+
+def test_unknown_records_are_skipped():
+    header, records = FIXTURE[:6], FIXTURE[6:]
+    unknown = struct.pack("<BI", 200, 3) + b"new"
+    assert _rows(decode(header + unknown + records, Issue)) == EXPECTED
+
+
+def test_table_rows_match_decoded_issues():
+    table = IssueTable.from_binary(FIXTURE)
+    assert len(table) == len(EXPECTED)
+    assert _rows(table) == EXPECTED
+    assert _rows([table[-1]]) == EXPECTED[-1:]
+    with pytest.raises(IndexError):
+        table[len(EXPECTED)]
+
+
+def test_table_slicing():
+    table = IssueTable.from_binary(FIXTURE)
+    assert _rows(table[1:3]) == EXPECTED[1:3]
+    assert _rows(table[::-2]) == EXPECTED[::-2]
+    assert len(table[5:]) == 0
+    # Slices share the interned tables rather than copying them
+    assert table[1:].files is table.files
+
+
+def test_table_filter():
+    table = IssueTable.from_binary(FIXTURE)
+    assert _rows(table.filter(code="E0602")) == [EXPECTED[0], EXPECTED[1], EXPECTED[3]]
+    assert _rows(table.filter(code=["E1120", "I0013"])) == EXPECTED[2:3] + EXPECTED[4:]
+    assert _rows(table.filter(severity="info")) == EXPECTED[4:]
+    assert _rows(table.filter(file="pkg/b.py")) == EXPECTED[2:4]
+    assert _rows(table.filter(code="E0602", file="pkg/b.py")) == EXPECTED[3:4]
+    assert len(table.filter(code="W0611")) == 0
+    assert _rows(table.filter()) == EXPECTED
+
+
+def test_table_counts():
+    table = IssueTable.from_binary(FIXTURE)
+    assert table.count_by_code() == {"E0602": 3, "E1120": 1, "I0013": 1}
+    assert table.count_by_file() == {"a.py": 2, "pkg/b.py": 2, "big.py": 1}
+    assert table.filter(file="a.py").count_by_code() == {"E0602": 2}
+
+
+def test_lint_table_decodes_binary_output(tmp_path, monkeypatch):
+    calls = []
+
+    def invoke(paths, binary_output, *args):
+        calls.append((paths, binary_output))
+        return FIXTURE
+
+    monkeypatch.setattr(linter, "_invoke", invoke)
+    table = lint_table(str(tmp_path))
+    assert calls == [([str(tmp_path)], True)]
+    assert _rows(table) == EXPECTED
+
+
+def test_lint_table_reports_unreadable_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(linter, "_invoke", lambda *args: FIXTURE[:-3])
+    with pytest.raises(linter.PrylintError, match="Unreadable prylint output"):
+        lint_table(str(tmp_path))
+
+
+def test_lint_directory_passes_the_directory(tmp_path, monkeypatch):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "b.py").write_text("")
+    (tmp_path / "a.py").write_text("")
+    calls = []
+
+    def invoke(paths, *args):
+        calls.append(paths)
+        return FIXTURE
+
+    monkeypatch.setattr(linter, "_invoke", invoke)
+    assert _rows(lint_directory(str(tmp_path))) == EXPECTED
+    assert calls == [[str(tmp_path)]]
+
+    calls.clear()
+    lint_directory(str(tmp_path), recursive=False)
+    assert calls == [[str(tmp_path / "a.py")]]
+
+
+def test_lint_directory_fallback_lists_the_files_the_binary_walks(tmp_path, monkeypatch):
+    for name in ("a.py", "pkg/b.py", "pkg/c.pyi", "venv/lib/d.py", ".tox/e.py",
+                 "pkg/__pycache__/f.py", "notes.txt"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+    (tmp_path / "link.py").symlink_to(tmp_path / "a.py")
+    calls = []
+
+    def invoke(paths, *args):
+        calls.append(paths)
+        if paths == [str(tmp_path)]:
+            raise linter.PrylintError("one file failed")
+        return b""
+
+    monkeypatch.setattr(linter, "_invoke", invoke)
+    assert lint_directory(str(tmp_path)) == []
+    linted = sorted(os.path.relpath(path, tmp_path) for [path] in calls[1:])
+    assert linted == ["a.py", os.path.join("pkg", "b.py"), os.path.join("pkg", "c.pyi")]